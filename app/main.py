@@ -1,4 +1,5 @@
 import os
+from contextlib import asynccontextmanager
 from typing import List
 
 import dotenv
@@ -7,7 +8,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.middleware.auth import APIKeyMiddleware
-from app.routers import ascendant, planets
+from app.routers import (
+    ascendant,
+    chart,
+    ephemeris,
+    events,
+    jobs,
+    live,
+    planets,
+    synastry,
+    transits,
+)
+from app.utils import metrics
+from app.utils.astro_calculations import get_engine
+from app.utils.executor import compute_executor
+from app.utils.metrics import METRICS_ENABLED, TimingMiddleware
 
 ########################################################
 #           Settings
@@ -17,21 +32,38 @@ dotenv.load_dotenv()
 
 ALLOWED_ORIGINS: List[str] = os.getenv("ALLOWED_ORIGINS", "").split(",")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load (and memory-map) the ephemeris engine before serving requests
+    get_engine()
+    # Pick up jobs left unfinished by a restart
+    jobs.job_runner.resume()
+    yield
+    await live.live_feed.stop()
+    jobs.job_runner.shutdown()
+    compute_executor.shutdown()
+
+
 app = FastAPI(
     title=MESSAGE,
     description="API for performing astrological calculations",
     version="0.0.1",
+    lifespan=lifespan,
 )
 app.add_middleware(APIKeyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
     expose_headers=["API_KEY"],
     max_age=int(os.getenv("CORS_MAX_AGE", "3600")),
 )
+if METRICS_ENABLED:
+    # Added last so that it is the outermost middleware and times the rest
+    app.add_middleware(TimingMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -40,7 +72,16 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 #           Endpoints
 ########################################################
 app.include_router(planets.router)
+app.include_router(live.router)
 app.include_router(ascendant.router)
+app.include_router(chart.router)
+app.include_router(ephemeris.router)
+app.include_router(events.router)
+app.include_router(jobs.router)
+app.include_router(transits.router)
+app.include_router(synastry.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -1,14 +1,15 @@
+import hashlib
+import json
 import os
 import time
-from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any
 
 from dotenv import load_dotenv
-from fastapi import HTTPException
-from fastapi.responses import HTMLResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middleware.rate_limit import RateLimitStore, create_backend
+from app.utils.metrics import record, register_counter
 
 load_dotenv()
 
@@ -22,73 +23,163 @@ MAX_REQUESTS_PER_WINDOW = int(
 MAX_FAILED_ATTEMPTS = int(os.environ.get("MAX_FAILED_ATTEMPTS", "5"))
 BLOCK_DURATION = int(os.environ.get("BLOCK_DURATION", "300"))
 
-# In-memory storage for rate limiting and failed attempts
-request_counts: Dict[str, Dict[str, Any]] = defaultdict(
-    lambda: {"count": 0, "window_start": time.time()}
-)
-failed_attempts: Dict[str, Dict[str, Any]] = defaultdict(
-    lambda: {"count": 0, "blocked_until": None}
+MAX_TRACKED_CLIENTS = int(os.environ.get("MAX_TRACKED_CLIENTS", "100000"))
+# "memory", "sqlite:///path/to/file.db" (shared by the workers of one host)
+# or "redis://host:port/db" (shared by several hosts)
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+
+# Storage for rate limiting and failed attempts
+rate_limit_store = create_backend(
+    RATE_LIMIT_BACKEND,
+    window=RATE_LIMIT_WINDOW,
+    max_requests=MAX_REQUESTS_PER_WINDOW,
+    max_failures=MAX_FAILED_ATTEMPTS,
+    block_duration=BLOCK_DURATION,
+    max_clients=MAX_TRACKED_CLIENTS,
 )
+if isinstance(rate_limit_store, RateLimitStore):
+    register_counter(
+        "rate_limit_clients",
+        "Clients tracked by the rate limit store.",
+        'backend="memory"',
+        lambda: len(rate_limit_store),
+        kind="gauge",
+    )
+    register_counter(
+        "rate_limit_evictions_total",
+        "Clients evicted to stay within MAX_TRACKED_CLIENTS.",
+        'backend="memory"',
+        lambda: rate_limit_store.evictions,
+    )
+else:
+    register_counter(
+        "rate_limit_errors_total",
+        "Checks let through because the shared store failed.",
+        f'backend="{RATE_LIMIT_BACKEND.split(":", 1)[0]}"',
+        lambda: rate_limit_store.errors,
+    )
 
 # Load the invalid API key template
 INVALID_API_TEMPLATE = Path("app/templates/invalid_api.html").read_text()
 
-# List of paths that don't require API key authentication
-PUBLIC_PATHS = {"/docs", "/openapi.json", "/"}
+# List of paths that don't require API key authentication, plus any listed
+# in EXTRA_PUBLIC_PATHS (e.g. "/metrics" for an unauthenticated scraper)
+PUBLIC_PATHS = {"/docs", "/openapi.json", "/"} | {
+    path.strip()
+    for path in os.environ.get("EXTRA_PUBLIC_PATHS", "").split(",")
+    if path.strip()
+}
+
+API_KEY_HEADER = b"api_key"
+
+
+########################################################
+#           Precomputed responses
+########################################################
+def _response(
+    status: int, body: bytes, content_type: bytes
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    start = {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+INVALID_API_KEY_RESPONSE = _response(
+    403, INVALID_API_TEMPLATE.encode(), b"text/html; charset=utf-8"
+)
+RATE_LIMITED_RESPONSE = _response(
+    429,
+    json.dumps(
+        {"detail": "Too many requests. Please try again later."}
+    ).encode(),
+    b"application/json",
+)
 
 
 ########################################################
 #           Utility functions
 ########################################################
 def is_rate_limited(ip: str) -> bool:
-    now = time.time()
-    data = request_counts[ip]
-    if now - data["window_start"] > RATE_LIMIT_WINDOW:
-        data["count"] = 0
-        data["window_start"] = now
-    if (
-        failed_attempts[ip]["blocked_until"]
-        and now < failed_attempts[ip]["blocked_until"]
-    ):
-        return True
-    data["count"] += 1
-    return data["count"] > MAX_REQUESTS_PER_WINDOW
+    return rate_limit_store.is_rate_limited(ip)
 
 
 def record_failed_attempt(ip: str) -> None:
-    now = time.time()
-    data = failed_attempts[ip]
-    if data["blocked_until"] and now > data["blocked_until"]:
-        data["count"] = 0
-        data["blocked_until"] = None
-    data["count"] += 1
-    if data["count"] >= MAX_FAILED_ATTEMPTS:
-        data["blocked_until"] = now + BLOCK_DURATION
-
-
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
+    rate_limit_store.record_failed_attempt(ip)
+
+
+def hash_api_key(api_key: str | bytes) -> bytes:
+    if isinstance(api_key, str):
+        api_key = api_key.encode()
+    return hashlib.sha256(api_key).digest()
+
+
+class APIKeyMiddleware:
+    """Pure ASGI API key and rate limit check.
+
+    Keys are kept as SHA-256 digests, so a lookup is a single set
+    membership test that does not depend on how much of a key matches.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.valid_api_keys = self._load_api_keys()
 
-    def _load_api_keys(self) -> list[str]:
+    def _load_api_keys(self) -> frozenset[bytes]:
         api_keys = os.getenv("API_KEYS", "")
         if api_keys:
-            return [key.strip() for key in api_keys.split(",")]
-        single_key = os.getenv("API_KEY")
-        return [single_key] if single_key else []
-
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in PUBLIC_PATHS:
-            return await call_next(request)
-        client_ip = request.client.host if request.client else "unknown"
+            keys = [key.strip() for key in api_keys.split(",")]
+        else:
+            single_key = os.getenv("API_KEY")
+            keys = [single_key] if single_key else []
+        return frozenset(hash_api_key(key) for key in keys)
+
+    def is_valid_api_key(self, api_key: str | bytes | None) -> bool:
+        return bool(api_key) and hash_api_key(api_key) in self.valid_api_keys
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket") or (
+            scope["path"] in PUBLIC_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         if is_rate_limited(client_ip):
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later.",
-            )
-        api_key = request.headers.get("API_KEY")
-        if not api_key or api_key not in self.valid_api_keys:
+            record("auth", start)
+            await self._reject(scope, send, RATE_LIMITED_RESPONSE)
+            return
+
+        api_key = None
+        for name, value in scope["headers"]:
+            if name == API_KEY_HEADER:
+                api_key = value
+                break
+        if not self.is_valid_api_key(api_key):
             record_failed_attempt(client_ip)
-            return HTMLResponse(content=INVALID_API_TEMPLATE, status_code=403)
-        return await call_next(request)
+            record("auth", start)
+            await self._reject(scope, send, INVALID_API_KEY_RESPONSE)
+            return
+        record("auth", start)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(
+        scope: Scope,
+        send: Send,
+        response: tuple[dict[str, Any], dict[str, Any]],
+    ) -> None:
+        if scope["type"] == "websocket":
+            # 1008: policy violation
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        start, body = response
+        await send(start)
+        await send(body)
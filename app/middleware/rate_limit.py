@@ -0,0 +1,427 @@
+import heapq
+import socket
+import sqlite3
+import time
+from typing import Protocol
+from urllib.parse import urlparse
+
+
+class RateLimitBackend(Protocol):
+    def is_rate_limited(self, ip: str) -> bool:
+        ...
+
+    def record_failed_attempt(self, ip: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+########################################################
+#           In-process backend
+########################################################
+class ClientState:
+    __slots__ = (
+        "requests",
+        "window_start",
+        "failures",
+        "blocked_until",
+        "expires_at",
+    )
+
+    def __init__(self, now: float):
+        self.requests = 0
+        self.window_start = now
+        self.failures = 0
+        self.blocked_until = 0.0
+        self.expires_at = 0.0
+
+
+class RateLimitStore:
+    """Fixed-size per-client request windows and failed attempt blocks.
+
+    A client's state is dropped once its window has elapsed and it is not
+    blocked, which also forgets failed attempts after a quiet window.
+    Expiry times are kept in a heap, so expired clients are purged in
+    expiry order as time moves on. When ``max_clients`` are tracked, the
+    client closest to expiring is evicted to make room for a new one.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_requests: int,
+        max_failures: int,
+        block_duration: float,
+        max_clients: int,
+    ):
+        self.window = window
+        self.max_requests = max_requests
+        self.max_failures = max_failures
+        self.block_duration = block_duration
+        self.max_clients = max_clients
+        self.evictions = 0
+        self.expirations = 0
+        self._clients: dict[str, ClientState] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def clear(self) -> None:
+        self._clients.clear()
+        self._expiry.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "clients": len(self._clients),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _schedule(self, ip: str, state: ClientState) -> None:
+        expires_at = max(state.window_start + self.window, state.blocked_until)
+        if expires_at != state.expires_at:
+            state.expires_at = expires_at
+            heapq.heappush(self._expiry, (expires_at, ip))
+        # Rescheduling leaves stale heap entries behind; rebuild the heap
+        # when they outnumber the live ones
+        if len(self._expiry) > 2 * len(self._clients) + 64:
+            self._expiry = [
+                (state.expires_at, ip) for ip, state in self._clients.items()
+            ]
+            heapq.heapify(self._expiry)
+
+    def _pop_earliest(self, now: float | None) -> bool:
+        """Drop the client expiring first (if expired by ``now``)."""
+        while self._expiry:
+            expires_at, ip = self._expiry[0]
+            if now is not None and expires_at > now:
+                return False
+            heapq.heappop(self._expiry)
+            state = self._clients.get(ip)
+            if state is not None and state.expires_at == expires_at:
+                del self._clients[ip]
+                return True
+        return False
+
+    def _get(self, ip: str, now: float) -> ClientState:
+        while self._pop_earliest(now):
+            self.expirations += 1
+        state = self._clients.get(ip)
+        if state is None:
+            if len(self._clients) >= self.max_clients and self._pop_earliest(
+                None
+            ):
+                self.evictions += 1
+            state = self._clients[ip] = ClientState(now)
+            self._schedule(ip, state)
+        return state
+
+    def is_rate_limited(self, ip: str) -> bool:
+        now = time.monotonic()
+        state = self._get(ip, now)
+        if now - state.window_start > self.window:
+            state.requests = 0
+            state.window_start = now
+            self._schedule(ip, state)
+        if now < state.blocked_until:
+            return True
+        state.requests += 1
+        return state.requests > self.max_requests
+
+    def record_failed_attempt(self, ip: str) -> None:
+        now = time.monotonic()
+        state = self._get(ip, now)
+        if state.blocked_until and now > state.blocked_until:
+            state.failures = 0
+            state.blocked_until = 0.0
+        state.failures += 1
+        if state.failures >= self.max_failures:
+            state.blocked_until = now + self.block_duration
+            self._schedule(ip, state)
+
+
+########################################################
+#           SQLite backend (multiple workers, one host)
+########################################################
+class SQLiteRateLimitBackend:
+    """Rate limit state shared by all workers through one SQLite file.
+
+    The database runs in WAL mode and each check is a single UPSERT ...
+    RETURNING statement, so a call costs one short write transaction.
+    Expired clients are deleted every ``purge_interval`` writes. Writes
+    wait at most ``timeout`` seconds for a lock held by another worker, as
+    they block the event loop; if the database stays locked or fails,
+    requests are let through (fail open) and counted in ``errors``.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS clients (
+            ip TEXT PRIMARY KEY,
+            requests INTEGER NOT NULL,
+            window_start REAL NOT NULL,
+            failures INTEGER NOT NULL,
+            blocked_until REAL NOT NULL
+        ) WITHOUT ROWID
+    """
+    COUNT_REQUEST = """
+        INSERT INTO clients VALUES (:ip, 1, :now, 0, 0)
+        ON CONFLICT (ip) DO UPDATE SET
+            requests = CASE
+                WHEN :now - window_start > :window
+                    THEN (CASE WHEN :now < blocked_until THEN 0 ELSE 1 END)
+                WHEN :now < blocked_until THEN requests
+                ELSE requests + 1
+            END,
+            window_start = CASE
+                WHEN :now - window_start > :window THEN :now
+                ELSE window_start
+            END
+        RETURNING requests, blocked_until
+    """
+    COUNT_FAILURE = """
+        INSERT INTO clients VALUES (
+            :ip, 0, :now, 1,
+            CASE WHEN 1 >= :max_failures THEN :now + :block ELSE 0 END
+        )
+        ON CONFLICT (ip) DO UPDATE SET
+            failures = CASE
+                WHEN blocked_until > 0 AND :now > blocked_until THEN 1
+                ELSE failures + 1
+            END,
+            blocked_until = CASE
+                WHEN (
+                    CASE
+                        WHEN blocked_until > 0 AND :now > blocked_until THEN 1
+                        ELSE failures + 1
+                    END
+                ) >= :max_failures THEN :now + :block
+                WHEN blocked_until > 0 AND :now > blocked_until THEN 0
+                ELSE blocked_until
+            END
+    """
+    PURGE = """
+        DELETE FROM clients
+        WHERE window_start + :window < :now AND blocked_until < :now
+    """
+
+    def __init__(
+        self,
+        path: str,
+        window: float,
+        max_requests: int,
+        max_failures: int,
+        block_duration: float,
+        purge_interval: int = 1000,
+        timeout: float = 0.05,
+    ):
+        self.window = window
+        self.max_requests = max_requests
+        self.max_failures = max_failures
+        self.block_duration = block_duration
+        self.purge_interval = purge_interval
+        self.errors = 0
+        self._writes = 0
+        self._db = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            timeout=timeout,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(self.SCHEMA)
+
+    def _write(self, sql: str, ip: str) -> sqlite3.Cursor:
+        now = time.time()
+        self._writes += 1
+        if self._writes % self.purge_interval == 0:
+            self._db.execute(self.PURGE, {"window": self.window, "now": now})
+        return self._db.execute(
+            sql,
+            {
+                "ip": ip,
+                "now": now,
+                "window": self.window,
+                "max_failures": self.max_failures,
+                "block": self.block_duration,
+            },
+        )
+
+    def is_rate_limited(self, ip: str) -> bool:
+        try:
+            requests, blocked_until = self._write(
+                self.COUNT_REQUEST, ip
+            ).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return False
+        return time.time() < blocked_until or requests > self.max_requests
+
+    def record_failed_attempt(self, ip: str) -> None:
+        try:
+            self._write(self.COUNT_FAILURE, ip)
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM clients")
+
+
+########################################################
+#           Redis backend (multiple hosts)
+########################################################
+class RESPConnection:
+    """Just enough of the Redis protocol to send pipelined commands."""
+
+    def __init__(self, host: str, port: int, db: int, timeout: float):
+        self.address = (host, port)
+        self.db = db
+        self.timeout = timeout
+        self._socket: socket.socket | None = None
+
+    def _connect(self) -> None:
+        self._socket = socket.create_connection(self.address, self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+        if self.db:
+            self.pipeline(("SELECT", self.db))
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+
+    def pipeline(self, *commands: tuple) -> list:
+        """Send all ``commands`` in one write and read their replies."""
+        if self._socket is None:
+            self._connect()
+        payload = bytearray()
+        for command in commands:
+            payload += b"*%d\r\n" % len(command)
+            for arg in command:
+                arg = arg if isinstance(arg, bytes) else str(arg).encode()
+                payload += b"$%d\r\n%s\r\n" % (len(arg), arg)
+        try:
+            self._socket.sendall(payload)
+            return [self._read_reply() for _ in commands]
+        except OSError:
+            self.close()
+            raise
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, data = line[:1], line[1:-2]
+        if kind == b"+":
+            return data.decode()
+        if kind == b"-":
+            raise ConnectionError(data.decode())
+        if kind == b":":
+            return int(data)
+        if kind == b"$":
+            if data == b"-1":
+                return None
+            value = self._reader.read(int(data) + 2)
+            return value[:-2]
+        if kind == b"*":
+            if data == b"-1":
+                return None
+            return [self._read_reply() for _ in range(int(data))]
+        raise ConnectionError(f"unexpected reply {line!r}")
+
+
+class RedisRateLimitBackend:
+    """Rate limit state shared by all hosts through Redis.
+
+    Counters are keys that expire with their window, and each check is a
+    single pipelined round trip. If Redis is unreachable requests are let
+    through (fail open) and counted in ``errors``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        window: float,
+        max_requests: int,
+        max_failures: int,
+        block_duration: float,
+        prefix: str = "rate-limit",
+        timeout: float = 0.25,
+    ):
+        parsed = urlparse(url)
+        self.window_ms = int(window * 1000)
+        self.max_requests = max_requests
+        self.max_failures = max_failures
+        self.block_ms = int(block_duration * 1000)
+        self.prefix = prefix
+        self.errors = 0
+        self._connection = RESPConnection(
+            parsed.hostname or "localhost",
+            parsed.port or 6379,
+            int(parsed.path.lstrip("/") or 0),
+            timeout,
+        )
+
+    def _key(self, ip: str, kind: str) -> str:
+        return f"{self.prefix}:{kind}:{ip}"
+
+    def is_rate_limited(self, ip: str) -> bool:
+        requests = self._key(ip, "requests")
+        try:
+            _, count, blocked = self._connection.pipeline(
+                ("SET", requests, 0, "PX", self.window_ms, "NX"),
+                ("INCR", requests),
+                ("EXISTS", self._key(ip, "blocked")),
+            )
+        except OSError:
+            self.errors += 1
+            return False
+        return bool(blocked) or count > self.max_requests
+
+    def record_failed_attempt(self, ip: str) -> None:
+        failures = self._key(ip, "failures")
+        try:
+            _, count = self._connection.pipeline(
+                ("SET", failures, 0, "PX", self.window_ms, "NX"),
+                ("INCR", failures),
+            )
+            if count >= self.max_failures:
+                self._connection.pipeline(
+                    ("SET", self._key(ip, "blocked"), 1, "PX", self.block_ms),
+                    ("DEL", failures),
+                )
+        except OSError:
+            self.errors += 1
+
+    def clear(self) -> None:
+        (keys,) = self._connection.pipeline(("KEYS", f"{self.prefix}:*"))
+        if keys:
+            self._connection.pipeline(("DEL", *keys))
+
+
+def create_backend(
+    url: str,
+    window: float,
+    max_requests: int,
+    max_failures: int,
+    block_duration: float,
+    max_clients: int,
+) -> RateLimitBackend:
+    """Backend for ``url``: ``memory``, ``sqlite:///path`` or ``redis://``."""
+    limits = {
+        "window": window,
+        "max_requests": max_requests,
+        "max_failures": max_failures,
+        "block_duration": block_duration,
+    }
+    if url.startswith("sqlite://"):
+        return SQLiteRateLimitBackend(url.removeprefix("sqlite://"), **limits)
+    if url.startswith("redis://"):
+        return RedisRateLimitBackend(url, **limits)
+    if url == "memory":
+        return RateLimitStore(max_clients=max_clients, **limits)
+    raise ValueError(f"Unsupported rate limit backend: {url}")
@@ -1,11 +1,27 @@
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Literal
 
 from pydantic import BaseModel, Field
 
+from app.utils.astro_calculations import MAX_BATCH_SIZE
+
 
 class DateTimeRequest(BaseModel):
     date_time: datetime | None = None
+    speed: bool = Field(
+        default=False, description="Include speeds in degrees per day"
+    )
+
+
+class BatchDateTimeRequest(BaseModel):
+    date_times: List[datetime] = Field(
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description=f"Datetimes to compute (at most {MAX_BATCH_SIZE})",
+    )
+    speed: bool = Field(
+        default=False, description="Include speeds in degrees per day"
+    )
 
 
 class LocationRequest(BaseModel):
@@ -19,9 +35,48 @@ class LocationRequest(BaseModel):
     tz_offset: str | None = None
 
 
+class BatchLocationRequest(BaseModel):
+    records: List[LocationRequest] = Field(
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description=f"Records to compute (at most {MAX_BATCH_SIZE})",
+    )
+    debug: bool = False
+
+
+HouseSystem = Literal[
+    "placidus",
+    "koch",
+    "porphyry",
+    "regiomontanus",
+    "campanus",
+    "alcabitius",
+    "topocentric",
+    "morinus",
+    "equal",
+    "whole_sign",
+]
+ChartField = Literal["planets", "houses", "angles"]
+
+
+class ChartRequest(LocationRequest):
+    house_system: HouseSystem = "placidus"
+    fields: List[ChartField] = Field(
+        default=["planets", "houses", "angles"],
+        min_length=1,
+        description="Parts of the chart to compute and return",
+    )
+    bodies: List[str] | None = Field(
+        default=None, description="Planets to return (all by default)"
+    )
+
+
 class PlanetPosition(BaseModel):
     sign: str
     degrees: float
+    speed: float | None = Field(
+        default=None, description="Degrees per day, negative if retrograde"
+    )
 
 
 class AscendantResponse(BaseModel):
@@ -29,4 +84,193 @@ class AscendantResponse(BaseModel):
     degrees: float
 
 
+class BatchPlanetaryPositionsResponse(BaseModel):
+    planets: List[str]
+    date_times: List[datetime]
+    signs: List[List[str]] = Field(
+        description="One row per datetime, one column per planet"
+    )
+    degrees: List[List[float]] = Field(
+        description="One row per datetime, one column per planet"
+    )
+    speeds: List[List[float]] | None = Field(
+        default=None, description="Degrees per day, if requested"
+    )
+
+
+class IngressEvent(BaseModel):
+    body: str
+    date_time: datetime = Field(description="UTC, to the nearest second")
+    sign: str = Field(description="Sign entered")
+    previous_sign: str
+    retrograde: bool
+
+
+class StationEvent(BaseModel):
+    body: str
+    date_time: datetime = Field(description="UTC, to the nearest second")
+    sign: str
+    degrees: float
+    direction: Literal["retrograde", "direct"] = Field(
+        description="Motion after the station"
+    )
+
+
+class ChartResponse(BaseModel):
+    date_time_utc: datetime
+    julian_day: float
+    house_system: HouseSystem
+    planets: Dict[str, PlanetPosition] | None = None
+    houses: List[PlanetPosition] | None = Field(
+        default=None, description="Cusps of houses 1 to 12"
+    )
+    angles: Dict[str, PlanetPosition] | None = None
+
+
+AspectName = Literal[
+    "conjunction",
+    "semisextile",
+    "semisquare",
+    "sextile",
+    "square",
+    "trine",
+    "sesquiquadrate",
+    "quincunx",
+    "opposition",
+]
+
+
+class TransitRequest(BaseModel):
+    start: datetime
+    end: datetime
+    natal: Dict[str, float] | None = Field(
+        default=None,
+        description="Natal points by name, as ecliptic longitudes in degrees",
+    )
+    birth: LocationRequest | None = Field(
+        default=None,
+        description="Birth data whose planets, ascendant and MC are the "
+        "natal points (instead of natal)",
+    )
+    bodies: List[str] | None = Field(
+        default=None, description="Transiting planets (all by default)"
+    )
+    aspects: List[AspectName] = Field(
+        default=["conjunction", "sextile", "square", "trine", "opposition"],
+        min_length=1,
+    )
+    orb: float = Field(default=1.0, gt=0, le=10, description="Orb in degrees")
+
+
+class ExactTransit(BaseModel):
+    date_time: datetime = Field(description="UTC, to the nearest second")
+    retrograde: bool
+
+
+class TransitWindow(BaseModel):
+    body: str
+    natal: str
+    aspect: AspectName
+    orb_start: datetime | None = Field(
+        description="Entry into orb, or null if already in orb at start"
+    )
+    orb_end: datetime | None = Field(
+        description="Exit from orb, or null if still in orb at end"
+    )
+    exact: List[ExactTransit] = Field(
+        description="Exact aspects within the window (several around a "
+        "station)"
+    )
+
+
+class TransitResponse(BaseModel):
+    natal: Dict[str, float]
+    windows: List[TransitWindow]
+
+
+class SynastryChart(BaseModel):
+    date_time: datetime | None = None
+    tz_offset: str | None = None
+    longitudes: Dict[str, float] | None = Field(
+        default=None,
+        description="Ecliptic longitudes by body, instead of date_time",
+    )
+
+
+class SynastryRequest(BaseModel):
+    charts: List[SynastryChart] = Field(min_length=1)
+    others: List[SynastryChart] | None = Field(
+        default=None,
+        description="Charts to compare each chart with (by default, every "
+        "pair of charts is compared)",
+    )
+    bodies: List[str] | None = Field(
+        default=None, description="Bodies compared (all planets by default)"
+    )
+    aspects: List[AspectName] = Field(
+        default=["conjunction", "sextile", "square", "trine", "opposition"],
+        min_length=1,
+    )
+    orbs: Dict[AspectName, float] = Field(
+        default={}, description="Orbs in degrees, overriding the defaults"
+    )
+    min_score: float = Field(
+        default=0, ge=0, description="Smallest score of the pairs returned"
+    )
+    limit: int = Field(default=100, ge=1, le=10000)
+
+
+class SynastryAspect(BaseModel):
+    body: str
+    other_body: str
+    aspect: AspectName
+    orb: float = Field(description="Deviation from the exact aspect")
+
+
+class SynastryPair(BaseModel):
+    chart: int = Field(description="Index in charts")
+    other: int = Field(description="Index in others (or charts)")
+    score: float = Field(description="Sum over aspects of 1 - deviation / orb")
+    aspects: List[SynastryAspect]
+
+
+class SynastryResponse(BaseModel):
+    pairs_compared: int
+    pairs: List[SynastryPair] = Field(description="Best scoring pairs first")
+
+
+JobKind = Literal["planets", "ascendant", "chart"]
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+class JobRequest(BaseModel):
+    kind: JobKind
+    date_times: List[datetime] | None = Field(
+        default=None, description="Datetimes of a planets job"
+    )
+    start: datetime | None = Field(
+        default=None, description="First datetime of a planets job range"
+    )
+    end: datetime | None = Field(
+        default=None, description="Last datetime of a planets job range"
+    )
+    step: str = "1d"
+    records: List[LocationRequest] | None = Field(
+        default=None, description="Records of an ascendant or chart job"
+    )
+    house_system: HouseSystem = "placidus"
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: JobKind
+    status: JobState
+    rows: int
+    rows_done: int
+    progress: float = Field(description="Fraction of rows computed")
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
 PlanetaryPositionsResponse = Dict[str, PlanetPosition]
@@ -1,30 +1,80 @@
-from datetime import timezone
-from typing import Any
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterator, Literal
 
+import numpy as np
 import swisseph as swe
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
-from app.models import LocationRequest
+from app.models import BatchLocationRequest, LocationRequest
 from app.routers.planets import ROUND_DECIMALS, get_zodiac_sign
-from app.utils.astro_calculations import parse_tz_offset
+from app.utils.astro_calculations import (
+    SIGNS,
+    datetime_from_julian_day,
+    julian_day,
+    julian_days,
+    parse_tz_offset,
+    to_utc,
+)
+from app.utils.cache import SingleFlight
+from app.utils.executor import compute_executor
+from app.utils.formats import (
+    BINARY_RESPONSES,
+    binary_response,
+    negotiate,
+    position_columns,
+)
+from app.utils.grid import SIGN_PALETTE, ascendant_grid, encode_npy, encode_png
+from app.utils.http_cache import conditional
+from app.utils.metrics import TimedRoute, register_counter
+from app.utils.responses import dumps, fast_response
+from app.utils.search import sign_crossings
 
-router = APIRouter()
+########################################################
+#           Settings
+########################################################
+MAX_SCHEDULE_DAYS = int(os.getenv("MAX_SCHEDULE_DAYS", "366"))
+# /ascendant/batch lines are computed on the compute executor and sent in
+# chunks of this many records
+BATCH_CHUNK_ROWS = 256
+# Sampling step of the rising-sign search. Below the polar circles the
+# ascendant always moves forward, by less than 180 degrees per step up to
+# MAX_SCHEDULE_LATITUDE; beyond it the ascendant jumps and has no schedule
+SCHEDULE_STEP_DAYS = 10 / 1440
+MAX_SCHEDULE_LATITUDE = 66.0
+# A 0.25 degree world grid
+MAX_GRID_POINTS = int(os.getenv("MAX_GRID_POINTS", "1036800"))
 
+GRID_MEDIA_TYPES = {"npy": "application/octet-stream", "png": "image/png"}
 
-@router.post("/ascendant", response_model=Any)
-async def get_ascendant(request: LocationRequest) -> dict[str, Any]:
-    dt = request.date_time
-    if request.tz_offset:
-        tz = parse_tz_offset(request.tz_offset)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=tz)
-        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+ascendant_flights = SingleFlight()
+register_counter(
+    "computations_total",
+    "Computations started by requests.",
+    'route="/ascendant"',
+    lambda: ascendant_flights.calls,
+)
+register_counter(
+    "coalesced_requests_total",
+    "Requests that awaited an identical computation already in flight.",
+    'route="/ascendant"',
+    lambda: ascendant_flights.coalesced,
+)
 
-    jd_ut = swe.julday(
-        dt.year, dt.month, dt.day, dt.hour + dt.minute / 60 + dt.second / 3600
-    )
-    _, ascmc = swe.houses(jd_ut, request.latitude, request.longitude, b"A")
-    ascendant = ascmc[0]
+router = APIRouter(route_class=TimedRoute)
+
+
+def compute_ascendant(
+    jd_ut: float, latitude: float, longitude: float
+) -> float:
+    _, ascmc = swe.houses(jd_ut, latitude, longitude, b"A")
+    return ascmc[0]
+
+
+def ascendant_result(
+    request: LocationRequest, dt: datetime, ascendant: float
+) -> dict[str, Any]:
     sign, degrees = get_zodiac_sign(ascendant)
 
     return {
@@ -38,3 +88,259 @@ async def get_ascendant(request: LocationRequest) -> dict[str, Any]:
             "ascendant": ascendant,
         },
     }
+
+
+def compute_ascendants(
+    request: BatchLocationRequest, jds: list[float]
+) -> list[float]:
+    return [
+        compute_ascendant(jd_ut, record.latitude, record.longitude)
+        for record, jd_ut in zip(request.records, jds)
+    ]
+
+
+def compute_ascendant_lines(
+    records: list[LocationRequest], jds: list[float], debug: bool
+) -> bytes:
+    """One chunk of /ascendant/batch as newline-delimited JSON."""
+    lines = []
+    for record, jd_ut in zip(records, jds):
+        _, ascmc = swe.houses(jd_ut, record.latitude, record.longitude, b"A")
+        ascendant = ascmc[0]
+        sign, degrees = get_zodiac_sign(ascendant)
+        result = {"sign": sign, "degrees": round(degrees, ROUND_DECIMALS)}
+        if debug:
+            result["debug"] = {
+                "input_datetime": str(record.date_time),
+                "datetime_utc": str(
+                    to_utc(record.date_time, record.tz_offset)
+                ),
+                "longitude": record.longitude,
+                "latitude": record.latitude,
+                "ascendant": ascendant,
+            }
+        lines.append(dumps(result) + b"\n")
+    return b"".join(lines)
+
+
+def batch_chunks(
+    request: BatchLocationRequest, jds: list[float]
+) -> Iterator[tuple[list[LocationRequest], list[float], bool]]:
+    """Arguments of ``compute_ascendant_lines`` per BATCH_CHUNK_ROWS."""
+    for first in range(0, len(jds), BATCH_CHUNK_ROWS):
+        last = first + BATCH_CHUNK_ROWS
+        yield request.records[first:last], jds[first:last], request.debug
+
+
+def rising_signs(
+    latitude: float, longitude: float, start_jd: float, end_jd: float
+) -> Iterator[tuple[float, int]]:
+    """Times the ascendant enters a new sign, with the sign's index."""
+
+    def ascendant(jd: float) -> float:
+        _, ascmc = swe.houses(jd, latitude, longitude, b"A")
+        return ascmc[0]
+
+    crossings = sign_crossings(ascendant, start_jd, end_jd, SCHEDULE_STEP_DAYS)
+    for jd, sign, _ in crossings:
+        yield jd, sign
+
+
+def schedule_day(
+    start: datetime,
+    day: int,
+    latitude: float,
+    longitude: float,
+    tz_offset: str | None,
+) -> bytes:
+    """NDJSON rising-sign changes of one day."""
+    tz = parse_tz_offset(tz_offset) if tz_offset else None
+    start_jd = julian_day(start + timedelta(days=day))
+    lines = []
+    for jd, sign in rising_signs(latitude, longitude, start_jd, start_jd + 1):
+        date_time = datetime_from_julian_day(jd)
+        if tz is not None:
+            date_time = date_time.replace(tzinfo=timezone.utc)
+            date_time = date_time.astimezone(tz)
+        event = {
+            "date_time": date_time.isoformat(),
+            "sign": SIGNS[sign],
+            "previous_sign": SIGNS[(sign - 1) % 12],
+        }
+        lines.append(dumps(event) + b"\n")
+    return b"".join(lines)
+
+
+def render_ascendant_grid(
+    jd_ut: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    values: str,
+    output: str,
+) -> bytes:
+    ascendant = ascendant_grid(
+        jd_ut, latitudes[:, np.newaxis], longitudes[np.newaxis, :]
+    )
+    if values == "longitude":
+        return encode_npy(ascendant.astype(np.float32))
+    signs = (ascendant // 30).astype(np.uint8)
+    if output == "png":
+        return encode_png(signs, SIGN_PALETTE)
+    return encode_npy(signs)
+
+
+async def ascendant(
+    location: LocationRequest, request: Request, response: Response
+):
+    output = negotiate(request)
+    # The debug output echoes the request, so all of it goes in the ETag.
+    # Houses come from Swiss Ephemeris whatever the planet engine is.
+    not_modified = conditional(
+        request,
+        response,
+        "ascendant",
+        str(location.date_time),
+        location.tz_offset,
+        location.latitude,
+        location.longitude,
+        output,
+        version=f"swisseph-{swe.version}",
+    )
+    if not_modified is not None:
+        return not_modified
+    dt = to_utc(location.date_time, location.tz_offset)
+    # The same conversion as /ascendant/batch, to the microsecond
+    (jd_ut,) = julian_days([location.date_time], [location.tz_offset])
+    jd_ut = float(jd_ut)
+    # Requests for the same instant and place share one computation
+    args = (jd_ut, location.latitude, location.longitude)
+    ascendant = await ascendant_flights.run(
+        args, lambda: compute_executor.run(compute_ascendant, *args)
+    )
+    if output:
+        columns = position_columns([jd_ut], [ascendant], ["ascendant"])
+        return binary_response(columns, output, response)
+    return fast_response(ascendant_result(location, dt, ascendant), response)
+
+
+@router.post("/ascendant", response_model=Any, responses=BINARY_RESPONSES)
+async def get_ascendant(
+    request: LocationRequest, http_request: Request, response: Response
+):
+    return await ascendant(request, http_request, response)
+
+
+@router.get("/ascendant", response_model=Any, responses=BINARY_RESPONSES)
+async def get_ascendant_query(
+    request: Request,
+    response: Response,
+    date_time: datetime,
+    latitude: float = Query(
+        ge=-90, le=90, description="Latitude in degrees (-90 to 90)"
+    ),
+    longitude: float = Query(
+        ge=-180, le=180, description="Longitude in degrees (-180 to 180)"
+    ),
+    tz_offset: str | None = None,
+):
+    location = LocationRequest(
+        date_time=date_time,
+        latitude=latitude,
+        longitude=longitude,
+        tz_offset=tz_offset,
+    )
+    return await ascendant(location, request, response)
+
+
+@router.post("/ascendant/batch", responses=BINARY_RESPONSES)
+async def get_ascendant_batch(
+    request: BatchLocationRequest, http_request: Request
+):
+    output = negotiate(http_request)
+    records = request.records
+    try:
+        jds = julian_days(
+            [record.date_time for record in records],
+            [record.tz_offset for record in records],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if output:
+        ascendants = await compute_executor.run(
+            compute_ascendants, request, jds.tolist(), batch_size=len(jds)
+        )
+        columns = position_columns(jds, ascendants, ["ascendant"])
+        columns["latitude"] = np.array([record.latitude for record in records])
+        columns["longitude"] = np.array(
+            [record.longitude for record in records]
+        )
+        return binary_response(columns, output)
+    chunks = await compute_executor.stream(
+        compute_ascendant_lines, batch_chunks(request, jds.tolist())
+    )
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+@router.get("/ascendant/schedule")
+async def get_ascendant_schedule(
+    date: date,
+    latitude: float = Query(
+        ge=-MAX_SCHEDULE_LATITUDE,
+        le=MAX_SCHEDULE_LATITUDE,
+        description="Latitude in degrees (outside the polar circles)",
+    ),
+    longitude: float = Query(
+        ge=-180, le=180, description="Longitude in degrees (-180 to 180)"
+    ),
+    tz_offset: str | None = None,
+    days: int = Query(1, ge=1, le=MAX_SCHEDULE_DAYS),
+):
+    try:
+        start = to_utc(datetime.combine(date, datetime.min.time()), tz_offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    chunks = await compute_executor.stream(
+        schedule_day,
+        ((start, day, latitude, longitude, tz_offset) for day in range(days)),
+    )
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
+
+@router.get("/ascendant/grid")
+async def get_ascendant_grid(
+    date_time: datetime,
+    tz_offset: str | None = None,
+    resolution: float = Query(1.0, gt=0, le=90, description="Degrees"),
+    north: float = Query(90, ge=-90, le=90),
+    south: float = Query(-90, ge=-90, le=90),
+    west: float = Query(-180, ge=-180, le=180),
+    east: float = Query(180, ge=-180, le=180),
+    values: Literal["sign", "longitude"] = "sign",
+    output: Literal["npy", "png"] = Query("npy", alias="format"),
+):
+    if values == "longitude" and output == "png":
+        raise HTTPException(
+            status_code=422, detail="PNG output only supports sign values."
+        )
+    rows = round((north - south) / resolution)
+    columns = round((east - west) / resolution)
+    if rows < 1 or columns < 1:
+        raise HTTPException(status_code=422, detail="Empty grid bounds.")
+    if rows * columns > MAX_GRID_POINTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Grid has {rows * columns} points "
+            f"(at most {MAX_GRID_POINTS}).",
+        )
+    try:
+        (jd_ut,) = julian_days([date_time], [tz_offset])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Cell centres, rows from north to south as in an image
+    latitudes = north - (np.arange(rows) + 0.5) * resolution
+    longitudes = west + (np.arange(columns) + 0.5) * resolution
+    content = await compute_executor.run(
+        render_ascendant_grid, jd_ut, latitudes, longitudes, values, output
+    )
+    return Response(content, media_type=GRID_MEDIA_TYPES[output])
@@ -0,0 +1,108 @@
+from typing import Any
+
+import swisseph as swe
+from fastapi import APIRouter, HTTPException
+
+from app.models import ChartRequest, ChartResponse, PlanetPosition
+from app.utils.astro_calculations import (
+    PLANETS,
+    ROUND_DECIMALS,
+    datetime_from_julian_day,
+    get_engine,
+    get_zodiac_sign,
+    julian_day,
+    julian_days,
+    parse_bodies,
+)
+from app.utils.executor import compute_executor
+from app.utils.metrics import TimedRoute
+
+########################################################
+#           Constants
+########################################################
+HOUSE_SYSTEMS = {
+    "placidus": b"P",
+    "koch": b"K",
+    "porphyry": b"O",
+    "regiomontanus": b"R",
+    "campanus": b"C",
+    "alcabitius": b"B",
+    "topocentric": b"T",
+    "morinus": b"M",
+    "equal": b"E",
+    "whole_sign": b"W",
+}
+
+# Ecliptic points of the ``ascmc`` array returned by ``swe.houses``, by
+# index (2 is the ARMC, a right ascension rather than a longitude)
+ANGLES = {
+    "ascendant": 0,
+    "mc": 1,
+    "vertex": 3,
+    "equatorial_ascendant": 4,
+    "co_ascendant_koch": 5,
+    "co_ascendant_munkasey": 6,
+    "polar_ascendant": 7,
+}
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def position(longitude: float) -> PlanetPosition:
+    sign, degrees = get_zodiac_sign(longitude)
+    return PlanetPosition(sign=sign, degrees=round(degrees, ROUND_DECIMALS))
+
+
+def compute_chart(
+    request: ChartRequest, jd_ut: float, bodies: list[str]
+) -> dict[str, Any]:
+    chart = {
+        "date_time_utc": datetime_from_julian_day(jd_ut),
+        "julian_day": jd_ut,
+        "house_system": request.house_system,
+    }
+    if "planets" in request.fields:
+        engine = get_engine()
+        chart["planets"] = {
+            name: position(engine.longitude(name, jd_ut)) for name in bodies
+        }
+    if "houses" in request.fields or "angles" in request.fields:
+        try:
+            cusps, ascmc = swe.houses(
+                jd_ut,
+                request.latitude,
+                request.longitude,
+                HOUSE_SYSTEMS[request.house_system],
+            )
+        except swe.Error:
+            raise HTTPException(
+                status_code=422,
+                detail=f"The {request.house_system} house system is not "
+                f"defined at latitude {request.latitude}.",
+            )
+        if "houses" in request.fields:
+            chart["houses"] = [position(cusp) for cusp in cusps]
+        if "angles" in request.fields:
+            chart["angles"] = {
+                name: position(ascmc[index]) for name, index in ANGLES.items()
+            }
+    return chart
+
+
+@router.post(
+    "/chart", response_model=ChartResponse, response_model_exclude_none=True
+)
+async def get_chart(request: ChartRequest):
+    try:
+        bodies = (
+            parse_bodies(",".join(request.bodies))
+            if request.bodies
+            else list(PLANETS)
+        )
+        if request.tz_offset:
+            (jd_ut,) = julian_days([request.date_time], [request.tz_offset])
+        else:
+            jd_ut = julian_day(request.date_time)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await compute_executor.run(compute_chart, request, jd_ut, bodies)
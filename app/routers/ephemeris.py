@@ -0,0 +1,181 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.utils.astro_calculations import (
+    PLANETS,
+    ROUND_DECIMALS,
+    get_engine,
+    get_zodiac_sign,
+    julian_day,
+    parse_bodies,
+    parse_step,
+    utc_naive,
+)
+from app.utils.executor import compute_executor
+from app.utils.formats import (
+    BINARY_RESPONSES,
+    MEDIA_TYPES,
+    Columns,
+    available,
+    encode_chunk,
+    negotiate,
+    position_columns,
+)
+from app.utils.metrics import TimedRoute
+from app.utils.responses import dumps
+
+########################################################
+#           Settings
+########################################################
+MAX_EPHEMERIS_ROWS = int(os.getenv("MAX_EPHEMERIS_ROWS", "1000000"))
+# Rows are computed on the compute executor and sent in chunks, to
+# amortize the overhead of each executor job
+CHUNK_ROWS = 256
+# Binary formats have less overhead per row and more per chunk (an Arrow
+# record batch, a MessagePack map)
+BINARY_CHUNK_ROWS = 4096
+
+TEXT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def ephemeris_rows(
+    start: datetime,
+    step: timedelta,
+    first: int,
+    rows: int,
+    bodies: list[str],
+) -> Iterator[tuple[datetime, list[tuple[str, float]]]]:
+    engine = get_engine()
+    for i in range(first, first + rows):
+        date_time = start + i * step
+        jd = julian_day(date_time)
+        positions = []
+        for name in bodies:
+            sign, degrees = get_zodiac_sign(engine.longitude(name, jd))
+            positions.append((sign, round(degrees, ROUND_DECIMALS)))
+        yield date_time, positions
+
+
+def ephemeris_columns(
+    start: datetime,
+    step: timedelta,
+    first: int,
+    rows: int,
+    bodies: list[str],
+) -> Columns:
+    jds, longitudes = [], []
+    engine = get_engine()
+    for i in range(first, first + rows):
+        jd = julian_day(start + i * step)
+        jds.append(jd)
+        longitudes.append([engine.longitude(name, jd) for name in bodies])
+    return position_columns(jds, longitudes, bodies)
+
+
+def format_ndjson(
+    rows: Iterator[tuple[datetime, list[tuple[str, float]]]],
+    bodies: list[str],
+    header: bool,
+) -> Iterator[bytes]:
+    for date_time, positions in rows:
+        row = {"date_time": date_time.isoformat()}
+        for name, (sign, degrees) in zip(bodies, positions):
+            row[name] = {"sign": sign, "degrees": degrees}
+        yield dumps(row) + b"\n"
+
+
+def format_csv(
+    rows: Iterator[tuple[datetime, list[tuple[str, float]]]],
+    bodies: list[str],
+    header: bool,
+) -> Iterator[bytes]:
+    if header:
+        columns = ["date_time"]
+        for name in bodies:
+            columns += [f"{name}_sign", f"{name}_degrees"]
+        yield (",".join(columns) + "\n").encode()
+    for date_time, positions in rows:
+        values = [date_time.isoformat()]
+        for sign, degrees in positions:
+            values += [sign, repr(degrees)]
+        yield (",".join(values) + "\n").encode()
+
+
+FORMATTERS = {"ndjson": format_ndjson, "csv": format_csv}
+
+
+def ephemeris_chunk(
+    start: datetime,
+    step: timedelta,
+    first: int,
+    rows: int,
+    total: int,
+    bodies: list[str],
+    output: str,
+) -> bytes:
+    """Rows ``first`` to ``first + rows`` of ``total``, encoded as
+    ``output``."""
+    if output in FORMATTERS:
+        lines = FORMATTERS[output](
+            ephemeris_rows(start, step, first, rows, bodies),
+            bodies,
+            first == 0,
+        )
+        return b"".join(lines)
+    columns = ephemeris_columns(start, step, first, rows, bodies)
+    return encode_chunk(
+        columns, output, total, first == 0, first + rows == total
+    )
+
+
+@router.get("/ephemeris", responses=BINARY_RESPONSES)
+async def get_ephemeris(
+    request: Request,
+    start: datetime,
+    end: datetime,
+    step: str = "1d",
+    bodies: str = Query(",".join(PLANETS), description="Comma-separated"),
+    output: Literal["ndjson", "csv", "npy", "arrow", "msgpack"]
+    | None = Query(
+        None,
+        alias="format",
+        description="ndjson by default, or as negotiated with Accept",
+    ),
+):
+    if output is None:
+        output = negotiate(request) or "ndjson"
+    elif not available(output):
+        raise HTTPException(
+            status_code=406, detail=f"{output} is not available"
+        )
+    try:
+        delta = parse_step(step)
+        names = parse_bodies(bodies)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    start, end = utc_naive(start), utc_naive(end)
+    if end < start:
+        raise HTTPException(status_code=422, detail="end is before start")
+    rows = (end - start) // delta + 1
+    if rows > MAX_EPHEMERIS_ROWS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range has {rows} rows (at most {MAX_EPHEMERIS_ROWS}).",
+        )
+
+    size = CHUNK_ROWS if output in FORMATTERS else BINARY_CHUNK_ROWS
+    chunks = await compute_executor.stream(
+        ephemeris_chunk,
+        (
+            (start, delta, first, min(size, rows - first), rows, names, output)
+            for first in range(0, rows, size)
+        ),
+    )
+    media_type = TEXT_MEDIA_TYPES.get(output) or MEDIA_TYPES[output]
+    return StreamingResponse(chunks, media_type=media_type)
@@ -0,0 +1,134 @@
+import os
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models import IngressEvent, StationEvent
+from app.utils.astro_calculations import (
+    PLANETS,
+    ROUND_DECIMALS,
+    SIGNS,
+    datetime_from_julian_day,
+    get_engine,
+    get_zodiac_sign,
+    julian_day,
+    parse_bodies,
+)
+from app.utils.executor import compute_executor
+from app.utils.metrics import TimedRoute
+from app.utils.search import SAMPLING_DAYS, sign_crossings
+from app.utils.stations import STATION_BODIES, STATIONS_DIR, station_table
+
+########################################################
+#           Settings
+########################################################
+MAX_SEARCH_DAYS = float(os.getenv("MAX_SEARCH_DAYS", "36525"))
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def search_range(start: datetime, end: datetime) -> tuple[float, float]:
+    start_jd, end_jd = julian_day(start), julian_day(end)
+    if end_jd <= start_jd:
+        raise HTTPException(status_code=422, detail="end must be after start")
+    if end_jd - start_jd > MAX_SEARCH_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range is longer than {MAX_SEARCH_DAYS:g} days.",
+        )
+    return start_jd, end_jd
+
+
+def find_ingresses(
+    bodies: list[str], start_jd: float, end_jd: float
+) -> list[dict[str, Any]]:
+    engine = get_engine()
+    events = []
+    for name in bodies:
+        crossings = sign_crossings(
+            lambda jd: engine.longitude(name, jd),
+            start_jd,
+            end_jd,
+            SAMPLING_DAYS[name],
+        )
+        for jd, sign, retrograde in crossings:
+            events.append(
+                {
+                    "body": name,
+                    "date_time": datetime_from_julian_day(jd),
+                    "sign": SIGNS[sign],
+                    "previous_sign": SIGNS[
+                        (sign + (1 if retrograde else -1)) % 12
+                    ],
+                    "retrograde": retrograde,
+                }
+            )
+    events.sort(key=lambda event: event["date_time"])
+    return events
+
+
+def find_stations(
+    directory: str, bodies: list[str], start_jd: float, end_jd: float
+) -> list[dict[str, Any]]:
+    engine = get_engine()
+    table = station_table(directory)
+    events = []
+    for name in bodies:
+        rows = table.stations(engine, name, start_jd, end_jd)
+        for jd, retrograde, longitude in rows.tolist():
+            sign, degrees = get_zodiac_sign(longitude)
+            events.append(
+                {
+                    "body": name,
+                    "date_time": datetime_from_julian_day(jd),
+                    "sign": sign,
+                    "degrees": round(degrees, ROUND_DECIMALS),
+                    "direction": "retrograde" if retrograde else "direct",
+                }
+            )
+    events.sort(key=lambda event: event["date_time"])
+    return events
+
+
+@router.get("/events/ingresses", response_model=List[IngressEvent])
+async def get_ingresses(
+    start: datetime,
+    end: datetime,
+    bodies: str = Query(",".join(PLANETS), description="Comma-separated"),
+):
+    try:
+        names = parse_bodies(bodies)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    start_jd, end_jd = search_range(start, end)
+    return await compute_executor.run(
+        find_ingresses,
+        names,
+        start_jd,
+        end_jd,
+        batch_size=int(end_jd - start_jd),
+    )
+
+
+@router.get("/events/stations", response_model=List[StationEvent])
+async def get_stations(
+    start: datetime,
+    end: datetime,
+    bodies: str = Query(
+        ",".join(STATION_BODIES), description="Comma-separated"
+    ),
+):
+    try:
+        names = parse_bodies(bodies)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    start_jd, end_jd = search_range(start, end)
+    return await compute_executor.run(
+        find_stations,
+        STATIONS_DIR,
+        names,
+        start_jd,
+        end_jd,
+        batch_size=int(end_jd - start_jd),
+    )
@@ -0,0 +1,283 @@
+import os
+from typing import Any, Iterator, Literal
+
+import numpy as np
+import swisseph as swe
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+from app.models import JobRequest, JobStatus
+from app.routers.ascendant import compute_ascendant
+from app.routers.chart import ANGLES, HOUSE_SYSTEMS
+from app.routers.planets import planet_positions
+from app.utils.astro_calculations import (
+    PLANETS,
+    ROUND_DECIMALS,
+    datetime_from_julian_day,
+    get_engine,
+    get_zodiac_sign,
+    julian_day,
+    julian_days,
+    parse_step,
+    utc_naive,
+)
+from app.utils.jobs import JobRunner, JobStore, open_column, stream_npz
+from app.utils.metrics import TimedRoute
+from app.utils.responses import dumps
+
+########################################################
+#           Settings
+########################################################
+MAX_JOB_ROWS = int(os.getenv("MAX_JOB_ROWS", "10000000"))
+# Rows read from disk and encoded at a time when streaming NDJSON output
+OUTPUT_CHUNK_ROWS = 1024
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "npz": "application/zip"}
+
+router = APIRouter(route_class=TimedRoute)
+
+
+########################################################
+#           Chunk computations (run in worker processes)
+########################################################
+def planets_chunk(
+    directory: str, options: dict[str, Any], start: int, stop: int
+) -> None:
+    jds = open_column(directory, "julian_day")[start:stop]
+    longitudes = open_column(directory, "longitudes", "r+")
+    engine = get_engine()
+    for row, jd in enumerate(jds.tolist(), start):
+        longitudes[row] = engine.longitudes(jd)
+    longitudes.flush()
+
+
+def ascendant_chunk(
+    directory: str, options: dict[str, Any], start: int, stop: int
+) -> None:
+    jds = open_column(directory, "julian_day")[start:stop].tolist()
+    latitudes = open_column(directory, "latitude")[start:stop].tolist()
+    longitudes = open_column(directory, "longitude")[start:stop].tolist()
+    ascendants = open_column(directory, "ascendant", "r+")
+    for row, args in enumerate(zip(jds, latitudes, longitudes), start):
+        ascendants[row] = compute_ascendant(*args)
+    ascendants.flush()
+
+
+def chart_chunk(
+    directory: str, options: dict[str, Any], start: int, stop: int
+) -> None:
+    jds = open_column(directory, "julian_day")[start:stop].tolist()
+    latitudes = open_column(directory, "latitude")[start:stop].tolist()
+    longitudes = open_column(directory, "longitude")[start:stop].tolist()
+    planets = open_column(directory, "longitudes", "r+")
+    houses = open_column(directory, "houses", "r+")
+    angles = open_column(directory, "angles", "r+")
+    house_system = HOUSE_SYSTEMS[options["house_system"]]
+    indices = list(ANGLES.values())
+    engine = get_engine()
+    for row, (jd, lat, lon) in enumerate(
+        zip(jds, latitudes, longitudes), start
+    ):
+        planets[row] = engine.longitudes(jd)
+        try:
+            cusps, ascmc = swe.houses(jd, lat, lon, house_system)
+        except swe.Error:
+            # Not defined at this latitude: left as NaN
+            continue
+        houses[row] = cusps
+        angles[row] = [ascmc[index] for index in indices]
+    for column in (planets, houses, angles):
+        column.flush()
+
+
+CHUNK_FUNCTIONS = {
+    "planets": planets_chunk,
+    "ascendant": ascendant_chunk,
+    "chart": chart_chunk,
+}
+
+job_runner = JobRunner(JobStore(), CHUNK_FUNCTIONS)
+
+
+########################################################
+#           Helper Functions
+########################################################
+def position(longitude: float) -> dict[str, Any]:
+    sign, degrees = get_zodiac_sign(longitude)
+    return {"sign": sign, "degrees": round(degrees, ROUND_DECIMALS)}
+
+
+def job_inputs(request: JobRequest) -> dict[str, np.ndarray]:
+    """Input columns of a job, checked against ``MAX_JOB_ROWS``."""
+    if request.kind == "planets":
+        if request.date_times:
+            rows = len(request.date_times)
+        elif request.start and request.end:
+            start, end = utc_naive(request.start), utc_naive(request.end)
+            delta = parse_step(request.step)
+            if end < start:
+                raise ValueError("end is before start")
+            rows = (end - start) // delta + 1
+        else:
+            raise ValueError("planets jobs need date_times or start and end")
+    elif request.records:
+        rows = len(request.records)
+    else:
+        raise ValueError(f"{request.kind} jobs need records")
+    if rows > MAX_JOB_ROWS:
+        raise ValueError(f"Job has {rows} rows (at most {MAX_JOB_ROWS}).")
+
+    if request.kind == "planets":
+        if request.date_times:
+            jds = julian_days([utc_naive(dt) for dt in request.date_times])
+        else:
+            jds = julian_day(start) + np.arange(rows) * (
+                delta.total_seconds() / 86400
+            )
+        return {"julian_day": jds}
+    # As in /chart, naive datetimes are local to tz_offset or else UTC
+    jds = julian_days(
+        [
+            record.date_time
+            if record.tz_offset
+            else utc_naive(record.date_time)
+            for record in request.records
+        ],
+        [record.tz_offset for record in request.records],
+    )
+    return {
+        "julian_day": jds,
+        "latitude": np.array([r.latitude for r in request.records]),
+        "longitude": np.array([r.longitude for r in request.records]),
+    }
+
+
+def job_outputs(kind: str) -> dict[str, tuple[tuple[int, ...], str]]:
+    if kind == "planets":
+        return {"longitudes": ((len(PLANETS),), "float64")}
+    if kind == "ascendant":
+        return {"ascendant": ((), "float64")}
+    return {
+        "longitudes": ((len(PLANETS),), "float64"),
+        "houses": ((12,), "float64"),
+        "angles": ((len(ANGLES),), "float64"),
+    }
+
+
+def job_status(manifest: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": manifest["id"],
+        "kind": manifest["kind"],
+        "status": manifest["status"],
+        "rows": manifest["rows"],
+        "rows_done": manifest["rows_done"],
+        "progress": manifest["rows_done"] / manifest["rows"],
+        "error": manifest["error"],
+        "created_at": manifest["created_at"],
+        "finished_at": manifest["finished_at"],
+    }
+
+
+def load_job(job_id: str) -> dict[str, Any]:
+    try:
+        return job_runner.store.load(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+def output_rows(
+    manifest: dict[str, Any], start: int, stop: int
+) -> Iterator[dict[str, Any]]:
+    kind = manifest["kind"]
+    directory = job_runner.store.path(manifest["id"])
+    columns = {
+        name: open_column(directory, name)[start:stop].tolist()
+        for name in manifest["inputs"] + manifest["outputs"]
+    }
+    for i in range(stop - start):
+        row = {"date_time": datetime_from_julian_day(columns["julian_day"][i])}
+        if kind == "planets":
+            row.update(planet_positions(columns["longitudes"][i]))
+            yield row
+            continue
+        row["latitude"] = columns["latitude"][i]
+        row["longitude"] = columns["longitude"][i]
+        if kind == "ascendant":
+            row.update(position(columns["ascendant"][i]))
+            yield row
+            continue
+        row["planets"] = planet_positions(columns["longitudes"][i])
+        row["houses"] = row["angles"] = None
+        if not np.isnan(columns["houses"][i][0]):
+            row["houses"] = [position(cusp) for cusp in columns["houses"][i]]
+            row["angles"] = dict(
+                zip(ANGLES, map(position, columns["angles"][i]))
+            )
+        yield row
+
+
+def output_ndjson(manifest: dict[str, Any]) -> Iterator[bytes]:
+    for start in range(0, manifest["rows"], OUTPUT_CHUNK_ROWS):
+        stop = min(start + OUTPUT_CHUNK_ROWS, manifest["rows"])
+        yield b"".join(
+            dumps(row) + b"\n" for row in output_rows(manifest, start, stop)
+        )
+
+
+########################################################
+#           Endpoints
+########################################################
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(request: JobRequest):
+    try:
+        # Parses up to MAX_JOB_ROWS records
+        inputs = await run_in_threadpool(job_inputs, request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    options = {"house_system": request.house_system}
+    manifest = await run_in_threadpool(
+        job_runner.store.create,
+        request.kind,
+        inputs,
+        job_outputs(request.kind),
+        options,
+    )
+    job_runner.start(manifest["id"])
+    return job_status(manifest)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    return job_status(load_job(job_id))
+
+
+@router.get("/jobs/{job_id}/output")
+async def get_job_output(
+    job_id: str,
+    output: Literal["ndjson", "npz"] = Query("ndjson", alias="format"),
+):
+    manifest = load_job(job_id)
+    if manifest["status"] != "done":
+        raise HTTPException(
+            status_code=409, detail=f"Job is {manifest['status']}"
+        )
+    if output == "npz":
+        content = stream_npz(
+            job_runner.store.path(job_id),
+            manifest["inputs"] + manifest["outputs"],
+        )
+    else:
+        content = output_ndjson(manifest)
+    return StreamingResponse(content, media_type=MEDIA_TYPES[output])
+
+
+@router.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str):
+    manifest = load_job(job_id)
+    if manifest["status"] in ("queued", "running"):
+        raise HTTPException(
+            status_code=409, detail=f"Job is {manifest['status']}"
+        )
+    await run_in_threadpool(job_runner.store.delete, job_id)
+    return Response(status_code=204)
@@ -0,0 +1,71 @@
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.routers.planets import compute_motion, planet_positions
+from app.utils.astro_calculations import PLANETS, julian_day
+from app.utils.broadcast import Broadcaster
+from app.utils.executor import compute_executor
+from app.utils.metrics import register_counter
+from app.utils.responses import dumps
+
+########################################################
+#           Settings
+########################################################
+# Seconds between two computations of the live positions
+LIVE_INTERVAL = float(os.getenv("LIVE_INTERVAL", "5"))
+# Payloads a subscriber may fall behind by before it is dropped
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "4"))
+
+router = APIRouter()
+
+
+async def live_positions() -> bytes:
+    """Current positions and speeds as one server-sent event, encoded
+    once for every subscriber."""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    values = await compute_executor.run(compute_motion, julian_day(now))
+    n = len(PLANETS)
+    content = {
+        "date_time": now,
+        "planets": planet_positions(values[:n], values[n:]),
+    }
+    return b"data: " + dumps(content) + b"\n\n"
+
+
+live_feed = Broadcaster(live_positions, LIVE_INTERVAL, LIVE_QUEUE_SIZE)
+register_counter(
+    "live_ticks_total",
+    "Live positions computed and broadcast.",
+    'route="/planets/live"',
+    lambda: live_feed.ticks,
+)
+register_counter(
+    "live_dropped_subscribers_total",
+    "Live subscribers dropped for falling behind.",
+    'route="/planets/live"',
+    lambda: live_feed.dropped,
+)
+
+
+async def live_events() -> AsyncIterator[bytes]:
+    async with live_feed.subscribe() as queue:
+        # Clients reconnect after being dropped, one interval later
+        yield f"retry: {int(live_feed.interval * 1000)}\n\n".encode()
+        while (payload := await queue.get()) is not None:
+            yield payload
+
+
+@router.get(
+    "/planets/live", responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def live_planetary_positions():
+    return StreamingResponse(
+        live_events(),
+        media_type="text/event-stream",
+        # Keeps proxies such as nginx from buffering the events
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
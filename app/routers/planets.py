@@ -1,46 +1,265 @@
+import os
+import sys
 from datetime import datetime
+from typing import Any
 
-import ephem
-from fastapi import APIRouter
+import numpy as np
+from fastapi import APIRouter, Query, Request, Response
 
 from app.models import (
+    BatchDateTimeRequest,
+    BatchPlanetaryPositionsResponse,
     DateTimeRequest,
     PlanetaryPositionsResponse,
-    PlanetPosition,
 )
-from app.utils.astro_calculations import ROUND_DECIMALS, get_zodiac_sign
+from app.utils.astro_calculations import (
+    JD_UNIX_EPOCH,
+    PLANETS,
+    ROUND_DECIMALS,
+    get_engine,
+    get_zodiac_sign,
+    julian_day,
+    julian_days,
+    utc_naive,
+)
+from app.utils.cache import SingleFlight, TTLCache
+from app.utils.executor import compute_executor
+from app.utils.formats import (
+    BINARY_RESPONSES,
+    binary_response,
+    negotiate,
+    position_columns,
+)
+from app.utils.http_cache import conditional
+from app.utils.metrics import TimedRoute, register_counter
+from app.utils.responses import fast_response
 
-router = APIRouter()
+########################################################
+#           Settings
+########################################################
+# Requests for the current time are computed at the nearest multiple of
+# this many seconds, so that those within the same step share one entry.
+# Explicit times are computed, and cached, exactly.
+POSITIONS_CACHE_RESOLUTION = float(
+    os.getenv("POSITIONS_CACHE_RESOLUTION", "0.5")
+)
+POSITIONS_CACHE_TTL = float(os.getenv("POSITIONS_CACHE_TTL", "60"))
+POSITIONS_CACHE_MAX_BYTES = int(
+    os.getenv("POSITIONS_CACHE_MAX_BYTES", str(16 * 1024 * 1024))
+)
 
 
-@router.post("/planets", response_model=PlanetaryPositionsResponse)
-async def get_planetary_positions(request: DateTimeRequest = None):
-    date_time = (
-        request.date_time if request and request.date_time else datetime.now()
-    )
-    observer = ephem.Observer()
-    observer.date = date_time
-
-    planets = {
-        "Sun": ephem.Sun(),
-        "Moon": ephem.Moon(),
-        "Mercury": ephem.Mercury(),
-        "Venus": ephem.Venus(),
-        "Mars": ephem.Mars(),
-        "Jupiter": ephem.Jupiter(),
-        "Saturn": ephem.Saturn(),
-        "Uranus": ephem.Uranus(),
-        "Neptune": ephem.Neptune(),
-        "Pluto": ephem.Pluto(),
-    }
+def _sizeof_longitudes(longitudes: tuple[float, ...]) -> int:
+    return sys.getsizeof(longitudes) + len(longitudes) * sys.getsizeof(0.0)
+
+
+positions_cache = TTLCache(
+    max_bytes=POSITIONS_CACHE_MAX_BYTES,
+    ttl=POSITIONS_CACHE_TTL,
+    sizeof=_sizeof_longitudes,
+)
+register_counter(
+    "cache_hits_total",
+    "Lookups answered by the cache.",
+    'cache="positions"',
+    lambda: positions_cache.hits,
+)
+register_counter(
+    "cache_misses_total",
+    "Lookups not found in the cache.",
+    'cache="positions"',
+    lambda: positions_cache.misses,
+)
+register_counter(
+    "cache_evictions_total",
+    "Entries evicted to stay within the cache size limit.",
+    'cache="positions"',
+    lambda: positions_cache.evictions,
+)
+
+# Concurrent misses for the same time share one computation
+positions_flights = SingleFlight()
+register_counter(
+    "computations_total",
+    "Computations started by requests.",
+    'route="/planets"',
+    lambda: positions_flights.calls,
+)
+register_counter(
+    "coalesced_requests_total",
+    "Requests that awaited an identical computation already in flight.",
+    'route="/planets"',
+    lambda: positions_flights.coalesced,
+)
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def quantize(jd: float) -> float:
+    """Julian day of the nearest cache resolution step."""
+    step = round((jd - JD_UNIX_EPOCH) * 86400 / POSITIONS_CACHE_RESOLUTION)
+    return JD_UNIX_EPOCH + step * POSITIONS_CACHE_RESOLUTION / 86400
+
+
+def compute_longitudes(jd: float) -> tuple[float, ...]:
+    return tuple(get_engine().longitudes(jd))
+
+
+def compute_motion(jd: float) -> tuple[float, ...]:
+    """Longitudes followed by speeds, in one tuple for the cache."""
+    engine = get_engine()
+    return tuple(engine.longitudes(jd)) + tuple(engine.speeds(jd))
+
 
+def planet_positions(
+    longitudes: tuple[float, ...],
+    speeds: tuple[float, ...] | None = None,
+) -> dict[str, dict[str, Any]]:
     results = {}
-    for name, planet in planets.items():
-        planet.compute(observer)
-        longitude = ephem.Ecliptic(planet).lon * 180 / ephem.pi
+    for i, (name, longitude) in enumerate(zip(PLANETS, longitudes)):
         sign, degrees = get_zodiac_sign(longitude)
-        results[name] = PlanetPosition(
-            sign=sign, degrees=round(degrees, ROUND_DECIMALS)
+        results[name] = {
+            "sign": sign,
+            "degrees": round(degrees, ROUND_DECIMALS),
+        }
+        if speeds is not None:
+            results[name]["speed"] = round(speeds[i], ROUND_DECIMALS)
+    return results
+
+
+def compute_positions_batch(
+    jds: list[float], speed: bool = False
+) -> tuple[list[list[str]], list[list[float]], list[list[float]] | None]:
+    engine = get_engine()
+    signs, degrees = [], []
+    for jd in jds:
+        row_signs, row_degrees = [], []
+        for longitude in engine.longitudes(jd):
+            sign, degree = get_zodiac_sign(longitude)
+            row_signs.append(sign)
+            row_degrees.append(round(degree, ROUND_DECIMALS))
+        signs.append(row_signs)
+        degrees.append(row_degrees)
+    speeds = None
+    if speed:
+        speeds = [
+            [round(value, ROUND_DECIMALS) for value in engine.speeds(jd)]
+            for jd in jds
+        ]
+    return signs, degrees, speeds
+
+
+def compute_longitudes_batch(
+    jds: list[float], speed: bool = False
+) -> tuple[np.ndarray, np.ndarray | None]:
+    engine = get_engine()
+    longitudes = np.array([engine.longitudes(jd) for jd in jds])
+    if not speed:
+        return longitudes, None
+    return longitudes, np.array([engine.speeds(jd) for jd in jds])
+
+
+async def planetary_positions(
+    date_time: datetime | None,
+    request: Request,
+    response: Response,
+    speed: bool = False,
+):
+    output = negotiate(request)
+    if date_time is None:
+        jd = quantize(julian_day(datetime.now()))
+    else:
+        # Positions at an explicit time never change
+        jd = julian_day(date_time)
+        not_modified = conditional(
+            request, response, "planets", jd, speed, output
+        )
+        if not_modified is not None:
+            return not_modified
+    key = (jd, "speed") if speed else jd
+    compute = compute_motion if speed else compute_longitudes
+    values = positions_cache.get(key)
+    if values is None:
+        values = await positions_flights.run(
+            key, lambda: compute_executor.run(compute, jd)
+        )
+        positions_cache.set(key, values)
+    # Without speeds, values only hold longitudes
+    n = len(PLANETS)
+    longitudes, speeds = values[:n], values[n:] or None
+    if output:
+        columns = position_columns(
+            [jd], [longitudes], PLANETS, speeds and [speeds]
         )
+        return binary_response(columns, output, response)
+    return fast_response(planet_positions(longitudes, speeds), response)
 
-    return results
+
+@router.post(
+    "/planets",
+    response_model=PlanetaryPositionsResponse,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+)
+async def get_planetary_positions(
+    http_request: Request,
+    response: Response,
+    request: DateTimeRequest = None,
+):
+    request = request or DateTimeRequest()
+    return await planetary_positions(
+        request.date_time, http_request, response, request.speed
+    )
+
+
+@router.get(
+    "/planets",
+    response_model=PlanetaryPositionsResponse,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+)
+async def get_planetary_positions_query(
+    request: Request,
+    response: Response,
+    date_time: datetime | None = None,
+    speed: bool = Query(False, description="Include speeds in degrees/day"),
+):
+    return await planetary_positions(date_time, request, response, speed)
+
+
+@router.post(
+    "/planets/batch",
+    response_model=BatchPlanetaryPositionsResponse,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+)
+async def get_planetary_positions_batch(
+    request: BatchDateTimeRequest, http_request: Request
+):
+    output = negotiate(http_request)
+    jds = julian_days([utc_naive(dt) for dt in request.date_times])
+    if output:
+        longitudes, speeds = await compute_executor.run(
+            compute_longitudes_batch,
+            jds.tolist(),
+            request.speed,
+            batch_size=len(jds),
+        )
+        return binary_response(
+            position_columns(jds, longitudes, PLANETS, speeds), output
+        )
+    signs, degrees, speeds = await compute_executor.run(
+        compute_positions_batch,
+        jds.tolist(),
+        request.speed,
+        batch_size=len(jds),
+    )
+    content = {
+        "planets": list(PLANETS),
+        "date_times": request.date_times,
+        "signs": signs,
+        "degrees": degrees,
+    }
+    if speeds is not None:
+        content["speeds"] = speeds
+    return fast_response(content)
@@ -0,0 +1,157 @@
+import os
+from typing import Any
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+
+from app.models import SynastryChart, SynastryRequest, SynastryResponse
+from app.utils.astro_calculations import (
+    ASPECTS,
+    PLANETS,
+    ROUND_DECIMALS,
+    get_engine,
+    julian_day,
+    julian_days,
+    parse_bodies,
+)
+from app.utils.executor import compute_executor
+from app.utils.metrics import TimedRoute
+from app.utils.synastry import Hit, aspects_within_orb, synastry
+
+########################################################
+#           Settings
+########################################################
+MAX_SYNASTRY_PAIRS = int(os.getenv("MAX_SYNASTRY_PAIRS", "1000000"))
+# Values per intermediate array (8 bytes each) when scoring a tile of
+# chart pairs; bounds memory whatever the number of charts on either side
+SYNASTRY_CHUNK_ELEMENTS = int(
+    os.getenv("SYNASTRY_CHUNK_ELEMENTS", str(4 * 1024 * 1024))
+)
+
+########################################################
+#           Constants
+########################################################
+DEFAULT_ORBS = {
+    "conjunction": 8.0,
+    "semisextile": 2.0,
+    "semisquare": 2.0,
+    "sextile": 4.0,
+    "square": 6.0,
+    "trine": 6.0,
+    "sesquiquadrate": 2.0,
+    "quincunx": 3.0,
+    "opposition": 8.0,
+}
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def chart_longitudes(
+    charts: list[SynastryChart], bodies: list[str]
+) -> np.ndarray:
+    """Longitudes of ``bodies`` (columns) in each chart (rows)."""
+    engine = get_engine()
+    rows = np.empty((len(charts), len(bodies)))
+    for i, chart in enumerate(charts):
+        if chart.longitudes is not None:
+            longitudes = chart.longitudes
+        elif chart.date_time is not None:
+            if chart.tz_offset:
+                (jd,) = julian_days([chart.date_time], [chart.tz_offset])
+            else:
+                jd = julian_day(chart.date_time)
+            longitudes = dict(zip(PLANETS, engine.longitudes(jd)))
+        else:
+            raise ValueError(f"Chart {i} needs date_time or longitudes")
+        missing = [name for name in bodies if name not in longitudes]
+        if missing:
+            raise ValueError(f"Chart {i} has no longitude for {missing}")
+        # Given longitudes may lie outside the [0, 360) separations assume
+        rows[i] = [longitudes[name] % 360 for name in bodies]
+    return rows
+
+
+def synastry_pair(
+    hit: Hit,
+    bodies: list[str],
+    aspects: list[str],
+    angles: np.ndarray,
+    orbs: np.ndarray,
+) -> dict[str, Any]:
+    score, chart, other, separation = hit
+    return {
+        "chart": chart,
+        "other": other,
+        "score": round(score, ROUND_DECIMALS),
+        "aspects": [
+            {
+                "body": bodies[i],
+                "other_body": bodies[j],
+                "aspect": aspects[aspect],
+                "orb": round(deviation, ROUND_DECIMALS),
+            }
+            for i, j, aspect, deviation, _ in aspects_within_orb(
+                separation, angles, orbs
+            )
+        ],
+    }
+
+
+@router.post("/synastry", response_model=SynastryResponse)
+async def get_synastry(request: SynastryRequest):
+    try:
+        bodies = (
+            parse_bodies(",".join(request.bodies))
+            if request.bodies
+            else list(PLANETS)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    n = len(request.charts)
+    if request.others is None:
+        pairs = n * (n - 1) // 2
+    else:
+        pairs = n * len(request.others)
+    if pairs > MAX_SYNASTRY_PAIRS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{pairs} pairs to compare (at most {MAX_SYNASTRY_PAIRS}).",
+        )
+    orbs = {**DEFAULT_ORBS, **request.orbs}
+    if any(orbs[aspect] <= 0 for aspect in request.aspects):
+        raise HTTPException(status_code=422, detail="Orbs must be positive")
+
+    try:
+        charts = await compute_executor.run(
+            chart_longitudes, request.charts, bodies, batch_size=n
+        )
+        others = None
+        if request.others is not None:
+            others = await compute_executor.run(
+                chart_longitudes,
+                request.others,
+                bodies,
+                batch_size=len(request.others),
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    angles = np.array([ASPECTS[aspect] for aspect in request.aspects], float)
+    orbs = np.array([orbs[aspect] for aspect in request.aspects])
+    hits, compared = await compute_executor.run(
+        synastry,
+        charts,
+        others,
+        angles,
+        orbs,
+        request.min_score,
+        request.limit,
+        SYNASTRY_CHUNK_ELEMENTS,
+        batch_size=pairs,
+    )
+    return {
+        "pairs_compared": compared,
+        "pairs": [
+            synastry_pair(hit, bodies, request.aspects, angles, orbs)
+            for hit in hits
+        ],
+    }
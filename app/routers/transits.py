@@ -0,0 +1,161 @@
+import os
+from typing import Any
+
+import numpy as np
+import swisseph as swe
+from fastapi import APIRouter, HTTPException
+
+from app.models import LocationRequest, TransitRequest, TransitResponse
+from app.routers.events import search_range
+from app.utils.astro_calculations import (
+    ASPECTS,
+    PLANETS,
+    datetime_from_julian_day,
+    get_engine,
+    julian_day,
+    julian_days,
+    parse_bodies,
+)
+from app.utils.executor import compute_executor
+from app.utils.metrics import TimedRoute
+from app.utils.search import SAMPLING_DAYS, longitude_crossings, wrap180
+
+########################################################
+#           Settings
+########################################################
+# The Moon alone passes each aspect target about 13 times a year, so the
+# cost of a search grows quickly with its length
+MAX_TRANSIT_DAYS = float(os.getenv("MAX_TRANSIT_DAYS", "1830"))
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def natal_points(birth: LocationRequest, jd_ut: float) -> dict[str, float]:
+    """Planets, ascendant and MC of a birth chart."""
+    natal = dict(zip(PLANETS, get_engine().longitudes(jd_ut)))
+    _, ascmc = swe.houses(jd_ut, birth.latitude, birth.longitude, b"A")
+    natal["ascendant"], natal["mc"] = ascmc[0], ascmc[1]
+    return natal
+
+
+def aspect_targets(
+    natal: dict[str, float], aspects: list[str]
+) -> list[tuple[str, str, float]]:
+    """``(natal point, aspect, longitude)`` of every exact aspect."""
+    targets = []
+    for point, longitude in natal.items():
+        for aspect in aspects:
+            # Both sides of the natal point, once for conjunctions and
+            # oppositions
+            for angle in sorted({ASPECTS[aspect], -ASPECTS[aspect] % 360}):
+                targets.append((point, aspect, (longitude + angle) % 360))
+    return targets
+
+
+def find_transits(
+    natal: dict[str, float],
+    bodies: list[str],
+    aspects: list[str],
+    orb: float,
+    start_jd: float,
+    end_jd: float,
+) -> list[dict[str, Any]]:
+    engine = get_engine()
+    targets = aspect_targets(natal, aspects)
+    exact = np.array([longitude for _, _, longitude in targets])
+    # Every target is searched together with the two edges of its orb
+    points = np.concatenate([exact, exact - orb, exact + orb])
+    windows = []
+    for name in bodies:
+
+        def longitude(jd: float, name=name) -> float:
+            return engine.longitude(name, jd)
+
+        def window(target: int, jd: float | None) -> dict[str, Any]:
+            """A window entering orb at ``jd`` (``None``: before start)."""
+            point, aspect, _ = targets[target]
+            orb_start = None if jd is None else datetime_from_julian_day(jd)
+            return {
+                "body": name,
+                "natal": point,
+                "aspect": aspect,
+                "orb_start": orb_start,
+                "orb_end": None,
+                "exact": [],
+                "jd": start_jd if jd is None else jd,
+            }
+
+        start = longitude(start_jd)
+        in_orb = {
+            target: window(target, None)
+            for target in range(len(targets))
+            if abs(wrap180(start - exact[target])) <= orb
+        }
+        crossings = longitude_crossings(
+            longitude, points, start_jd, end_jd, SAMPLING_DAYS[name]
+        )
+        for jd, index, retrograde in crossings:
+            kind, target = divmod(index, len(targets))
+            if kind == 0:
+                if target not in in_orb:
+                    in_orb[target] = window(target, jd)
+                in_orb[target]["exact"].append(
+                    {
+                        "date_time": datetime_from_julian_day(jd),
+                        "retrograde": retrograde,
+                    }
+                )
+            # Direct motion enters the orb over its lower edge (kind 1)
+            # and leaves over its upper edge (kind 2); retrograde reverses
+            elif (kind == 1) != retrograde:
+                in_orb[target] = window(target, jd)
+            elif target in in_orb:
+                ended = in_orb.pop(target)
+                ended["orb_end"] = datetime_from_julian_day(jd)
+                windows.append(ended)
+        windows.extend(in_orb.values())
+    windows.sort(key=lambda window: window.pop("jd"))
+    return windows
+
+
+@router.post("/transits", response_model=TransitResponse)
+async def get_transits(request: TransitRequest):
+    if (request.natal is None) == (request.birth is None):
+        raise HTTPException(
+            status_code=422, detail="Give either natal or birth"
+        )
+    try:
+        bodies = (
+            parse_bodies(",".join(request.bodies))
+            if request.bodies
+            else list(PLANETS)
+        )
+        if request.birth and request.birth.tz_offset:
+            (jd_ut,) = julian_days(
+                [request.birth.date_time], [request.birth.tz_offset]
+            )
+        elif request.birth:
+            jd_ut = julian_day(request.birth.date_time)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    start_jd, end_jd = search_range(request.start, request.end)
+    if end_jd - start_jd > MAX_TRANSIT_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range is longer than {MAX_TRANSIT_DAYS:g} days.",
+        )
+    if request.birth:
+        natal = await compute_executor.run(natal_points, request.birth, jd_ut)
+    else:
+        natal = request.natal
+    windows = await compute_executor.run(
+        find_transits,
+        natal,
+        bodies,
+        request.aspects,
+        request.orb,
+        start_jd,
+        end_jd,
+        batch_size=int(end_jd - start_jd),
+    )
+    return {"natal": natal, "windows": windows}
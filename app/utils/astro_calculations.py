@@ -1,5 +1,15 @@
+import os
 import re
-from datetime import timedelta, timezone
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Sequence
+
+import ephem
+import numpy as np
+import swisseph as swe
+
+from app.utils.chebyshev import SEGMENT_DAYS, ChebyshevTables
 
 ########################################################
 #           Constants
@@ -19,8 +29,79 @@ SIGNS = [
     "Pisces",
 ]
 
+PLANETS = {
+    "Sun": ephem.Sun,
+    "Moon": ephem.Moon,
+    "Mercury": ephem.Mercury,
+    "Venus": ephem.Venus,
+    "Mars": ephem.Mars,
+    "Jupiter": ephem.Jupiter,
+    "Saturn": ephem.Saturn,
+    "Uranus": ephem.Uranus,
+    "Neptune": ephem.Neptune,
+    "Pluto": ephem.Pluto,
+}
+
+# Swiss Ephemeris body numbers of PLANETS
+SWE_BODIES = {
+    "Sun": swe.SUN,
+    "Moon": swe.MOON,
+    "Mercury": swe.MERCURY,
+    "Venus": swe.VENUS,
+    "Mars": swe.MARS,
+    "Jupiter": swe.JUPITER,
+    "Saturn": swe.SATURN,
+    "Uranus": swe.URANUS,
+    "Neptune": swe.NEPTUNE,
+    "Pluto": swe.PLUTO,
+}
+
+# Angles of the aspects between two ecliptic longitudes, in degrees
+ASPECTS = {
+    "conjunction": 0,
+    "semisextile": 30,
+    "semisquare": 45,
+    "sextile": 60,
+    "square": 90,
+    "trine": 120,
+    "sesquiquadrate": 135,
+    "quincunx": 150,
+    "opposition": 180,
+}
+
 ROUND_DECIMALS = 4
 
+# Half the interval (days) of the central differences giving speeds
+SPEED_STEP_DAYS = 5e-4
+
+STEP_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+JD_UNIX_EPOCH = 2440587.5
+# ephem dates count days from this Julian day (1899-12-31 12:00 UT)
+JD_DUBLIN_EPOCH = 2415020.0
+UNIX_EPOCH = np.datetime64("1970-01-01T00:00:00", "us")
+MICROSECONDS_PER_DAY = 86400e6
+
+# "ephem" or "swisseph"
+EPHEMERIS_ENGINE = os.getenv("EPHEMERIS_ENGINE", "ephem")
+# Directory of Swiss Ephemeris data files (*.se1); without it swisseph uses
+# its built-in Moshier theory
+SWISSEPH_PATH = os.getenv("SWISSEPH_PATH", "")
+
+# Optional precomputed Chebyshev tables (see scripts/build_tables.py)
+EPHEMERIS_TABLES = os.getenv("EPHEMERIS_TABLES", "")
+
+# Within about a week of J2000 ephem skips precessing astrometric positions,
+# a step of up to ~1 arcsecond that polynomial segments cannot follow. The
+# tables are not used for any segment that may overlap it.
+_LONGEST_SEGMENT = max(SEGMENT_DAYS.values())
+EPHEM_J2000_QUIRK = (
+    2451537.0 - _LONGEST_SEGMENT,
+    2451552.0 + _LONGEST_SEGMENT,
+)
+
 
 ########################################################
 #           Helper Functions
@@ -31,6 +112,7 @@ def get_zodiac_sign(longitude: float) -> tuple[str, float]:
     return SIGNS[sign_num], degrees
 
 
+@lru_cache(maxsize=256)
 def parse_tz_offset(tz_offset: str) -> timezone:
     match = re.match(r"([+-])(\d{2}):(\d{2})", tz_offset)
     if not match:
@@ -38,3 +120,216 @@ def parse_tz_offset(tz_offset: str) -> timezone:
     sign, hours, minutes = match.groups()
     delta = timedelta(hours=int(hours), minutes=int(minutes))
     return timezone(-delta if sign == "-" else delta)
+
+
+def parse_step(step: str) -> timedelta:
+    """Parse a step such as ``90s``, ``15m``, ``6h`` or ``1d``."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", step)
+    delta = None
+    if match:
+        value, unit = match.groups()
+        delta = timedelta(**{STEP_UNITS[unit]: float(value)})
+    if not delta:
+        raise ValueError("Invalid step format. Use e.g. 30s, 15m, 6h or 1d.")
+    return delta
+
+
+def parse_bodies(bodies: str) -> list[str]:
+    """Parse a comma-separated list of names from ``PLANETS``."""
+    names = [name.strip() for name in bodies.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PLANETS]
+    if not names or unknown:
+        raise ValueError(
+            f"Unknown bodies: {unknown}. Use any of {list(PLANETS)}."
+        )
+    return names
+
+
+def datetime_from_julian_day(jd: float) -> datetime:
+    """Naive UTC datetime of a Julian day, to the nearest second."""
+    seconds = round((jd - JD_UNIX_EPOCH) * 86400)
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+
+def to_utc(date_time: datetime, tz_offset: str | None) -> datetime:
+    """Naive UTC datetime for ``date_time`` interpreted at ``tz_offset``."""
+    if not tz_offset:
+        return date_time
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=parse_tz_offset(tz_offset))
+    return date_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_naive(date_time: datetime) -> datetime:
+    """Naive UTC datetime, treating naive input as already being UTC."""
+    if date_time.tzinfo is None:
+        return date_time
+    return date_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def julian_day(date_time: datetime) -> float:
+    elapsed = utc_naive(date_time) - datetime(1970, 1, 1)
+    return JD_UNIX_EPOCH + elapsed / timedelta(days=1)
+
+
+def julian_days(
+    date_times: Sequence[datetime],
+    tz_offsets: Sequence[str | None] | None = None,
+) -> np.ndarray:
+    """Julian days (UT) of ``to_utc`` datetimes, to the microsecond."""
+    if tz_offsets is None:
+        tz_offsets = [None] * len(date_times)
+    offsets = np.empty(len(date_times), dtype=np.float64)
+    wall_clock = []
+    for i, (date_time, tz_offset) in enumerate(zip(date_times, tz_offsets)):
+        offset = 0.0
+        if tz_offset:
+            tz = date_time.tzinfo or parse_tz_offset(tz_offset)
+            offset = tz.utcoffset(date_time).total_seconds()
+        offsets[i] = offset
+        wall_clock.append(date_time.replace(tzinfo=None))
+    elapsed = np.array(wall_clock, dtype="datetime64[us]") - UNIX_EPOCH
+    return (
+        JD_UNIX_EPOCH
+        + elapsed.astype(np.float64) / MICROSECONDS_PER_DAY
+        - offsets / 86400
+    )
+
+
+def central_speeds(
+    longitudes: Callable[[float], list[float]], jd: float
+) -> list[float]:
+    """Degrees per day of every body, by central difference."""
+    before = longitudes(jd - SPEED_STEP_DAYS)
+    after = longitudes(jd + SPEED_STEP_DAYS)
+    return [
+        ((b - a + 180) % 360 - 180) / (2 * SPEED_STEP_DAYS)
+        for a, b in zip(before, after)
+    ]
+
+
+########################################################
+#           Ephemeris engines
+########################################################
+class EphemEngine:
+    """Geocentric J2000 ecliptic longitudes from ``ephem``'s theories."""
+
+    name = "ephem"
+    version = f"ephem-{ephem.__version__}"
+
+    def __init__(self):
+        # ephem bodies are mutable, so each thread reuses its own set
+        self._local = threading.local()
+
+    def _bodies(self) -> dict[str, ephem.Body]:
+        bodies = getattr(self._local, "bodies", None)
+        if bodies is None:
+            bodies = {name: body() for name, body in PLANETS.items()}
+            self._local.bodies = bodies
+        return bodies
+
+    def longitude(self, name: str, jd: float) -> float:
+        body = self._bodies()[name]
+        body.compute(ephem.Date(jd - JD_DUBLIN_EPOCH))
+        return ephem.Ecliptic(body).lon * 180 / ephem.pi
+
+    def longitudes(self, jd: float) -> list[float]:
+        date = ephem.Date(jd - JD_DUBLIN_EPOCH)
+        longitudes = []
+        for body in self._bodies().values():
+            body.compute(date)
+            longitudes.append(ephem.Ecliptic(body).lon * 180 / ephem.pi)
+        return longitudes
+
+    def speeds(self, jd: float) -> list[float]:
+        return central_speeds(self.longitudes, jd)
+
+
+class SwissEphemerisEngine:
+    """Geocentric J2000 ecliptic longitudes from ``swe.calc_ut``.
+
+    Positions are astrometric (light-time corrected, without aberration
+    or light deflection) like ``ephem``'s, so both engines give the same
+    quantity from different theories.
+    """
+
+    name = "swisseph"
+
+    def __init__(self, path: str = SWISSEPH_PATH):
+        if path:
+            swe.set_ephe_path(path)
+            source = swe.FLG_SWIEPH
+        else:
+            source = swe.FLG_MOSEPH
+        theory = "files" if path else "moshier"
+        self.version = f"swisseph-{swe.version}-{theory}"
+        self.flags = source | swe.FLG_J2000 | swe.FLG_NOABERR | swe.FLG_NOGDEFL
+
+    def longitude(self, name: str, jd: float) -> float:
+        return swe.calc_ut(jd, SWE_BODIES[name], self.flags)[0][0]
+
+    def longitudes(self, jd: float) -> list[float]:
+        flags = self.flags
+        return [
+            swe.calc_ut(jd, body, flags)[0][0] for body in SWE_BODIES.values()
+        ]
+
+    def speeds(self, jd: float) -> list[float]:
+        flags = self.flags | swe.FLG_SPEED
+        return [
+            swe.calc_ut(jd, body, flags)[0][3] for body in SWE_BODIES.values()
+        ]
+
+
+Engine = EphemEngine | SwissEphemerisEngine
+
+
+def create_engine(name: str) -> Engine:
+    if name == "ephem":
+        return EphemEngine()
+    if name == "swisseph":
+        return SwissEphemerisEngine()
+    raise ValueError(f"Unsupported ephemeris engine: {name}")
+
+
+class ChebyshevEngine:
+    """Interpolates precomputed tables, falling back outside their span."""
+
+    name = "chebyshev"
+
+    def __init__(self, tables: ChebyshevTables, fallback: Engine):
+        # Mixing two theories would make longitudes jump at the table edges
+        if tables.engine_version != fallback.version:
+            raise ValueError(
+                f"Tables were sampled from {tables.engine_version}, "
+                f"not from the fallback engine {fallback.version}"
+            )
+        self.tables = tables
+        self.fallback = fallback
+        self.version = f"{fallback.version}+tables-{tables.checksum}"
+
+    def covers(self, jd: float) -> bool:
+        return self.tables.covers(jd) and not (
+            EPHEM_J2000_QUIRK[0] <= jd < EPHEM_J2000_QUIRK[1]
+        )
+
+    def longitude(self, name: str, jd: float) -> float:
+        if self.covers(jd):
+            return self.tables.longitude(name, jd)
+        return self.fallback.longitude(name, jd)
+
+    def longitudes(self, jd: float) -> list[float]:
+        if not self.covers(jd):
+            return self.fallback.longitudes(jd)
+        return [self.tables.longitude(name, jd) for name in PLANETS]
+
+    def speeds(self, jd: float) -> list[float]:
+        return central_speeds(self.longitudes, jd)
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine | ChebyshevEngine:
+    engine = create_engine(EPHEMERIS_ENGINE)
+    if EPHEMERIS_TABLES:
+        return ChebyshevEngine(ChebyshevTables(EPHEMERIS_TABLES), engine)
+    return engine
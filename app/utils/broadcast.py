@@ -0,0 +1,97 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+
+class Broadcaster:
+    """Produces a payload every ``interval`` seconds for all subscribers.
+
+    ``produce()`` runs once per tick however many subscribers there are,
+    and only while there is at least one. Each subscriber gets the same
+    payload object through a queue of at most ``queue_size`` payloads; a
+    subscriber that falls that far behind is dropped, so one slow client
+    can neither hold up the others nor make memory grow. Use it from the
+    event loop only.
+    """
+
+    def __init__(
+        self,
+        produce: Callable[[], Awaitable[Any]],
+        interval: float,
+        queue_size: int,
+    ):
+        self.produce = produce
+        self.interval = interval
+        self.queue_size = queue_size
+        self.latest: Any = None
+        self.ticks = 0
+        self.failures = 0
+        self.dropped = 0
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """A queue of payloads, starting with the latest one if any.
+
+        ``None`` is queued when the subscriber is dropped, after which
+        nothing else is.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                await self.stop()
+
+    async def stop(self) -> None:
+        """Stop ticking and end every subscription."""
+        for queue in list(self._subscribers):
+            self._end(queue)
+        task, self._task = self._task, None
+        self.latest = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def _end(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        tick = loop.time()
+        while True:
+            try:
+                payload = await self.produce()
+            except Exception:
+                # e.g. a busy executor: skip the tick, try again on the next
+                self.failures += 1
+            else:
+                self.ticks += 1
+                self.latest = payload
+                for queue in list(self._subscribers):
+                    try:
+                        queue.put_nowait(payload)
+                    except asyncio.QueueFull:
+                        self.dropped += 1
+                        self._end(queue)
+            # Ticks stay on the interval grid, however long produce() took
+            tick += self.interval
+            now = loop.time()
+            if tick < now:
+                tick += (now - tick) // self.interval * self.interval
+                tick += self.interval
+            await asyncio.sleep(tick - now)
@@ -0,0 +1,201 @@
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+
+########################################################
+#           Settings
+########################################################
+MAGIC = b"LILITCHB"
+VERSION = 2
+
+# Error bound (degrees) that every table must meet against the engine it
+# was sampled from. Builds exceeding it fail instead of shipping a table.
+MAX_ERROR_DEGREES = 1e-6
+
+# Segment length (days) per body, short enough that a fixed degree
+# polynomial stays within MAX_ERROR_DEGREES of the sampled longitude.
+SEGMENT_DAYS = {
+    "Sun": 16.0,
+    "Moon": 4.0,
+    "Mercury": 8.0,
+    "Venus": 16.0,
+    "Mars": 16.0,
+    "Jupiter": 32.0,
+    "Saturn": 32.0,
+    "Uranus": 32.0,
+    "Neptune": 32.0,
+    "Pluto": 32.0,
+}
+COEFFICIENTS = 14
+
+HEADER = struct.Struct("<8sII48sdd")
+ENTRY = struct.Struct("<16sdIIdQ")
+
+LongitudeSampler = Callable[[str, np.ndarray], np.ndarray]
+
+
+########################################################
+#           Tables
+########################################################
+class ChebyshevTables:
+    """Memory-mapped Chebyshev coefficients of ecliptic longitude.
+
+    Layout: a header (magic, version, body count, version of the engine
+    sampled, start and end Julian day) followed by one directory entry
+    per body (name, segment length, segment count, coefficient count,
+    measured max error and byte offset) and the little-endian float64
+    coefficient blocks.
+    """
+
+    def __init__(self, path: str | Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is not a version {VERSION} table file")
+        (
+            magic,
+            version,
+            count,
+            engine_version,
+            self.start_jd,
+            self.end_jd,
+        ) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} table file")
+        # Version of the engine the tables were sampled from
+        self.engine_version = engine_version.rstrip(b"\0").decode()
+        # Identifies the tables in cache validators (ETags)
+        self.checksum = f"{zlib.crc32(self._mmap):08x}"
+
+        self.segment_days: dict[str, float] = {}
+        self.max_error: dict[str, float] = {}
+        self._coefficients: dict[str, np.ndarray] = {}
+        for i in range(count):
+            raw_name, days, segments, size, error, offset = ENTRY.unpack_from(
+                self._mmap, HEADER.size + i * ENTRY.size
+            )
+            name = raw_name.rstrip(b"\0").decode()
+            self.segment_days[name] = days
+            self.max_error[name] = error
+            self._coefficients[name] = np.frombuffer(
+                self._mmap, dtype="<f8", count=segments * size, offset=offset
+            ).reshape(segments, size)
+
+    def covers(self, jd: float) -> bool:
+        return self.start_jd <= jd < self.end_jd
+
+    def longitude(self, name: str, jd: float) -> float:
+        days = self.segment_days[name]
+        segment, fraction = divmod((jd - self.start_jd) / days, 1.0)
+        coefficients = self._coefficients[name][int(segment)].tolist()
+        return clenshaw(coefficients, 2 * fraction - 1) % 360
+
+
+def clenshaw(coefficients: Sequence[float], x: float) -> float:
+    b1 = b2 = 0.0
+    x2 = 2 * x
+    for c in reversed(coefficients[1:]):
+        b1, b2 = c + x2 * b1 - b2, b1
+    return coefficients[0] + x * b1 - b2
+
+
+########################################################
+#           Build
+########################################################
+def fit_segments(
+    sample: LongitudeSampler,
+    name: str,
+    start_jd: float,
+    segments: int,
+    days: float,
+    size: int = COEFFICIENTS,
+) -> np.ndarray:
+    """Chebyshev coefficients of ``name``'s unwrapped longitude."""
+    k = np.arange(size)
+    nodes = np.cos(np.pi * (k + 0.5) / size)
+    transform = np.cos(np.outer(k, np.pi * (k + 0.5) / size)) * 2 / size
+    transform[0] /= 2
+
+    jds = start_jd + days * (np.arange(segments)[:, None] + (nodes + 1) / 2)
+    values = sample(name, jds.ravel()).reshape(segments, size)
+    values = np.rad2deg(np.unwrap(np.deg2rad(values), axis=1))
+    return values @ transform.T
+
+
+def build_tables(
+    sample: LongitudeSampler,
+    names: Sequence[str],
+    start_jd: float,
+    end_jd: float,
+    path: str | Path,
+    validation_jds: np.ndarray,
+    engine_version: str,
+    max_error: float = MAX_ERROR_DEGREES,
+) -> dict[str, float]:
+    """Fit, validate and write tables covering ``[start_jd, end_jd)``.
+
+    ``sample(name, jds)`` returns ecliptic longitudes in degrees from the
+    engine whose version is ``engine_version``, recorded in the file. Returns
+    the max error per body measured at ``validation_jds``. Raises
+    ``ValueError``, leaving ``path`` untouched, if any exceeds
+    ``max_error``; otherwise ``path`` is replaced atomically.
+    """
+    blocks, errors = [], {}
+    for name in names:
+        days = SEGMENT_DAYS[name]
+        segments = int(np.ceil((end_jd - start_jd) / days))
+        coefficients = fit_segments(sample, name, start_jd, segments, days)
+
+        jds = validation_jds
+        offsets = (jds - start_jd) / days
+        rows = offsets.astype(int)
+        fitted = np.polynomial.chebyshev.chebval(
+            2 * (offsets - rows) - 1, coefficients[rows].T, tensor=False
+        )
+        residual = (fitted - sample(name, jds) + 180) % 360 - 180
+        errors[name] = float(np.abs(residual).max())
+        blocks.append((name, days, coefficients))
+
+    exceeded = [name for name, error in errors.items() if error > max_error]
+    if exceeded:
+        raise ValueError(
+            f"error bound of {max_error} deg exceeded by "
+            + ", ".join(f"{name} ({errors[name]:.2e})" for name in exceeded)
+        )
+
+    path = Path(path)
+    offset = HEADER.size + len(blocks) * ENTRY.size
+    offset += -offset % 8
+    # Processes may be mapping the current tables
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, suffix=".tmp", delete=False
+    ) as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(blocks),
+                engine_version.encode(),
+                start_jd,
+                end_jd,
+            )
+        )
+        for name, days, coefficients in blocks:
+            segments, size = coefficients.shape
+            f.write(
+                ENTRY.pack(
+                    name.encode(), days, segments, size, errors[name], offset
+                )
+            )
+            offset += coefficients.nbytes
+        f.write(b"\0" * (-f.tell() % 8))
+        for _, _, coefficients in blocks:
+            f.write(coefficients.astype("<f8").tobytes())
+    os.replace(f.name, path)
+    return errors
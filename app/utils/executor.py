@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterable
+
+from fastapi import HTTPException
+
+from app.utils.metrics import record, register_counter
+
+########################################################
+#           Settings
+########################################################
+COMPUTE_THREADS = int(os.getenv("COMPUTE_THREADS", "4"))
+COMPUTE_PROCESSES = int(os.getenv("COMPUTE_PROCESSES", "0")) or os.cpu_count()
+PROCESS_POOL_THRESHOLD = int(os.getenv("PROCESS_POOL_THRESHOLD", "200"))
+COMPUTE_QUEUE_SIZE = int(os.getenv("COMPUTE_QUEUE_SIZE", "64"))
+
+
+########################################################
+#           Executor
+########################################################
+class ComputeExecutor:
+    """Runs blocking ephemeris work off the event loop.
+
+    Small jobs go to a thread pool and batches of at least
+    ``process_threshold`` items to a lazily started process pool. At most
+    ``queue_size`` jobs may be queued or running at once; beyond that new
+    jobs are rejected with a 503 instead of piling up latency. A job counts
+    until the pool is done with it, even if its caller stopped waiting.
+    """
+
+    def __init__(
+        self,
+        threads: int = COMPUTE_THREADS,
+        processes: int = COMPUTE_PROCESSES,
+        process_threshold: int = PROCESS_POOL_THRESHOLD,
+        queue_size: int = COMPUTE_QUEUE_SIZE,
+    ):
+        self.threads = threads
+        self.processes = processes
+        self.process_threshold = process_threshold
+        self.queue_size = queue_size
+        self.pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+
+    def _pool(self, batch_size: int) -> Executor:
+        if self.processes > 0 and batch_size >= self.process_threshold:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(self.processes)
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                self.threads, thread_name_prefix="compute"
+            )
+        return self._thread_pool
+
+    async def run(
+        self, func: Callable[..., Any], *args: Any, batch_size: int = 1
+    ) -> Any:
+        if self.pending >= self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy. Please try again later.",
+                headers={"Retry-After": "1"},
+            )
+        return await self._run(func, args, batch_size)
+
+    async def stream(
+        self,
+        func: Callable[..., Any],
+        arguments: Iterable[tuple],
+        batch_size: int = 1,
+    ) -> AsyncIterator[Any]:
+        """``func(*args)`` for each of ``arguments`` (at least one), in turn.
+
+        The first call is admitted like ``run``, so a busy executor is
+        reported with a 503 before a response starts. Later calls count
+        towards ``pending`` but are not rejected, which would cut an
+        admitted stream short.
+        """
+        arguments = iter(arguments)
+        first = await self.run(func, *next(arguments), batch_size=batch_size)
+
+        async def results() -> AsyncIterator[Any]:
+            yield first
+            for args in arguments:
+                yield await self._run(func, args, batch_size)
+
+        return results()
+
+    async def _run(
+        self, func: Callable[..., Any], args: tuple, batch_size: int
+    ) -> Any:
+        with self._lock:
+            self.pending += 1
+        start = time.perf_counter()
+        try:
+            future = self._pool(batch_size).submit(partial(func, *args))
+        except BaseException:
+            self._release()
+            raise
+        # Work keeps running when its caller goes away (e.g. the client
+        # disconnects), so it only stops counting once the pool is done
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            record("compute", start)
+
+    def _release(self, future: Future | None = None) -> None:
+        # Called from pool threads as well as the event loop
+        with self._lock:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
+
+compute_executor = ComputeExecutor()
+register_counter(
+    "compute_rejected_total",
+    "Compute jobs refused with 503 because the queue was full.",
+    'executor="compute"',
+    lambda: compute_executor.rejected,
+)
+register_counter(
+    "compute_pending",
+    "Compute jobs submitted and not finished yet.",
+    'executor="compute"',
+    lambda: compute_executor.pending,
+    kind="gauge",
+)
@@ -0,0 +1,243 @@
+import io
+import json
+from typing import Sequence
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from app.utils.astro_calculations import SIGNS
+from app.utils.grid import encode_npy
+
+# Optional dependencies: their formats are only offered when installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+########################################################
+#           Constants
+########################################################
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "npy": "application/x-npy",
+    "msgpack": "application/msgpack",
+}
+# Accept header media types of each binary format
+FORMATS = {
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/x-npy": "npy",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+JSON_MEDIA_TYPES = {"application/json", "application/*", "*/*"}
+PACKAGES = {"arrow": "pyarrow", "msgpack": "msgpack"}
+# Documents the binary alternatives of a route in OpenAPI
+BINARY_RESPONSES = {
+    200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}
+}
+
+# Closes an Arrow IPC stream: a continuation marker and a zero length
+ARROW_END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+Columns = dict[str, np.ndarray]
+
+
+########################################################
+#           Content negotiation
+########################################################
+def available(output: str) -> bool:
+    if output == "arrow":
+        return pyarrow is not None
+    if output == "msgpack":
+        return msgpack is not None
+    return True
+
+
+def negotiate(request: Request) -> str | None:
+    """Binary format preferred by ``Accept``, or ``None`` for JSON.
+
+    Raises a 406 if the only formats accepted need a package that is not
+    installed.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return None
+    ranges = []
+    for i, item in enumerate(accept.split(",")):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, i, media_type.strip().lower()))
+    missing = []
+    for _, _, media_type in sorted(ranges):
+        if media_type in JSON_MEDIA_TYPES:
+            return None
+        output = FORMATS.get(media_type)
+        if output is None:
+            continue
+        if available(output):
+            return output
+        missing.append(f"{media_type} needs the {PACKAGES[output]} package")
+    if missing:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Not available on this server: {'; '.join(missing)}. "
+            "Accept application/json instead.",
+        )
+    # Unknown media types get JSON, as before content negotiation
+    return None
+
+
+########################################################
+#           Columns
+########################################################
+def sign_indices(longitudes: np.ndarray) -> np.ndarray:
+    """Indices into ``SIGNS`` (0 = Aries) of ecliptic longitudes."""
+    return (np.asarray(longitudes) // 30).astype(np.uint8)
+
+
+def position_columns(
+    julian_days: Sequence[float],
+    longitudes: np.ndarray,
+    names: Sequence[str],
+    speeds: np.ndarray | None = None,
+) -> Columns:
+    """One float64 longitude and one uint8 sign column per name, and a
+    float64 ``{name}_speed`` column if ``speeds`` are given.
+
+    ``longitudes`` and ``speeds`` have one row per Julian day and one
+    column per name.
+    """
+    shape = (len(julian_days), len(names))
+    longitudes = np.asarray(longitudes, dtype=np.float64).reshape(shape)
+    if speeds is not None:
+        speeds = np.asarray(speeds, dtype=np.float64).reshape(shape)
+    columns = {"julian_day": np.asarray(julian_days, dtype=np.float64)}
+    for i, name in enumerate(names):
+        columns[name] = longitudes[:, i]
+        columns[f"{name}_sign"] = sign_indices(longitudes[:, i])
+        if speeds is not None:
+            columns[f"{name}_speed"] = speeds[:, i]
+    return columns
+
+
+########################################################
+#           Encoders
+########################################################
+def records(columns: Columns) -> np.ndarray:
+    """A structured array with one field per column."""
+    dtype = np.dtype(
+        [(name, column.dtype) for name, column in columns.items()]
+    )
+    table = np.empty(len(next(iter(columns.values()))), dtype=dtype)
+    for name, column in columns.items():
+        table[name] = column
+    return table
+
+
+def encode_npy_table(columns: Columns) -> bytes:
+    return encode_npy(records(columns))
+
+
+def npy_header(dtype: np.dtype, rows: int) -> bytes:
+    """The header of an ``.npy`` file of ``rows`` records of ``dtype``."""
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        buffer,
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (rows,),
+        },
+    )
+    return buffer.getvalue()
+
+
+def record_batch(columns: Columns) -> "pyarrow.RecordBatch":
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(column) for column in columns.values()],
+        names=list(columns),
+        metadata={"signs": json.dumps(SIGNS)},
+    )
+
+
+def encode_arrow(columns: Columns) -> bytes:
+    """A single record batch in the Arrow IPC streaming format."""
+    batch = record_batch(columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(columns: Columns) -> bytes:
+    """Columns as raw little-endian buffers, for ``np.frombuffer``."""
+    little_endian = {
+        name: column.astype(column.dtype.newbyteorder("<"), copy=False)
+        for name, column in columns.items()
+    }
+    return msgpack.packb(
+        {
+            "rows": len(next(iter(columns.values()))),
+            "signs": SIGNS,
+            "columns": {
+                name: {"dtype": column.dtype.str, "data": column.tobytes()}
+                for name, column in little_endian.items()
+            },
+        }
+    )
+
+
+def encode_chunk(
+    columns: Columns, output: str, rows: int, first: bool, last: bool
+) -> bytes:
+    """One chunk of a table of ``rows`` rows streamed as ``output``.
+
+    npy has a single header for the whole table, then the records of each
+    chunk; arrow a schema, one record batch per chunk and an end-of-stream
+    marker; msgpack one ``encode_msgpack`` map per chunk, to be read with
+    ``msgpack.Unpacker``.
+    """
+    if output == "npy":
+        table = records(columns)
+        header = npy_header(table.dtype, rows) if first else b""
+        return header + table.tobytes()
+    if output == "arrow":
+        batch = record_batch(columns)
+        schema = batch.schema.serialize().to_pybytes() if first else b""
+        end = ARROW_END_OF_STREAM if last else b""
+        return schema + batch.serialize().to_pybytes() + end
+    return encode_msgpack(columns)
+
+
+ENCODERS = {
+    "arrow": encode_arrow,
+    "npy": encode_npy_table,
+    "msgpack": encode_msgpack,
+}
+
+
+def binary_response(
+    columns: Columns, output: str, response: Response | None = None
+) -> Response:
+    """``columns`` encoded as ``output``, with the headers of ``response``."""
+    encoded = Response(
+        ENCODERS[output](columns), media_type=MEDIA_TYPES[output]
+    )
+    if response is not None:
+        encoded.headers.update(response.headers)
+    return encoded
@@ -0,0 +1,71 @@
+import hashlib
+import os
+from typing import Any
+
+from fastapi import Request, Response
+
+from app.utils.astro_calculations import ROUND_DECIMALS, get_engine
+
+########################################################
+#           Settings
+########################################################
+# Lifetime of responses for an explicit date_time in client and CDN
+# caches. ETags include the version of the engine computing the response,
+# so when it changes clients revalidate once their copy expires.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "2592000"))
+
+# Bumped whenever the content of a cacheable response changes shape
+RESPONSE_VERSION = 1
+
+
+def make_etag(*parts: Any, version: str | None = None) -> str:
+    """Strong ETag of a normalized request and the ``version`` of the engine
+    computing it, the planet engine's by default."""
+    if version is None:
+        version = get_engine().version
+    key = repr((RESPONSE_VERSION, ROUND_DECIMALS, version, parts))
+    return (
+        '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+    )
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+        # Responses are only served to API key holders, so shared caches
+        # must not hand them to other keys; their format follows Accept
+        "Vary": "API_KEY, Accept",
+    }
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether ``If-None-Match`` already holds ``etag``."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    *parts: Any,
+    version: str | None = None,
+):
+    """Set the cache headers for ``parts`` (see ``make_etag``) on
+    ``response``.
+
+    Returns a 304 response if the client already has it, in which case
+    the caller must not compute anything, or ``None`` otherwise.
+    """
+    etag = make_etag(*parts, version=version)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,283 @@
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from app.utils.metrics import observe
+
+########################################################
+#           Settings
+########################################################
+JOBS_DIR = os.getenv("JOBS_DIR", "data/jobs")
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", "0")) or os.cpu_count()
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "10000"))
+
+JOB_ID_LENGTH = 32
+# Bytes read at a time when streaming output files
+READ_SIZE = 1 << 20
+
+# Computes rows [start, stop) of a job: reads its input columns and writes
+# its output columns in place. Runs in a worker process.
+ChunkFunction = Callable[[str, dict[str, Any], int, int], None]
+
+
+########################################################
+#           Storage
+########################################################
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def open_column(directory: str | Path, name: str, mode: str = "r"):
+    """Memory-mapped ``.npy`` column of a job."""
+    return np.load(Path(directory) / f"{name}.npy", mmap_mode=mode)
+
+
+class JobStore:
+    """Jobs as directories of ``.npy`` columns plus a ``manifest.json``.
+
+    Output columns are preallocated and filled in place, chunk by chunk,
+    so finished rows are on disk as soon as their chunk completes. The
+    manifest is replaced atomically, so any worker process can read a
+    consistent status.
+    """
+
+    def __init__(self, directory: str | Path = JOBS_DIR):
+        self.directory = Path(directory)
+
+    def path(self, job_id: str) -> Path:
+        if len(job_id) != JOB_ID_LENGTH or not job_id.isalnum():
+            raise KeyError(job_id)
+        return self.directory / job_id
+
+    def create(
+        self,
+        kind: str,
+        inputs: dict[str, np.ndarray],
+        outputs: dict[str, tuple[tuple[int, ...], str]],
+        options: dict[str, Any],
+        chunk_rows: int = JOB_CHUNK_ROWS,
+    ) -> dict[str, Any]:
+        """Write the inputs and empty outputs of a new job."""
+        rows = len(next(iter(inputs.values())))
+        job_id = uuid.uuid4().hex
+        path = self.directory / job_id
+        path.mkdir(parents=True)
+        for name, values in inputs.items():
+            np.save(path / f"{name}.npy", values)
+        for name, (shape, dtype) in outputs.items():
+            column = np.lib.format.open_memmap(
+                path / f"{name}.npy", "w+", dtype, (rows, *shape)
+            )
+            column[:] = np.nan
+            column.flush()
+            del column
+        manifest = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "rows": rows,
+            "chunk_rows": chunk_rows,
+            "chunks": -(-rows // chunk_rows),
+            "chunks_done": [],
+            "rows_done": 0,
+            "inputs": list(inputs),
+            "outputs": list(outputs),
+            "options": options,
+            "error": None,
+            "created_at": now(),
+            "finished_at": None,
+        }
+        self.save(manifest)
+        return manifest
+
+    def load(self, job_id: str) -> dict[str, Any]:
+        try:
+            with open(self.path(job_id) / "manifest.json") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(job_id)
+
+    def save(self, manifest: dict[str, Any]) -> None:
+        path = self.path(manifest["id"])
+        temporary = path / "manifest.json.tmp"
+        temporary.write_text(json.dumps(manifest))
+        os.replace(temporary, path / "manifest.json")
+
+    def delete(self, job_id: str) -> None:
+        shutil.rmtree(self.path(job_id))
+
+    def job_ids(self) -> list[str]:
+        if not self.directory.is_dir():
+            return []
+        return [path.name for path in self.directory.iterdir()]
+
+
+class _Chunks:
+    """Write-only file collecting what ``zipfile`` writes to it."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_npz(directory: str | Path, names: list[str]) -> Iterator[bytes]:
+    """Stream columns of a job as an uncompressed ``.npz`` archive.
+
+    The archive is written to a non-seekable sink, so it is sent as it is
+    built, a chunk at a time, without a copy on disk or in memory.
+    """
+    sink = _Chunks()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for name in names:
+            with open(Path(directory) / f"{name}.npy", "rb") as column:
+                with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+                    while data := column.read(READ_SIZE):
+                        f.write(data)
+                        yield sink.pop()
+    yield sink.pop()
+
+
+########################################################
+#           Runner
+########################################################
+class JobRunner:
+    """Runs jobs chunk by chunk on a process pool, in the background.
+
+    A job is owned by the process holding the lock file in its directory,
+    so with several server workers each job runs exactly once, and jobs
+    left unfinished by a restart are picked up again by ``resume``.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        chunk_functions: dict[str, ChunkFunction],
+        processes: int = JOB_PROCESSES,
+    ):
+        self.store = store
+        self.chunk_functions = chunk_functions
+        self.processes = processes
+        self._pool: ProcessPoolExecutor | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processes)
+        return self._pool
+
+    def start(self, job_id: str) -> bool:
+        """Run ``job_id`` unless another process already owns it."""
+        lock = open(self.store.path(job_id) / "lock", "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        task = asyncio.create_task(self._run(job_id, lock))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def resume(self) -> list[str]:
+        """Start the queued or interrupted jobs no process owns."""
+        resumed = []
+        for job_id in self.store.job_ids():
+            try:
+                status = self.store.load(job_id)["status"]
+            except (KeyError, ValueError):
+                continue
+            if status in ("queued", "running") and self.start(job_id):
+                resumed.append(job_id)
+        return resumed
+
+    async def _run(self, job_id: str, lock) -> None:
+        manifest = self.store.load(job_id)
+        manifest["status"] = "running"
+        self.store.save(manifest)
+        function = self.chunk_functions[manifest["kind"]]
+        directory = str(self.store.path(job_id))
+        chunk_rows, rows = manifest["chunk_rows"], manifest["rows"]
+        done = set(manifest["chunks_done"])
+        # A few chunks per process in flight keeps the pool busy without
+        # queueing a whole job at once
+        slots = asyncio.Semaphore(2 * self.processes)
+        submitted: list[Future] = []
+
+        async def run_chunk(chunk: int) -> None:
+            async with slots:
+                start = time.perf_counter()
+                stop_row = min((chunk + 1) * chunk_rows, rows)
+                future = self._executor().submit(
+                    function,
+                    directory,
+                    manifest["options"],
+                    chunk * chunk_rows,
+                    stop_row,
+                )
+                submitted.append(future)
+                await asyncio.wrap_future(future)
+                # Jobs outlive the request that created them, so chunks are
+                # observed directly rather than as a stage of a request
+                observe("jobs", "job_chunk", time.perf_counter() - start)
+                manifest["chunks_done"].append(chunk)
+                manifest["rows_done"] += stop_row - chunk * chunk_rows
+                self.store.save(manifest)
+
+        tasks = [
+            asyncio.create_task(run_chunk(chunk))
+            for chunk in range(manifest["chunks"])
+            if chunk not in done
+        ]
+        try:
+            try:
+                await asyncio.gather(*tasks)
+            except Exception:
+                # Once a chunk failed, chunks not started yet are cancelled.
+                # Those already running in the pool cannot be, so the job
+                # is only saved and unlocked once they stop writing to it
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.to_thread(wait, submitted)
+                raise
+            manifest["status"] = "done"
+        except asyncio.CancelledError:
+            # Shutting down: left as "running" to be resumed
+            raise
+        except Exception as e:
+            manifest["status"] = "failed"
+            manifest["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if manifest["status"] != "running":
+                manifest["finished_at"] = now()
+                self.store.save(manifest)
+            lock.close()
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,277 @@
+import asyncio
+import functools
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable
+
+from dotenv import load_dotenv
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Imported by the auth middleware before it loads .env
+load_dotenv()
+
+########################################################
+#           Settings
+########################################################
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+########################################################
+#           Per-request timings
+########################################################
+class RequestTimings:
+    __slots__ = ("route", "stages", "called", "returned")
+
+    def __init__(self):
+        self.route = "unmatched"
+        self.stages: list[tuple[str, float]] = []
+        # perf_counter when the endpoint was called and when it returned
+        self.called: float | None = None
+        self.returned: float | None = None
+
+
+_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "timings", default=None
+)
+
+
+def record(stage: str, start: float) -> None:
+    """Record ``stage`` as lasting from ``start`` (``perf_counter``) to now.
+
+    A no-op outside an instrumented request, so call sites only pay for a
+    ``perf_counter`` call and a context variable lookup when disabled.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.stages.append((stage, time.perf_counter() - start))
+
+
+########################################################
+#           Histograms
+########################################################
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Observed from the event loop only, once a response is complete
+histograms: dict[tuple[str, str], Histogram] = {}
+
+
+def observe(route: str, stage: str, seconds: float) -> None:
+    histogram = histograms.get((route, stage))
+    if histogram is None:
+        histogram = histograms[route, stage] = Histogram()
+    histogram.observe(seconds)
+
+
+# Counters read when /metrics is scraped: (name, labels) -> current value
+counters: dict[tuple[str, str], Callable[[], float]] = {}
+counter_help: dict[str, tuple[str, str]] = {}
+
+
+def register_counter(
+    name: str,
+    help: str,
+    labels: str,
+    read: Callable[[], float],
+    kind: str = "counter",
+) -> None:
+    """Expose ``read()`` as ``name``; ``kind="gauge"`` for values that can
+    go down, such as sizes."""
+    counter_help[name] = help, kind
+    counters[name, labels] = read
+
+
+def render_counters() -> list[str]:
+    lines = []
+    for name, (help, kind) in sorted(counter_help.items()):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for (counter, labels), read in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"{name}{{{labels}}} {read()}")
+    return lines
+
+
+def render_prometheus() -> str:
+    name = "request_stage_duration_seconds"
+    lines = render_counters() + [
+        f"# HELP {name} Time spent in each stage of a request.",
+        f"# TYPE {name} histogram",
+    ]
+    for (route, stage), histogram in sorted(histograms.items()):
+        labels = f'route="{route}",stage="{stage}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(
+                f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+########################################################
+#           Instrumentation
+########################################################
+def server_timing(stages: list[tuple[str, float]]) -> bytes:
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in stages
+    ).encode()
+
+
+class TimingMiddleware:
+    """Outermost middleware collecting the stages of each HTTP request.
+
+    Stages recorded until the response starts are sent in a
+    ``Server-Timing`` header; all stages, and the total, are added to the
+    histograms once the response is complete.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = RequestTimings()
+        token = _timings.set(timings)
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stages = timings.stages + [
+                    ("total", time.perf_counter() - start)
+                ]
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"server-timing", server_timing(stages)),
+                    ],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _timings.reset(token)
+            for stage, seconds in timings.stages:
+                observe(timings.route, stage, seconds)
+            observe(timings.route, "total", time.perf_counter() - start)
+
+
+class TimedRoute(APIRoute):
+    """Route recording its validation, endpoint and serialization stages.
+
+    Validation is the time before the endpoint is called, serialization
+    the time between its return and the response being built. Without
+    ``METRICS_ENABLED`` routes are left unwrapped.
+    """
+
+    def get_route_handler(self) -> Callable:
+        if not METRICS_ENABLED:
+            return super().get_route_handler()
+
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def timed_call(*args, **kwargs):
+                timings = _timings.get()
+                if timings is None:
+                    return await call(*args, **kwargs)
+                timings.called = time.perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    timings.returned = time.perf_counter()
+
+        else:
+
+            @functools.wraps(call)
+            def timed_call(*args, **kwargs):
+                timings = _timings.get()
+                if timings is None:
+                    return call(*args, **kwargs)
+                timings.called = time.perf_counter()
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    timings.returned = time.perf_counter()
+
+        self.dependant.call = timed_call
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request):
+            timings = _timings.get()
+            if timings is None:
+                return await handler(request)
+            timings.route = path
+            index = len(timings.stages)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                called, returned = timings.called, timings.returned
+                if called is None:
+                    # Rejected by validation
+                    timings.stages.append(("validate", end - start))
+                else:
+                    timings.stages.insert(index, ("validate", called - start))
+                    timings.stages += [
+                        ("endpoint", (returned or end) - called),
+                        ("serialize", end - (returned or end)),
+                    ]
+
+        return timed_handler
+
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
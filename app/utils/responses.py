@@ -0,0 +1,43 @@
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+########################################################
+#           Settings
+########################################################
+# Set to false to send every response through FastAPI's response_model
+# validation and encoder (e.g. to check the fast path against it)
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "true").lower() == "true"
+
+# UTC datetimes end in "Z", as Pydantic writes them
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, response: Response | None = None) -> Any:
+    """``content`` encoded directly with orjson.
+
+    Returning a ``Response`` makes FastAPI skip ``response_model``
+    validation and ``jsonable_encoder``, while the route's
+    ``response_model`` still documents the schema in OpenAPI. The content
+    must therefore already match it, built from plain dicts, lists and
+    numbers. Headers set on the injected ``response`` are carried over.
+    """
+    if not FAST_RESPONSES:
+        return content
+    fast = FastJSONResponse(content)
+    if response is not None:
+        fast.headers.update(response.headers)
+    return fast
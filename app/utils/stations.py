@@ -0,0 +1,138 @@
+import math
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from app.utils.astro_calculations import ChebyshevEngine, Engine
+from app.utils.search import SAMPLING_DAYS, stations
+
+########################################################
+#           Settings
+########################################################
+STATIONS_DIR = os.getenv("STATIONS_DIR", "data/stations")
+
+########################################################
+#           Constants
+########################################################
+# Stations are computed and stored a Julian decade at a time, counted from
+# 2000-01-01 00:00 UT
+DECADE_DAYS = 3652.5
+DECADE_EPOCH = 2451544.5
+
+# The Sun and Moon never station
+STATION_BODIES = [
+    "Mercury",
+    "Venus",
+    "Mars",
+    "Jupiter",
+    "Saturn",
+    "Uranus",
+    "Neptune",
+    "Pluto",
+]
+
+
+def decade(jd: float) -> int:
+    return math.floor((jd - DECADE_EPOCH) / DECADE_DAYS)
+
+
+def compute_decade(
+    engine: Engine | ChebyshevEngine, name: str, index: int
+) -> np.ndarray:
+    """Stations of ``name`` in one decade as an (n, 3) array of Julian
+    day, 1.0 where the body turns retrograde (0.0 direct) and longitude.
+
+    Samples fall on a grid shared by all decades and reach two steps past
+    both ends, so a station near an edge is found, identically, by the
+    decade it belongs to whichever side it is queried from.
+    """
+    step = SAMPLING_DAYS[name]
+    start = DECADE_EPOCH + index * DECADE_DAYS
+    end = start + DECADE_DAYS
+    first = math.floor((start - DECADE_EPOCH) / step) - 2
+    last = math.ceil((end - DECADE_EPOCH) / step) + 2
+
+    def longitude(jd: float) -> float:
+        return engine.longitude(name, jd)
+
+    rows = [
+        (jd, float(retrograde), longitude(jd))
+        for jd, retrograde in stations(
+            longitude,
+            DECADE_EPOCH + first * step,
+            DECADE_EPOCH + last * step,
+            step,
+        )
+        if start <= jd < end
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+class StationTable:
+    """Stations memoized per engine, body and decade.
+
+    Each decade is kept in memory and in
+    ``{directory}/{engine version}/{body}/{decade}.npy``, so it is computed
+    once, by whichever process first needs it, and loaded from then on.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        # At most about 80 stations (2 KB) per body and decade
+        self._decades: dict[tuple[str, str, int], np.ndarray] = {}
+
+    def path(self, version: str, name: str, index: int) -> Path:
+        return self.directory / version / name / f"{index}.npy"
+
+    def decade(
+        self, engine: Engine | ChebyshevEngine, name: str, index: int
+    ) -> np.ndarray:
+        key = (engine.version, name, index)
+        table = self._decades.get(key)
+        if table is None:
+            path = self.path(*key)
+            try:
+                table = np.load(path)
+            except FileNotFoundError:
+                table = compute_decade(engine, name, index)
+                self.save(path, table)
+            self._decades[key] = table
+        return table
+
+    def save(self, path: Path, table: np.ndarray) -> None:
+        """Write atomically, as other processes may be reading the file."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=path.parent, suffix=".tmp", delete=False
+            ) as temporary:
+                np.save(temporary, table)
+            os.replace(temporary.name, path)
+        except OSError:
+            # A read-only directory only costs recomputing in new processes
+            pass
+
+    def stations(
+        self,
+        engine: Engine | ChebyshevEngine,
+        name: str,
+        start_jd: float,
+        end_jd: float,
+    ) -> np.ndarray:
+        """Rows of ``compute_decade`` in ``[start_jd, end_jd)``."""
+        table = np.concatenate(
+            [
+                self.decade(engine, name, index)
+                for index in range(decade(start_jd), decade(end_jd) + 1)
+            ]
+        )
+        return table[(table[:, 0] >= start_jd) & (table[:, 0] < end_jd)]
+
+
+@lru_cache(maxsize=None)
+def station_table(directory: str) -> StationTable:
+    """One table per directory and process."""
+    return StationTable(directory)
@@ -0,0 +1,61 @@
+"""Minimal in-process ASGI client used by the benchmarks.
+
+It drives an ASGI app directly, without sockets or an HTTP client, so
+measurements reflect the application and its middleware only.
+"""
+
+import asyncio
+from typing import Iterable
+
+from starlette.types import ASGIApp
+
+
+async def request(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    headers: Iterable[tuple[bytes, bytes]] = (),
+    body: bytes = b"",
+    query_string: bytes = b"",
+    client: tuple[str, int] = ("127.0.0.1", 50000),
+) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"content-length", str(len(body)).encode()), *headers],
+        "client": client,
+        "server": ("testserver", 80),
+    }
+    received = False
+    # The client stays connected until the whole response is sent: an early
+    # http.disconnect cancels streaming responses
+    complete = asyncio.Event()
+    status, response_headers, chunks = 0, [], []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await complete.wait()
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                complete.set()
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
@@ -0,0 +1,87 @@
+"""Per-request overhead of the API key middleware.
+
+Compares the pure ASGI ``APIKeyMiddleware`` with the previous
+``BaseHTTPMiddleware`` implementation on an endpoint that does no work:
+
+    python -m benchmarks.bench_auth
+"""
+
+import asyncio
+import os
+import time
+
+from fastapi import HTTPException
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Route
+
+from app.middleware import auth
+from benchmarks.asgi import request
+
+API_KEY = "benchmark-api-key"
+REQUESTS = 20000
+
+
+class BaseHTTPAPIKeyMiddleware(BaseHTTPMiddleware):
+    """The middleware as it was before the pure ASGI rewrite."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.valid_api_keys = [os.environ["API_KEY"]]
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in auth.PUBLIC_PATHS:
+            return await call_next(request)
+        client_ip = request.client.host if request.client else "unknown"
+        if auth.is_rate_limited(client_ip):
+            raise HTTPException(status_code=429)
+        api_key = request.headers.get("API_KEY")
+        if not api_key or api_key not in self.valid_api_keys:
+            auth.record_failed_attempt(client_ip)
+            return HTMLResponse(
+                content=auth.INVALID_API_TEMPLATE, status_code=403
+            )
+        return await call_next(request)
+
+
+async def endpoint(request):
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware=None):
+    app = Starlette(routes=[Route("/planets", endpoint)])
+    return middleware(app) if middleware else app
+
+
+async def measure(app, headers) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        status, _, _ = await request(app, "GET", "/planets", headers)
+        assert status == 200, status
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main():
+    os.environ["API_KEY"] = API_KEY
+    auth.rate_limit_store.max_requests = REQUESTS * 10
+    headers = [(b"api_key", API_KEY.encode())]
+
+    baseline = await measure(build_app(), headers)
+    results = {
+        "BaseHTTPMiddleware": await measure(
+            build_app(BaseHTTPAPIKeyMiddleware), headers
+        ),
+        "pure ASGI": await measure(build_app(auth.APIKeyMiddleware), headers),
+    }
+    print(f"{'no middleware':<20} {baseline:8.1f} us/request")
+    for name, elapsed in results.items():
+        print(
+            f"{name:<20} {elapsed:8.1f} us/request "
+            f"(+{elapsed - baseline:.1f} us overhead)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Latency, throughput and agreement of the ephemeris engines.
+
+    python -m benchmarks.bench_engines [--tables data/ephemeris.bin]
+
+Reports the cost of one ``longitude`` call and of one ``longitudes`` call
+(all bodies), the number of dates per second over a batch, and the
+maximum longitude difference between ``ephem`` and ``swisseph`` per body.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.astro_calculations import (
+    PLANETS,
+    ChebyshevEngine,
+    EphemEngine,
+    SwissEphemerisEngine,
+)
+from app.utils.chebyshev import ChebyshevTables
+
+CALLS = 5000
+BATCH = 20000
+SAMPLES = 2000
+START_JD = 2378496.5  # 1800-01-01
+END_JD = 2524593.5  # 2200-01-01
+
+
+def per_call(func, jds: np.ndarray) -> float:
+    jds = jds[:CALLS].tolist()
+    start = time.perf_counter()
+    for jd in jds:
+        func(jd)
+    return (time.perf_counter() - start) / len(jds) * 1e6
+
+
+def throughput(engine, jds: np.ndarray) -> float:
+    start = time.perf_counter()
+    for jd in jds.tolist():
+        engine.longitudes(jd)
+    return len(jds) / (time.perf_counter() - start)
+
+
+def max_differences(a, b, jds: np.ndarray) -> dict[str, float]:
+    differences = dict.fromkeys(PLANETS, 0.0)
+    for jd in jds.tolist():
+        for name, x, y in zip(PLANETS, a.longitudes(jd), b.longitudes(jd)):
+            difference = abs((x - y + 180) % 360 - 180)
+            differences[name] = max(differences[name], difference)
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", help="Chebyshev tables to include")
+    args = parser.parse_args()
+
+    jds = np.random.default_rng(0).uniform(START_JD, END_JD, BATCH)
+    engines = [EphemEngine(), SwissEphemerisEngine()]
+    if args.tables:
+        tables = ChebyshevTables(args.tables)
+        # The fallback must be the engine the tables were sampled from
+        fallbacks = {engine.version: engine for engine in engines}
+        if tables.engine_version not in fallbacks:
+            raise SystemExit(f"no engine {tables.engine_version} to compare")
+        engines.append(
+            ChebyshevEngine(tables, fallbacks[tables.engine_version])
+        )
+        # Keep to the span of the tables, not their fallback
+        jds = jds[np.array([tables.covers(jd) for jd in jds.tolist()])]
+
+    print(f"{'engine':<10} {'longitude':>12} {'longitudes':>12} {'batch':>14}")
+    for engine in engines:
+        single = per_call(lambda jd: engine.longitude("Moon", jd), jds)
+        every = per_call(engine.longitudes, jds)
+        print(
+            f"{engine.name:<10} {single:9.1f} us {every:9.1f} us "
+            f"{throughput(engine, jds):8.0f} dates/s"
+        )
+
+    print("\nmax |ephem - swisseph| (deg)")
+    differences = max_differences(engines[0], engines[1], jds[:SAMPLES])
+    for name, difference in differences.items():
+        print(f"{name:<10} {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""In-process load test of the API at several concurrency levels.
+
+    python -m benchmarks.bench_load [--requests 2000] [--concurrency 1 8 32]
+
+Each level runs that many concurrent clients against the ASGI app (with
+its middleware, without a network) and reports throughput and latency
+percentiles per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+API_KEY = "benchmark-api-key"
+os.environ["API_KEY"] = API_KEY
+
+from app.main import app  # noqa: E402
+from app.middleware import auth  # noqa: E402
+from app.routers.planets import positions_cache  # noqa: E402
+from app.utils.astro_calculations import get_engine  # noqa: E402
+from benchmarks.asgi import request  # noqa: E402
+
+HEADERS = [
+    (b"api_key", API_KEY.encode()),
+    (b"content-type", b"application/json"),
+]
+START = datetime(2024, 1, 1)
+
+
+def planets_cached(i: int) -> tuple:
+    body = {"date_time": START.isoformat()}
+    return "POST", "/planets", json.dumps(body).encode(), b""
+
+
+def planets_uncached(i: int) -> tuple:
+    body = {"date_time": (START + timedelta(minutes=i)).isoformat()}
+    return "POST", "/planets", json.dumps(body).encode(), b""
+
+
+def ascendant(i: int) -> tuple:
+    body = {
+        "date_time": (START + timedelta(minutes=i)).isoformat(),
+        "latitude": 40.7128,
+        "longitude": -74.0060,
+        "tz_offset": "-04:00",
+    }
+    return "POST", "/ascendant", json.dumps(body).encode(), b""
+
+
+def ephemeris(i: int) -> tuple:
+    query = b"start=2024-01-01T00:00:00&end=2024-01-31T00:00:00&step=1d"
+    return "GET", "/ephemeris", b"", query
+
+
+SCENARIOS = {
+    "planets (cached)": planets_cached,
+    "planets (uncached)": planets_uncached,
+    "ascendant": ascendant,
+    "ephemeris (31 rows)": ephemeris,
+}
+
+
+async def load(scenario, requests: int, concurrency: int) -> dict:
+    latencies = np.empty(requests)
+    statuses = Counter()
+    counter = iter(range(requests))
+
+    async def client():
+        for i in counter:
+            method, path, body, query = scenario(i)
+            start = time.perf_counter()
+            status, _, content = await request(
+                app, method, path, HEADERS, body, query
+            )
+            latencies[i] = time.perf_counter() - start
+            assert content, f"{path} answered {status} with an empty body"
+            statuses[status] += 1
+
+    positions_cache.clear()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests_per_second": requests / elapsed,
+        # CPU time of all threads of the process (event loop and pools)
+        "cpu_us_per_request": cpu / requests * 1e6,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "statuses": {str(status): n for status, n in statuses.items()},
+    }
+
+
+async def run(requests: int, levels: list[int]) -> dict[str, dict]:
+    get_engine()
+    auth.rate_limit_store.clear()
+    auth.rate_limit_store.max_requests = 10**9
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        for concurrency in levels:
+            results[f"{name} c={concurrency}"] = await load(
+                scenario, requests, concurrency
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32]
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.concurrency))
+    print_results(results)
+
+
+def print_results(results: dict[str, dict]) -> None:
+    print(
+        f"{'scenario':<30} {'req/s':>9} {'cpu us':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8}  statuses"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<30} {result['requests_per_second']:9.0f} "
+            f"{result['cpu_us_per_request']:8.0f} {result['p50_ms']:8.2f} "
+            f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f}  "
+            f"{result['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Micro-benchmarks of the per-request hot paths.
+
+    python -m benchmarks.bench_micro
+"""
+
+import timeit
+from typing import Callable
+
+import swisseph as swe
+
+from app.routers.planets import compute_longitudes, planet_positions
+from app.utils.astro_calculations import (
+    get_engine,
+    get_zodiac_sign,
+    parse_tz_offset,
+)
+
+REPEATS = 5
+JD = 2460390.0  # 2024-03-20
+
+
+def measure(func: Callable[[], object], number: int) -> float:
+    """Best of ``REPEATS`` runs, in microseconds per call."""
+    best = min(timeit.repeat(func, repeat=REPEATS, number=number))
+    return best / number * 1e6
+
+
+def run() -> dict[str, float]:
+    engine = get_engine()
+    cases = {
+        "get_zodiac_sign": (lambda: get_zodiac_sign(123.456), 200000),
+        "parse_tz_offset (cached)": (
+            lambda: parse_tz_offset("-03:00"),
+            200000,
+        ),
+        "parse_tz_offset (uncached)": (
+            lambda: parse_tz_offset.__wrapped__("-03:00"),
+            50000,
+        ),
+        f"{engine.name}.longitudes": (lambda: engine.longitudes(JD), 2000),
+        "planets loop": (
+            lambda: planet_positions(compute_longitudes(JD)),
+            2000,
+        ),
+        "swe.houses": (lambda: swe.houses(JD, 40.7, -74.0, b"A"), 20000),
+    }
+    return {
+        name: measure(func, number) for name, (func, number) in cases.items()
+    }
+
+
+def main():
+    for name, elapsed in run().items():
+        print(f"{name:<28} {elapsed:10.3f} us/call")
+
+
+if __name__ == "__main__":
+    main()
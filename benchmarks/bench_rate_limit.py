@@ -0,0 +1,45 @@
+"""Per-request cost of each rate limit backend.
+
+    python -m benchmarks.bench_rate_limit [--redis-url redis://host:6379/0]
+"""
+
+import argparse
+import tempfile
+import time
+
+from app.middleware.rate_limit import create_backend
+
+CALLS = 20000
+LIMITS = {
+    "window": 3600,
+    "max_requests": CALLS * 10,
+    "max_failures": 5,
+    "block_duration": 300,
+    "max_clients": 100000,
+}
+
+
+def measure(backend) -> float:
+    start = time.perf_counter()
+    for i in range(CALLS):
+        backend.is_rate_limited(f"10.0.{i % 64}.{i % 251}")
+    return (time.perf_counter() - start) / CALLS * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = ["memory", f"sqlite:///{directory}/rate_limit.db"]
+        if args.redis_url:
+            urls.append(args.redis_url)
+        for url in urls:
+            backend = create_backend(url, **LIMITS)
+            print(f"{url.split(':')[0]:<8} {measure(backend):8.1f} us/call")
+            backend.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare two benchmark result files saved by ``benchmarks.run``.
+
+    python -m benchmarks.compare old.json new.json [--threshold 10]
+
+Changes larger than ``--threshold`` percent are flagged; the exit status
+is 1 if any of them is a regression.
+"""
+
+import argparse
+import json
+
+# Metrics where a larger value is better
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def rows(old: dict, new: dict):
+    for name, value in new["micro_us"].items():
+        if name in old["micro_us"]:
+            yield name, "us/call", old["micro_us"][name], value
+    for name, result in new["load"].items():
+        if name not in old["load"]:
+            continue
+        for metric in (
+            "requests_per_second",
+            "cpu_us_per_request",
+            "p50_ms",
+            "p99_ms",
+        ):
+            if metric in old["load"][name]:
+                yield name, metric, old["load"][name][metric], result[metric]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    regressions = 0
+    for name, metric, before, after in rows(old, new):
+        percent = change(before, after)
+        worse = percent < 0 if metric in HIGHER_IS_BETTER else percent > 0
+        flag = ""
+        if abs(percent) > args.threshold:
+            flag = "REGRESSION" if worse else "improvement"
+            regressions += worse
+        print(
+            f"{name:<30} {metric:<20} {before:10.3f} -> {after:10.3f} "
+            f"{percent:+7.1f}%  {flag}"
+        )
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
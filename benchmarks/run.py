@@ -0,0 +1,67 @@
+"""Run the micro and load benchmarks and save the results as JSON.
+
+    python -m benchmarks.run [--output benchmarks/results/<commit>.json]
+
+Compare two runs with ``python -m benchmarks.compare old.json new.json``.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import bench_load, bench_micro
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32]
+    )
+    args = parser.parse_args()
+
+    commit = git_commit()
+    micro = bench_micro.run()
+    for name, elapsed in micro.items():
+        print(f"{name:<28} {elapsed:10.3f} us/call")
+    print()
+    load = asyncio.run(bench_load.run(args.requests, args.concurrency))
+    bench_load.print_results(load)
+
+    output = Path(args.output or f"benchmarks/results/{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "micro_us": micro,
+                "load": load,
+            },
+            indent=2,
+        )
+    )
+    print(f"\nsaved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Precompute the decades of stations served by ``/events/stations``.
+
+Usage (from the repository root, with the service's engine settings):
+
+    python -m scripts.build_stations --start 1900-01-01 --end 2100-01-01
+
+Decades not built here are computed on first use and stored as well.
+"""
+
+import argparse
+from datetime import datetime
+
+from app.utils.astro_calculations import get_engine, julian_day
+from app.utils.stations import (
+    STATION_BODIES,
+    STATIONS_DIR,
+    StationTable,
+    decade,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", default="1900-01-01")
+    parser.add_argument("--end", default="2100-01-01")
+    parser.add_argument("--output", default=STATIONS_DIR)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    table = StationTable(args.output)
+    first = decade(julian_day(datetime.fromisoformat(args.start)))
+    last = decade(julian_day(datetime.fromisoformat(args.end)))
+    for name in STATION_BODIES:
+        count = sum(
+            len(table.decade(engine, name, index))
+            for index in range(first, last + 1)
+        )
+        print(f"{name:<8} {count} stations")
+    print(f"stored in {table.directory / engine.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Precompute Chebyshev ephemeris tables for the ``chebyshev`` engine.
+
+Usage (from the repository root):
+
+    python -m scripts.build_tables --start 1800-01-01 --end 2200-01-01 \
+        --output data/ephemeris.bin
+
+then point ``EPHEMERIS_TABLES`` at the output file.
+"""
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from app.utils.astro_calculations import (
+    EPHEM_J2000_QUIRK,
+    EPHEMERIS_ENGINE,
+    PLANETS,
+    Engine,
+    create_engine,
+    julian_day,
+)
+from app.utils.chebyshev import build_tables
+
+
+def sample(engine: Engine):
+    def longitudes(name: str, jds: np.ndarray) -> np.ndarray:
+        return np.array([engine.longitude(name, jd) for jd in jds.tolist()])
+
+    return longitudes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", default="1800-01-01")
+    parser.add_argument("--end", default="2200-01-01")
+    parser.add_argument("--output", default="data/ephemeris.bin")
+    parser.add_argument(
+        "--engine",
+        choices=["ephem", "swisseph"],
+        default=EPHEMERIS_ENGINE,
+        help="engine to fit (use the one the service falls back to)",
+    )
+    args = parser.parse_args()
+
+    start_jd = julian_day(datetime.fromisoformat(args.start))
+    end_jd = julian_day(datetime.fromisoformat(args.end))
+    # The chebyshev engine falls back to ephem around J2000 (see
+    # EPHEM_J2000_QUIRK), so the bound is only checked outside that span
+    validation_jds = np.random.default_rng(0).uniform(start_jd, end_jd, 2000)
+    validation_jds = validation_jds[
+        (validation_jds < EPHEM_J2000_QUIRK[0])
+        | (validation_jds > EPHEM_J2000_QUIRK[1])
+    ]
+
+    engine = create_engine(args.engine)
+    try:
+        errors = build_tables(
+            sample(engine),
+            list(PLANETS),
+            start_jd,
+            end_jd,
+            args.output,
+            validation_jds,
+            engine.version,
+        )
+    except ValueError as e:
+        raise SystemExit(f"{e}; {args.output} left unchanged")
+    for name, error in errors.items():
+        print(f"{name:<8} max error {error:.2e} deg")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
+import io
+import json
 import os
+from datetime import datetime, timedelta
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.utils.astro_calculations import SIGNS
+from app.utils.executor import compute_executor
 
 # Test data
 TEST_API_KEY = "test_api_key"
@@ -116,3 +122,224 @@ def test_get_ascendant_missing_required_fields(client):
         headers={"API_KEY": TEST_API_KEY},
     )
     assert response.status_code == 422
+
+
+def test_get_ascendant_batch(client):
+    """Test batch ascendants match the single-record endpoint"""
+    records = [
+        {
+            "date_time": "2024-03-20T12:00:00",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            "tz_offset": "-04:00",
+        },
+        {
+            "date_time": "2024-03-20T12:00:00+02:00",
+            "latitude": -45.3284,
+            "longitude": -29.2733,
+            "tz_offset": "+00:00",
+        },
+        {
+            "date_time": "1993-01-18T15:30:00",
+            "latitude": 51.5074,
+            "longitude": -0.1278,
+        },
+        {
+            "date_time": "2024-03-01T12:00:00.900",
+            "latitude": 40,
+            "longitude": -74,
+            "tz_offset": "-05:00",
+        },
+    ]
+
+    # Several chunks, the last one partial
+    with patch("app.routers.ascendant.BATCH_CHUNK_ROWS", 3):
+        response = client.post(
+            "/ascendant/batch",
+            json={"records": records},
+            headers={"API_KEY": TEST_API_KEY},
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == len(records)
+
+    for record, line in zip(records, lines):
+        single = client.post(
+            "/ascendant", json=record, headers={"API_KEY": TEST_API_KEY}
+        ).json()
+        assert "debug" not in line
+        assert line["sign"] == single["sign"]
+        assert line["degrees"] == single["degrees"]
+
+
+def test_get_ascendant_batch_debug(client):
+    """Test batch ascendants include debug information only when asked"""
+    records = [
+        {
+            "date_time": "2024-03-20T12:00:00",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            "tz_offset": "-04:00",
+        }
+    ]
+
+    response = client.post(
+        "/ascendant/batch",
+        json={"records": records, "debug": True},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    line = json.loads(response.text)
+    assert line["debug"]["datetime_utc"] == "2024-03-20 16:00:00"
+
+
+def test_get_ascendant_batch_invalid_timezone(client):
+    """Test batch ascendants reject malformed timezone offsets"""
+    records = [
+        {
+            "date_time": "2024-03-20T12:00:00",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            "tz_offset": "EDT",
+        }
+    ]
+
+    response = client.post(
+        "/ascendant/batch",
+        json={"records": records},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
+
+
+def test_get_ascendant_schedule(client):
+    """Test rising-sign changes agree with the ascendant endpoint"""
+    response = client.get(
+        "/ascendant/schedule",
+        params={
+            "date": "2024-03-20",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            "tz_offset": "-04:00",
+            "days": 2,
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert len(events) == 24
+    assert events[0]["date_time"].startswith("2024-03-20T")
+    assert events[-1]["date_time"].startswith("2024-03-21T")
+
+    for event in events[:12]:
+        date_time = datetime.fromisoformat(event["date_time"])
+        signs = []
+        for minutes in (-1, 1):
+            response = client.post(
+                "/ascendant",
+                json={
+                    "date_time": (
+                        date_time.replace(tzinfo=None)
+                        + timedelta(minutes=minutes)
+                    ).isoformat(),
+                    "latitude": 40.7128,
+                    "longitude": -74.0060,
+                    "tz_offset": "-04:00",
+                },
+                headers={"API_KEY": TEST_API_KEY},
+            )
+            signs.append(response.json()["sign"])
+        assert signs == [event["previous_sign"], event["sign"]]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"latitude": 70}, {"tz_offset": "invalid"}, {"days": 0}],
+)
+def test_get_ascendant_schedule_invalid(client, params):
+    """Test polar latitudes, invalid timezones and day counts"""
+    response = client.get(
+        "/ascendant/schedule",
+        params={
+            "date": "2024-03-20",
+            "latitude": 40.7128,
+            "longitude": -74.0060,
+            **params,
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
+
+
+def test_get_ascendant_schedule_busy(client):
+    """Test schedules are admitted through the compute executor"""
+    with patch.object(compute_executor, "queue_size", 0):
+        response = client.get(
+            "/ascendant/schedule",
+            params={"date": "2024-03-20", "latitude": 40, "longitude": -74},
+            headers={"API_KEY": TEST_API_KEY},
+        )
+    assert response.status_code == 503
+
+
+def test_get_ascendant_grid(client):
+    """Test the sign grid agrees with the ascendant endpoint"""
+    response = client.get(
+        "/ascendant/grid",
+        params={
+            "date_time": "2024-03-20T12:00:00",
+            "tz_offset": "-04:00",
+            "resolution": 10,
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    signs = np.load(io.BytesIO(response.content))
+    assert signs.shape == (18, 36)
+    assert signs.dtype == np.uint8
+
+    for row, column in [(0, 0), (5, 10), (9, 18), (13, 30)]:
+        response = client.post(
+            "/ascendant",
+            json={
+                "date_time": "2024-03-20T12:00:00",
+                "latitude": 90 - 10 * row - 5,
+                "longitude": -180 + 10 * column + 5,
+                "tz_offset": "-04:00",
+            },
+            headers={"API_KEY": TEST_API_KEY},
+        )
+        assert SIGNS[signs[row, column]] == response.json()["sign"]
+
+
+def test_get_ascendant_grid_png(client):
+    """Test the sign grid as a PNG"""
+    response = client.get(
+        "/ascendant/grid",
+        params={"date_time": "2024-03-20T12:00:00", "format": "png"},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"resolution": 0.1},
+        {"values": "longitude", "format": "png"},
+        {"north": -10, "south": 10},
+        {"tz_offset": "invalid"},
+    ],
+)
+def test_get_ascendant_grid_invalid(client, params):
+    """Test oversized and empty grids and unsupported combinations"""
+    response = client.get(
+        "/ascendant/grid",
+        params={"date_time": "2024-03-20T12:00:00", **params},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
@@ -6,12 +6,12 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from app.middleware.auth import (
+    INVALID_API_TEMPLATE,
     PUBLIC_PATHS,
     APIKeyMiddleware,
-    failed_attempts,
     is_rate_limited,
+    rate_limit_store,
     record_failed_attempt,
-    request_counts,
 )
 
 # Test data
@@ -23,8 +23,7 @@ TEST_IP = "127.0.0.1"
 @pytest.fixture(autouse=True)
 def reset_state():
     """Reset rate limiting and failed attempts state before each test"""
-    request_counts.clear()
-    failed_attempts.clear()
+    rate_limit_store.clear()
     yield
 
 
@@ -115,11 +114,38 @@ def test_api_key_middleware_initialization():
     # Test with single API key
     with patch.dict(os.environ, {"API_KEY": VALID_API_KEY}):
         middleware = APIKeyMiddleware(None)
-        assert VALID_API_KEY in middleware.valid_api_keys
+        assert middleware.is_valid_api_key(VALID_API_KEY)
 
     # Test with multiple API keys
     multiple_keys = f"{VALID_API_KEY},another-key,third-key"
     with patch.dict(os.environ, {"API_KEYS": multiple_keys}):
         middleware = APIKeyMiddleware(None)
         assert len(middleware.valid_api_keys) == 3
-        assert VALID_API_KEY in middleware.valid_api_keys
+        assert middleware.is_valid_api_key(VALID_API_KEY)
+        assert middleware.is_valid_api_key(b"third-key")
+        assert not middleware.is_valid_api_key(INVALID_API_KEY)
+        assert not middleware.is_valid_api_key(None)
+
+    # Only digests of the keys are kept
+    assert VALID_API_KEY.encode() not in middleware.valid_api_keys
+
+
+def test_rate_limited_response(client, mock_env_vars):
+    """Test rate limited clients get a 429 before the API key check"""
+    for _ in range(5):
+        response = client.get("/planets", headers={"API_KEY": INVALID_API_KEY})
+        assert response.status_code == 403
+
+    response = client.get("/planets", headers={"API_KEY": VALID_API_KEY})
+    assert response.status_code == 429
+    assert response.json() == {
+        "detail": "Too many requests. Please try again later."
+    }
+
+
+def test_invalid_api_key_response(client, mock_env_vars):
+    """Test invalid API keys get the invalid API key page"""
+    response = client.get("/planets", headers={"API_KEY": INVALID_API_KEY})
+    assert response.status_code == 403
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.text == INVALID_API_TEMPLATE
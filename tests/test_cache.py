@@ -0,0 +1,103 @@
+import asyncio
+from unittest.mock import patch
+
+from app.utils.cache import SingleFlight, TTLCache
+
+
+def test_cache_hits_and_misses():
+    """Test cache hit and miss counters"""
+    cache = TTLCache(max_bytes=1000, ttl=60, sizeof=lambda value: 10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the memory cap evicts least recently used entries"""
+    cache = TTLCache(max_bytes=30, ttl=60, sizeof=len)
+    for key in ["a" * 10, "b" * 10, "c" * 10]:
+        cache.set(key, key)
+    cache.get("a" * 10)
+    cache.set("d", "d" * 10)
+
+    assert len(cache) == 3
+    assert cache.bytes == 30
+    assert cache.evictions == 1
+    assert cache.get("b" * 10) is None
+    assert cache.get("a" * 10) == "a" * 10
+
+    # Values larger than the whole cache are never stored
+    cache.set("e", "e" * 100)
+    assert cache.get("e") is None
+
+
+def test_cache_expires_entries():
+    """Test entries expire after the ttl"""
+    cache = TTLCache(max_bytes=1000, ttl=60, sizeof=lambda value: 10)
+    with patch("app.utils.cache.time.monotonic", return_value=0):
+        cache.set("a", 1)
+    with patch("app.utils.cache.time.monotonic", return_value=61):
+        assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.bytes == 0
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """Test concurrent calls with one key share a single computation"""
+    flights = SingleFlight()
+    started = []
+
+    async def compute(key):
+        started.append(key)
+        await asyncio.sleep(0.01)
+        return key * 2
+
+    async def run():
+        return await asyncio.gather(
+            *(flights.run(key, lambda key=key: compute(key)) for key in "aaab")
+        )
+
+    assert asyncio.run(run()) == ["aa", "aa", "aa", "bb"]
+    assert sorted(started) == ["a", "b"]
+    assert flights.stats() == {"in_flight": 0, "calls": 2, "coalesced": 2}
+
+
+def test_single_flight_shares_errors():
+    """Test every waiting caller gets the computation's error"""
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flights.run("key", fail),
+            flights.run("key", fail),
+            return_exceptions=True,
+        )
+
+    errors = asyncio.run(run())
+    assert [type(error) for error in errors] == [ValueError, ValueError]
+    assert flights.calls == 1
+    assert len(flights) == 0
+
+
+def test_single_flight_survives_cancelled_caller():
+    """Test a caller going away does not cancel the shared computation"""
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flights.run("key", compute))
+        second = asyncio.create_task(flights.run("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
@@ -0,0 +1,94 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.chart import ANGLES
+
+# Test data
+TEST_API_KEY = "test_api_key"
+TEST_RECORD = {
+    "date_time": "1993-01-18T15:30:00",
+    "latitude": -23.5505,
+    "longitude": -46.6333,
+    "tz_offset": "-03:00",
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_get_chart(client):
+    """Test a full chart agrees with the planets and ascendant endpoints"""
+    response = client.post(
+        "/chart", json=TEST_RECORD, headers={"API_KEY": TEST_API_KEY}
+    )
+    assert response.status_code == 200
+    chart = response.json()
+    assert chart["date_time_utc"] == "1993-01-18T18:30:00"
+    assert chart["house_system"] == "placidus"
+    assert len(chart["houses"]) == 12
+    assert set(chart["angles"]) == set(ANGLES)
+    assert chart["houses"][0] == chart["angles"]["ascendant"]
+
+    planets = client.post(
+        "/planets",
+        json={"date_time": "1993-01-18T18:30:00"},
+        headers={"API_KEY": TEST_API_KEY},
+    ).json()
+    assert chart["planets"] == planets
+
+    ascendant = client.post(
+        "/ascendant", json=TEST_RECORD, headers={"API_KEY": TEST_API_KEY}
+    ).json()
+    assert chart["angles"]["ascendant"]["sign"] == ascendant["sign"]
+    assert chart["angles"]["ascendant"]["degrees"] == ascendant["degrees"]
+
+
+def test_get_chart_fields(client):
+    """Test only the selected fields and bodies are returned"""
+    response = client.post(
+        "/chart",
+        json={
+            **TEST_RECORD,
+            "house_system": "whole_sign",
+            "fields": ["planets", "houses"],
+            "bodies": ["Sun", "Moon"],
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    chart = response.json()
+    assert "angles" not in chart
+    assert list(chart["planets"]) == ["Sun", "Moon"]
+    assert all(house["degrees"] == 0 for house in chart["houses"])
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"latitude": 70},
+        {"bodies": ["Chiron"]},
+        {"fields": []},
+        {"house_system": "unknown"},
+        {"tz_offset": "invalid"},
+    ],
+)
+def test_get_chart_invalid(client, changes):
+    """Test invalid bodies, fields and polar latitudes for Placidus"""
+    response = client.post(
+        "/chart",
+        json={**TEST_RECORD, **changes},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from app.utils.astro_calculations import (
+    PLANETS,
+    ChebyshevEngine,
+    EphemEngine,
+    SwissEphemerisEngine,
+)
+from app.utils.chebyshev import (
+    MAX_ERROR_DEGREES,
+    ChebyshevTables,
+    build_tables,
+)
+
+# Test data
+START_JD = 2460310.5  # 2024-01-01
+END_JD = 2460401.5  # 2024-04-01
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return EphemEngine()
+
+
+@pytest.fixture(scope="module")
+def tables_path(engine, tmp_path_factory):
+    def sample(name, jds):
+        return np.array([engine.longitude(name, jd) for jd in jds.tolist()])
+
+    path = tmp_path_factory.mktemp("tables") / "ephemeris.bin"
+    validation_jds = np.linspace(START_JD, END_JD, 50, endpoint=False)
+    errors = build_tables(
+        sample,
+        list(PLANETS),
+        START_JD,
+        END_JD,
+        path,
+        validation_jds,
+        engine.version,
+    )
+    assert max(errors.values()) < MAX_ERROR_DEGREES
+    return path
+
+
+def test_tables_match_ephem(engine, tables_path):
+    """Test interpolated longitudes stay within the documented error bound"""
+    tables = ChebyshevTables(tables_path)
+    assert set(tables.max_error) == set(PLANETS)
+
+    for jd in np.random.default_rng(1).uniform(START_JD, END_JD, 20):
+        for name in PLANETS:
+            error = tables.longitude(name, jd) - engine.longitude(name, jd)
+            assert abs((error + 180) % 360 - 180) < MAX_ERROR_DEGREES
+
+
+def test_tables_over_error_bound_not_written(engine, tables_path):
+    """Test a build exceeding the error bound keeps the existing tables"""
+
+    def sample(name, jds):
+        return np.array([engine.longitude(name, jd) for jd in jds.tolist()])
+
+    before = tables_path.read_bytes()
+    validation_jds = np.linspace(START_JD, END_JD, 10, endpoint=False)
+    with pytest.raises(ValueError, match="error bound"):
+        build_tables(
+            sample,
+            ["Sun"],
+            START_JD,
+            END_JD,
+            tables_path,
+            validation_jds,
+            engine.version,
+            max_error=0.0,
+        )
+    assert tables_path.read_bytes() == before
+    assert list(tables_path.parent.iterdir()) == [tables_path]
+
+
+def test_chebyshev_engine_fallback(engine, tables_path):
+    """Test the chebyshev engine falls back to ephem outside its tables"""
+    chebyshev = ChebyshevEngine(ChebyshevTables(tables_path), engine)
+
+    inside = START_JD + 10.25
+    assert chebyshev.covers(inside)
+    assert chebyshev.longitudes(inside) == pytest.approx(
+        engine.longitudes(inside), abs=MAX_ERROR_DEGREES
+    )
+
+    outside = END_JD + 10.25
+    assert not chebyshev.covers(outside)
+    assert chebyshev.longitudes(outside) == engine.longitudes(outside)
+
+
+def test_chebyshev_engine_other_fallback(tables_path):
+    """Test tables are refused as a fallback engine's they were not built
+    from"""
+    tables = ChebyshevTables(tables_path)
+    assert tables.engine_version == EphemEngine.version
+    with pytest.raises(ValueError, match="sampled from ephem"):
+        ChebyshevEngine(tables, SwissEphemerisEngine())
+
+
+def test_tables_invalid_file(tmp_path):
+    """Test loading a file that is not a table file"""
+    path = tmp_path / "invalid.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ChebyshevTables(path)
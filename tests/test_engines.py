@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.utils.astro_calculations import (
+    PLANETS,
+    EphemEngine,
+    SwissEphemerisEngine,
+    create_engine,
+)
+
+# Test data
+JDS = np.linspace(2433282.5, 2469807.5, 200).tolist()  # 1950-2050
+
+
+def test_swisseph_engine_agrees_with_ephem():
+    """Test both theories give the same J2000 longitudes within 0.02 deg"""
+    ephem_engine, swe_engine = EphemEngine(), SwissEphemerisEngine()
+    for jd in JDS:
+        for name, a, b in zip(
+            PLANETS, ephem_engine.longitudes(jd), swe_engine.longitudes(jd)
+        ):
+            assert abs((a - b + 180) % 360 - 180) < 0.02, name
+
+
+def test_speeds_agree():
+    """Test finite-difference and analytic speeds within 0.005 deg/day"""
+    ephem_engine, swe_engine = EphemEngine(), SwissEphemerisEngine()
+    for jd in JDS:
+        for name, a, b in zip(
+            PLANETS, ephem_engine.speeds(jd), swe_engine.speeds(jd)
+        ):
+            assert a == pytest.approx(b, abs=0.005), name
+
+
+def test_swisseph_engine_longitude():
+    """Test single-body lookups match the all-bodies pass"""
+    engine = SwissEphemerisEngine()
+    longitudes = engine.longitudes(JDS[0])
+    for name, longitude in zip(PLANETS, longitudes):
+        assert engine.longitude(name, JDS[0]) == longitude
+        assert 0 <= longitude < 360
+
+
+def test_create_engine():
+    """Test engines are selected by name"""
+    assert create_engine("ephem").name == "ephem"
+    assert create_engine("swisseph").name == "swisseph"
+    with pytest.raises(ValueError):
+        create_engine("unknown")
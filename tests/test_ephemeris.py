@@ -0,0 +1,118 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.executor import compute_executor
+
+# Test data
+TEST_API_KEY = "test_api_key"
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_get_ephemeris_ndjson(client):
+    """Test ephemeris rows match the planets endpoint"""
+    response = client.get(
+        "/ephemeris",
+        params={
+            "start": "2024-03-20T00:00:00",
+            "end": "2024-03-21T00:00:00",
+            "step": "6h",
+            "bodies": "Sun,Moon",
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["date_time"] for row in rows] == [
+        "2024-03-20T00:00:00",
+        "2024-03-20T06:00:00",
+        "2024-03-20T12:00:00",
+        "2024-03-20T18:00:00",
+        "2024-03-21T00:00:00",
+    ]
+    assert set(rows[0]) == {"date_time", "Sun", "Moon"}
+
+    planets = client.post(
+        "/planets",
+        json={"date_time": "2024-03-20T12:00:00"},
+        headers={"API_KEY": TEST_API_KEY},
+    ).json()
+    assert rows[2]["Sun"] == planets["Sun"]
+    assert rows[2]["Moon"] == planets["Moon"]
+
+
+def test_get_ephemeris_csv(client):
+    """Test ephemeris output as CSV"""
+    response = client.get(
+        "/ephemeris",
+        params={
+            "start": "2024-01-01T00:00:00",
+            "end": "2024-12-31T00:00:00",
+            "bodies": "Pluto",
+            "format": "csv",
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "date_time,Pluto_sign,Pluto_degrees"
+    assert len(lines) == 1 + 366
+    date_time, sign, degrees = lines[1].split(",")
+    assert date_time == "2024-01-01T00:00:00"
+    assert sign == "Capricorn"
+    assert 0 <= float(degrees) < 30
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"step": "1w"},
+        {"step": "0h"},
+        {"bodies": "Sun,Chiron"},
+        {"end": "2023-01-01T00:00:00"},
+        {"step": "1s"},
+        {"format": "xml"},
+    ],
+)
+def test_get_ephemeris_invalid(client, params):
+    """Test invalid ephemeris ranges, steps, bodies and formats"""
+    response = client.get(
+        "/ephemeris",
+        params={
+            "start": "2024-01-01T00:00:00",
+            "end": "2025-01-01T00:00:00",
+            **params,
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
+
+
+def test_get_ephemeris_busy(client):
+    """Test streams are admitted through the compute executor"""
+    with patch.object(compute_executor, "queue_size", 0):
+        response = client.get(
+            "/ephemeris",
+            params={
+                "start": "2024-01-01T00:00:00",
+                "end": "2025-01-01T00:00:00",
+            },
+            headers={"API_KEY": TEST_API_KEY},
+        )
+    assert response.status_code == 503
@@ -0,0 +1,244 @@
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.astro_calculations import EphemEngine
+from app.utils.search import find_root, sign_crossings, speed, stations
+from app.utils.stations import DECADE_EPOCH, StationTable
+
+# Test data
+TEST_API_KEY = "test_api_key"
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def planet_sign(client, planet, date_time):
+    response = client.post(
+        "/planets",
+        json={"date_time": date_time.isoformat()},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    return response.json()[planet]["sign"]
+
+
+def test_find_root():
+    """Test the root finder converges to the tolerance"""
+    calls = []
+
+    def f(t):
+        calls.append(t)
+        return t**3 - 2
+
+    root = find_root(f, 0, 2, -2, 6, tolerance=1e-9)
+    assert root == pytest.approx(2 ** (1 / 3), abs=1e-9)
+    assert len(calls) < 40
+
+
+def test_sign_crossings_match_dense_sampling():
+    """Test crossings, including retrograde ones, match dense sampling"""
+    engine = EphemEngine()
+    start, end = 2460310.5, 2460310.5 + 365  # 2024
+
+    evaluations = []
+
+    def longitude(jd):
+        evaluations.append(jd)
+        return engine.longitude("Mercury", jd)
+
+    events = list(sign_crossings(longitude, start, end, 1.0))
+
+    signs = [
+        int(engine.longitude("Mercury", start + i * 0.1) // 30)
+        for i in range(3650)
+    ]
+    changes = sum(a != b for a, b in zip(signs, signs[1:]))
+    assert len(events) == changes
+    assert sum(retrograde for _, _, retrograde in events) == 1
+    # Cost is driven by the coarse sampling and the 7 stations split at,
+    # not by the 1s precision
+    assert len(evaluations) < 40 * (len(events) + 7)
+
+
+@pytest.mark.parametrize(
+    "start", ["2059-08-30T12:43:12", "2059-09-01T00:00:00"]
+)
+def test_get_ingresses_around_station(client, start):
+    """Test a boundary crossed and crossed back within one sampling step
+    is found whatever the phase of the sampling grid"""
+    response = client.get(
+        "/events/ingresses",
+        params={
+            "start": start,
+            "end": "2059-11-01T00:00:00",
+            "bodies": "Jupiter",
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    events = [
+        (event["date_time"][:10], event["sign"], event["retrograde"])
+        for event in response.json()
+    ]
+    assert events == [
+        ("2059-09-16", "Gemini", False),
+        ("2059-09-22", "Taurus", True),
+    ]
+
+
+def test_get_ingresses(client):
+    """Test ingress events agree with the planets endpoint"""
+    response = client.get(
+        "/events/ingresses",
+        params={
+            "start": "2024-01-01T00:00:00",
+            "end": "2025-01-01T00:00:00",
+            "bodies": "Sun,Mercury",
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    events = response.json()
+    assert sum(event["body"] == "Sun" for event in events) == 12
+    assert [event["date_time"] for event in events] == sorted(
+        event["date_time"] for event in events
+    )
+
+    retrograde = [event for event in events if event["retrograde"]]
+    assert len(retrograde) == 1
+    assert retrograde[0]["body"] == "Mercury"
+    assert retrograde[0]["sign"] == "Leo"
+    assert retrograde[0]["previous_sign"] == "Virgo"
+
+    for event in events[:4]:
+        date_time = datetime.fromisoformat(event["date_time"])
+        before = date_time - timedelta(minutes=1)
+        after = date_time + timedelta(minutes=1)
+        assert planet_sign(client, event["body"], before) == (
+            event["previous_sign"]
+        )
+        assert planet_sign(client, event["body"], after) == event["sign"]
+
+
+def test_stations_match_dense_sampling():
+    """Test stations alternate and match direction changes every 2.4 hours"""
+    engine = EphemEngine()
+    start, end = 2460310.5, 2460310.5 + 365  # 2024
+
+    def longitude(jd):
+        return engine.longitude("Mercury", jd)
+
+    found = list(stations(longitude, start, end, 1.0))
+    lons = np.unwrap(
+        [longitude(t) for t in np.arange(start, end, 0.1)], period=360
+    )
+    changes = np.count_nonzero(np.diff(np.sign(np.diff(lons))))
+    assert len(found) == changes == 7
+    directions = [retrograde for _, retrograde in found]
+    assert directions == [False, True, False, True, False, True, False]
+    for jd, _ in found:
+        assert abs(speed(longitude, jd)) < 1e-4
+
+
+def test_station_table_memoizes_decades(tmp_path):
+    """Test decades are stored once and agree across their boundary"""
+    engine = EphemEngine()
+    table = StationTable(tmp_path)
+    start, end = DECADE_EPOCH - 400, DECADE_EPOCH + 400
+    rows = table.stations(engine, "Mars", start, end)
+    assert sorted(path.name for path in tmp_path.glob("*/Mars/*")) == [
+        "-1.npy",
+        "0.npy",
+    ]
+
+    def longitude(jd):
+        return engine.longitude("Mars", jd)
+
+    expected = list(stations(longitude, start, end, 4.0))
+    assert rows[:, 0] == pytest.approx([jd for jd, _ in expected])
+    assert rows[:, 1].tolist() == [float(r) for _, r in expected]
+
+    class Unavailable:
+        version = engine.version
+
+        def longitude(self, name, jd):
+            raise AssertionError("computed again")
+
+    reloaded = StationTable(tmp_path).stations(
+        Unavailable(), "Mars", start, end
+    )
+    assert (reloaded == rows).all()
+
+
+def test_get_stations(client, tmp_path):
+    """Test stations agree with the sign of speeds from the planets endpoint"""
+    with patch("app.routers.events.STATIONS_DIR", str(tmp_path)):
+        response = client.get(
+            "/events/stations",
+            params={
+                "start": "2024-01-01T00:00:00",
+                "end": "2025-01-01T00:00:00",
+                "bodies": "Mercury,Jupiter",
+            },
+            headers={"API_KEY": TEST_API_KEY},
+        )
+    assert response.status_code == 200
+    events = response.json()
+    assert [event["body"] for event in events].count("Mercury") == 7
+    assert [event["date_time"] for event in events] == sorted(
+        event["date_time"] for event in events
+    )
+    jupiter = [event for event in events if event["body"] == "Jupiter"]
+    # Jupiter stationed direct on 2023-12-31 and retrograde in October
+    assert [event["direction"] for event in jupiter] == ["retrograde"]
+
+    for event in events[:3]:
+        date_time = datetime.fromisoformat(event["date_time"])
+        speeds = [
+            client.get(
+                "/planets",
+                params={"date_time": t.isoformat(), "speed": "true"},
+                headers={"API_KEY": TEST_API_KEY},
+            ).json()[event["body"]]["speed"]
+            for t in (
+                date_time - timedelta(hours=6),
+                date_time + timedelta(hours=6),
+            )
+        ]
+        retrograde = event["direction"] == "retrograde"
+        assert (speeds[0] > 0, speeds[1] < 0) == (retrograde, retrograde)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"bodies": "Chiron"},
+        {"end": "2023-01-01T00:00:00"},
+        {"end": "2200-01-01T00:00:00"},
+    ],
+)
+def test_get_ingresses_invalid(client, params):
+    """Test invalid bodies and ranges"""
+    response = client.get(
+        "/events/ingresses",
+        params={
+            "start": "2024-01-01T00:00:00",
+            "end": "2025-01-01T00:00:00",
+            **params,
+        },
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
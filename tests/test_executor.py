@@ -0,0 +1,117 @@
+import asyncio
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.executor import ComputeExecutor, compute_executor
+
+# Test data
+TEST_API_KEY = "test_api_key"
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_executor_runs_off_event_loop():
+    """Test work runs on a pool thread rather than the event loop thread"""
+    executor = ComputeExecutor(threads=1, processes=0)
+
+    async def run():
+        return await executor.run(threading.current_thread)
+
+    try:
+        assert asyncio.run(run()) is not threading.current_thread()
+        assert executor.pending == 0
+    finally:
+        executor.shutdown()
+
+
+def test_executor_process_pool_for_large_batches():
+    """Test batches above the threshold are sent to the process pool"""
+    executor = ComputeExecutor(threads=1, processes=1, process_threshold=10)
+
+    async def run(batch_size):
+        return await executor.run(os.getpid, batch_size=batch_size)
+
+    try:
+        assert asyncio.run(run(1)) == os.getpid()
+        assert asyncio.run(run(10)) != os.getpid()
+    finally:
+        executor.shutdown()
+
+
+def test_executor_rejects_when_saturated():
+    """Test jobs beyond the queue size are rejected with a 503"""
+    executor = ComputeExecutor(threads=1, processes=0, queue_size=1)
+    release = threading.Event()
+
+    async def run():
+        blocked = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run(int)
+        release.set()
+        await blocked
+        return exc_info.value
+
+    try:
+        error = asyncio.run(run())
+        assert error.status_code == 503
+        assert executor.rejected == 1
+        assert executor.pending == 0
+    finally:
+        executor.shutdown()
+
+
+def test_executor_counts_work_of_cancelled_callers():
+    """Test work still running for a caller that went away stays counted"""
+    executor = ComputeExecutor(threads=1, processes=0, queue_size=1)
+    release, finished = threading.Event(), threading.Event()
+
+    def work():
+        release.wait()
+        finished.set()
+
+    async def run():
+        caller = asyncio.create_task(executor.run(work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert executor.pending == 1
+        with pytest.raises(HTTPException):
+            await executor.run(int)
+        release.set()
+        await asyncio.to_thread(finished.wait)
+        # Released by the pool thread right after the work returns
+        for _ in range(100):
+            if executor.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.pending == 0
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+
+def test_saturated_endpoint_returns_503(client):
+    """Test the routers surface executor saturation as a 503"""
+    with patch.object(compute_executor, "queue_size", 0):
+        response = client.post("/planets", headers={"API_KEY": TEST_API_KEY})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
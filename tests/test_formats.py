@@ -0,0 +1,199 @@
+import io
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import formats
+from app.utils.astro_calculations import PLANETS, SIGNS
+
+# Test data
+TEST_API_KEY = "test_api_key"
+NPY = "application/x-npy"
+TEST_RECORDS = [
+    {"date_time": "1993-01-18T15:30:00", "latitude": 51.5, "longitude": 0},
+    {"date_time": "2024-03-20T12:00:00", "latitude": -33.9, "longitude": 18},
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def get(client, path: str, accept: str):
+    return client.get(
+        path, headers={"API_KEY": TEST_API_KEY, "Accept": accept}
+    )
+
+
+def test_planets_npy(client):
+    """Test .npy responses hold the same positions as JSON"""
+    path = "/planets?date_time=2024-01-01T12:00:00"
+    positions = get(client, path, "application/json").json()
+    response = get(client, path, NPY)
+    assert response.headers["content-type"] == NPY
+    assert "Accept" in response.headers["vary"]
+    table = np.load(io.BytesIO(response.content))
+    assert table.shape == (1,)
+    for name in PLANETS:
+        assert table[f"{name}_sign"].dtype == np.uint8
+        assert SIGNS[table[f"{name}_sign"][0]] == positions[name]["sign"]
+        assert table[name][0] % 30 == pytest.approx(
+            positions[name]["degrees"], abs=1e-4
+        )
+    # Each format has its own ETag
+    assert response.headers["etag"] != get(client, path, "*/*").headers["etag"]
+
+
+def test_negotiation_prefers_highest_quality(client):
+    """Test Accept quality values pick the format"""
+    path = "/planets?date_time=2024-01-01T12:00:00"
+    response = get(client, path, f"application/json;q=0.5, {NPY}")
+    assert response.headers["content-type"] == NPY
+    response = get(client, path, f"application/json, {NPY};q=0.5")
+    assert response.headers["content-type"] == "application/json"
+    response = get(client, path, "text/html")
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_missing_package_is_not_acceptable(client):
+    """Test formats whose package is not installed get a 406"""
+    with patch.object(formats, "msgpack", None):
+        response = get(
+            client,
+            "/planets?date_time=2024-01-01T12:00:00",
+            "application/msgpack",
+        )
+        assert response.status_code == 406
+        assert "msgpack" in response.json()["detail"]
+        response = get(
+            client,
+            "/planets?date_time=2024-01-01T12:00:00",
+            f"application/msgpack, {NPY};q=0.1",
+        )
+        assert response.headers["content-type"] == NPY
+
+
+def test_ascendant_batch_npy(client):
+    """Test batch ascendants as columns"""
+    response = client.post(
+        "/ascendant/batch",
+        json={"records": TEST_RECORDS},
+        headers={"API_KEY": TEST_API_KEY, "Accept": NPY},
+    )
+    table = np.load(io.BytesIO(response.content))
+    assert list(table.dtype.names) == [
+        "julian_day",
+        "ascendant",
+        "ascendant_sign",
+        "latitude",
+        "longitude",
+    ]
+    assert list(table["latitude"]) == [51.5, -33.9]
+    ascendant = client.post(
+        "/ascendant",
+        json=TEST_RECORDS[0],
+        headers={"API_KEY": TEST_API_KEY},
+    ).json()
+    assert table["ascendant"][0] == pytest.approx(
+        ascendant["debug"]["ascendant"]
+    )
+
+
+def test_planets_batch_msgpack(client):
+    """Test MessagePack columns load with np.frombuffer"""
+    msgpack = pytest.importorskip("msgpack")
+    body = {"date_times": ["2024-01-01T12:00:00", "2024-06-01T12:00:00"]}
+    positions = client.post(
+        "/planets/batch", json=body, headers={"API_KEY": TEST_API_KEY}
+    ).json()
+    response = client.post(
+        "/planets/batch",
+        json=body,
+        headers={"API_KEY": TEST_API_KEY, "Accept": "application/msgpack"},
+    )
+    content = msgpack.unpackb(response.content)
+    assert content["rows"] == 2
+    columns = {
+        name: np.frombuffer(column["data"], column["dtype"])
+        for name, column in content["columns"].items()
+    }
+    signs = [content["signs"][i] for i in columns["Moon_sign"]]
+    assert signs == [
+        row[list(PLANETS).index("Moon")] for row in positions["signs"]
+    ]
+
+
+def test_ephemeris_arrow(client):
+    """Test ranges as an Arrow IPC stream"""
+    pyarrow = pytest.importorskip("pyarrow")
+    response = get(
+        client,
+        "/ephemeris?start=2024-01-01T00:00:00&end=2024-01-10T00:00:00"
+        "&bodies=Sun,Moon&format=arrow",
+        "*/*",
+    )
+    assert response.headers["content-type"] == formats.MEDIA_TYPES["arrow"]
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column_names == [
+        "julian_day",
+        "Sun",
+        "Sun_sign",
+        "Moon",
+        "Moon_sign",
+    ]
+    assert table.num_rows == 10
+    assert table.schema.field("Sun_sign").type == pyarrow.uint8()
+
+
+@pytest.mark.parametrize("output", ["npy", "arrow", "msgpack"])
+def test_ephemeris_binary_chunks(client, output):
+    """Test binary ranges streamed in chunks decode as one table"""
+    if not formats.available(output):
+        pytest.skip(f"{output} is not installed")
+    url = (
+        "/ephemeris?start=2024-01-01T00:00:00&end=2024-01-30T00:00:00"
+        f"&bodies=Sun,Moon&format={output}"
+    )
+    whole = np.load(
+        io.BytesIO(get(client, url[: -len(output)] + "npy", "*/*").content)
+    )
+    with patch("app.routers.ephemeris.BINARY_CHUNK_ROWS", 7):
+        content = get(client, url, "*/*").content
+    if output == "npy":
+        table = np.load(io.BytesIO(content))
+        columns = {name: table[name] for name in table.dtype.names}
+    elif output == "arrow":
+        import pyarrow
+
+        table = pyarrow.ipc.open_stream(content).read_all()
+        columns = {name: table[name].to_numpy() for name in table.column_names}
+    else:
+        import msgpack
+
+        maps = list(msgpack.Unpacker(io.BytesIO(content)))
+        assert len(maps) == 5
+        columns = {
+            name: np.concatenate(
+                [
+                    np.frombuffer(
+                        m["columns"][name]["data"], m["columns"][name]["dtype"]
+                    )
+                    for m in maps
+                ]
+            )
+            for name in maps[0]["columns"]
+        }
+    assert len(whole) == 30
+    for name in whole.dtype.names:
+        assert (columns[name] == whole[name]).all(), name
@@ -0,0 +1,47 @@
+import io
+import struct
+import zlib
+
+import numpy as np
+import pytest
+import swisseph as swe
+
+from app.utils.grid import SIGN_PALETTE, ascendant_grid, encode_png
+
+
+@pytest.mark.parametrize("jd_ut", [2451545.0, 2460390.123, 2470000.77])
+def test_ascendant_grid_matches_swe_houses(jd_ut):
+    """Test the vectorized ascendant, polar circles included"""
+    rng = np.random.default_rng(0)
+    latitudes = rng.uniform(-89.9, 89.9, 2000)
+    longitudes = rng.uniform(-180, 180, 2000)
+    ascendant = ascendant_grid(jd_ut, latitudes, longitudes)
+    expected = np.array(
+        [
+            swe.houses(jd_ut, latitude, longitude, b"A")[1][0]
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+    )
+    difference = (ascendant - expected + 180) % 360 - 180
+    assert np.abs(difference).max() < 1e-9
+
+
+def test_encode_png():
+    """Test the PNG holds the palette and the indices row by row"""
+    indices = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    png = encode_png(indices, SIGN_PALETTE)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+
+    chunks = {}
+    stream = io.BytesIO(png[8:])
+    while header := stream.read(8):
+        length, kind = struct.unpack(">I4s", header)
+        data = stream.read(length)
+        (crc,) = struct.unpack(">I", stream.read(4))
+        assert crc == zlib.crc32(kind + data)
+        chunks[kind] = data
+
+    assert struct.unpack(">IIBB", chunks[b"IHDR"][:10]) == (4, 3, 8, 3)
+    assert len(chunks[b"PLTE"]) == 3 * 12
+    scanlines = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), np.uint8)
+    assert np.array_equal(scanlines.reshape(3, 5)[:, 1:], indices)
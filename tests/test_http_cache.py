@@ -0,0 +1,153 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import responses
+from app.utils.executor import compute_executor
+
+# Test data
+TEST_API_KEY = "test_api_key"
+TEST_LOCATION = {
+    "date_time": "2024-03-20T12:00:00",
+    "latitude": 40.7128,
+    "longitude": -74.006,
+    "tz_offset": "-04:00",
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_planets_etag(client, fast):
+    """Test explicit-time positions are cacheable and revalidated"""
+    headers = {"API_KEY": TEST_API_KEY}
+    with patch.object(responses, "FAST_RESPONSES", fast):
+        response = client.get(
+            "/planets",
+            params={"date_time": "2024-01-01T12:00:00"},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('"')
+        assert "max-age=" in response.headers["cache-control"]
+        assert response.headers["vary"] == "API_KEY, Accept"
+
+        post = client.post(
+            "/planets",
+            json={"date_time": "2024-01-01T12:00:00"},
+            headers=headers,
+        )
+        assert post.headers["etag"] == etag
+        assert post.json() == response.json()
+
+    with patch.object(compute_executor, "run") as run:
+        for tag in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = client.get(
+                "/planets",
+                params={"date_time": "2024-01-01T12:00:00"},
+                headers={**headers, "If-None-Match": tag},
+            )
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+            assert response.content == b""
+        run.assert_not_called()
+
+
+def test_planets_etag_changes(client):
+    """Test different times or stale tags are computed and sent"""
+    headers = {"API_KEY": TEST_API_KEY}
+    first = client.get(
+        "/planets",
+        params={"date_time": "2024-01-01T12:00:00"},
+        headers=headers,
+    )
+    second = client.get(
+        "/planets",
+        params={"date_time": "2024-01-02T12:00:00"},
+        headers=headers,
+    )
+    assert first.headers["etag"] != second.headers["etag"]
+
+    response = client.get(
+        "/planets",
+        params={"date_time": "2024-01-01T12:00:00"},
+        headers={**headers, "If-None-Match": second.headers["etag"]},
+    )
+    assert response.status_code == 200
+
+
+def test_planets_now_not_cacheable(client):
+    """Test positions for the current time carry no cache headers"""
+    response = client.get("/planets", headers={"API_KEY": TEST_API_KEY})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert "cache-control" not in response.headers
+
+
+def test_ascendant_etag(client):
+    """Test the ascendant GET equivalent and its revalidation"""
+    headers = {"API_KEY": TEST_API_KEY}
+    response = client.get("/ascendant", params=TEST_LOCATION, headers=headers)
+    assert response.status_code == 200
+    post = client.post("/ascendant", json=TEST_LOCATION, headers=headers)
+    assert post.json() == response.json()
+    assert post.headers["etag"] == response.headers["etag"]
+
+    response = client.get(
+        "/ascendant",
+        params=TEST_LOCATION,
+        headers={**headers, "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+    moved = client.get(
+        "/ascendant",
+        params={**TEST_LOCATION, "latitude": 41},
+        headers=headers,
+    )
+    assert moved.headers["etag"] != post.headers["etag"]
+
+
+def test_ascendant_etag_follows_swisseph(client):
+    """Test the ascendant ETag changes with Swiss Ephemeris, not the
+    planet engine"""
+    headers = {"API_KEY": TEST_API_KEY}
+    etag = client.get(
+        "/ascendant", params=TEST_LOCATION, headers=headers
+    ).headers["etag"]
+
+    with patch("app.utils.http_cache.get_engine") as get_engine:
+        get_engine.return_value.version = "other-engine"
+        response = client.get(
+            "/ascendant", params=TEST_LOCATION, headers=headers
+        )
+    assert response.headers["etag"] == etag
+
+    with patch("app.routers.ascendant.swe.version", "0.0.0"):
+        response = client.get(
+            "/ascendant", params=TEST_LOCATION, headers=headers
+        )
+    assert response.headers["etag"] != etag
+
+
+def test_ascendant_query_invalid(client):
+    """Test the GET equivalent validates like the POST endpoint"""
+    response = client.get(
+        "/ascendant",
+        params={**TEST_LOCATION, "latitude": 91},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
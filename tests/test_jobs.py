@@ -0,0 +1,233 @@
+import asyncio
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.jobs import job_runner
+from app.utils import metrics
+from app.utils.jobs import JobRunner, JobStore
+
+# Test data
+TEST_API_KEY = "test_api_key"
+HEADERS = {"API_KEY": TEST_API_KEY}
+TEST_RECORDS = [
+    {
+        "date_time": "1993-01-18T15:30:00",
+        "latitude": -23.5505,
+        "longitude": -46.6333,
+        "tz_offset": "-03:00",
+    },
+    {"date_time": "2024-03-20T12:00:00", "latitude": 80, "longitude": 10},
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client(tmp_path):
+    with patch.object(job_runner, "store", JobStore(tmp_path)):
+        with patch.object(job_runner, "processes", 2):
+            # Entering the client keeps one event loop for background jobs
+            with TestClient(app) as client:
+                yield client
+
+
+def wait(client, job_id: str) -> dict:
+    for _ in range(200):
+        status = client.get(f"/jobs/{job_id}", headers=HEADERS).json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_planets_job(client):
+    """Test a planets range job agrees with /planets"""
+    response = client.post(
+        "/jobs",
+        json={
+            "kind": "planets",
+            "start": "2024-01-01T00:00:00",
+            "end": "2024-01-10T00:00:00",
+            "step": "1d",
+        },
+        headers=HEADERS,
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["rows"] == 10
+
+    status = wait(client, job["id"])
+    assert status["status"] == "done"
+    assert status["progress"] == 1
+    # Observed although the request creating the job is over
+    assert metrics.histograms["jobs", "job_chunk"].count >= 1
+
+    response = client.get(f"/jobs/{job['id']}/output", headers=HEADERS)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 10
+    assert rows[3]["date_time"] == "2024-01-04T00:00:00"
+    planets = client.get(
+        "/planets?date_time=2024-01-04T00:00:00", headers=HEADERS
+    ).json()
+    assert {name: rows[3][name] for name in planets} == planets
+
+
+def test_chart_job(client):
+    """Test chart jobs leave houses empty where undefined"""
+    response = client.post(
+        "/jobs",
+        json={"kind": "chart", "records": TEST_RECORDS},
+        headers=HEADERS,
+    )
+    job_id = response.json()["id"]
+    assert wait(client, job_id)["status"] == "done"
+
+    response = client.get(f"/jobs/{job_id}/output", headers=HEADERS)
+    first, polar = [json.loads(line) for line in response.text.splitlines()]
+    chart = client.post("/chart", json=TEST_RECORDS[0], headers=HEADERS).json()
+    assert first["date_time"] == chart["date_time_utc"]
+    assert first["planets"] == chart["planets"]
+    assert first["houses"] == chart["houses"]
+    assert first["angles"] == chart["angles"]
+    assert polar["houses"] is None and polar["angles"] is None
+
+
+def test_ascendant_job_npz_output(client):
+    """Test the npz output holds the input and output columns"""
+    response = client.post(
+        "/jobs",
+        json={"kind": "ascendant", "records": TEST_RECORDS},
+        headers=HEADERS,
+    )
+    job_id = response.json()["id"]
+    assert wait(client, job_id)["status"] == "done"
+
+    response = client.get(f"/jobs/{job_id}/output?format=npz", headers=HEADERS)
+    assert response.status_code == 200
+    arrays = np.load(io.BytesIO(response.content))
+    assert sorted(arrays.files) == [
+        "ascendant",
+        "julian_day",
+        "latitude",
+        "longitude",
+    ]
+    ascendant = client.post(
+        "/ascendant", json=TEST_RECORDS[0], headers=HEADERS
+    ).json()
+    assert arrays["ascendant"][0] == pytest.approx(
+        ascendant["debug"]["ascendant"]
+    )
+
+
+def test_resume_unfinished_job(client):
+    """Test jobs interrupted by a restart only compute missing chunks"""
+    manifest = job_runner.store.create(
+        "ascendant",
+        {
+            "julian_day": np.full(5, 2451545.0),
+            "latitude": np.zeros(5),
+            "longitude": np.zeros(5),
+        },
+        {"ascendant": ((), "float64")},
+        {},
+        chunk_rows=2,
+    )
+    manifest.update(status="running", chunks_done=[0], rows_done=2)
+    job_runner.store.save(manifest)
+
+    assert client.portal.call(job_runner.resume) == [manifest["id"]]
+    status = wait(client, manifest["id"])
+    assert status["status"] == "done"
+    assert status["rows_done"] == 5
+    directory = job_runner.store.path(manifest["id"])
+    ascendant = np.load(directory / "ascendant.npy")
+    # The chunk marked as done was not computed again
+    assert np.isnan(ascendant[:2]).all()
+    assert not np.isnan(ascendant[2:]).any()
+
+
+def test_failed_chunk_cancels_the_others(tmp_path):
+    """Test chunks still waiting are not run once one has failed, and the
+    job is only saved once the chunks already running have finished"""
+    calls, finished = [], []
+
+    def chunk(directory, options, start, stop):
+        calls.append(start)
+        if start == 0:
+            time.sleep(0.01)
+            raise ValueError("bad input")
+        time.sleep(0.1)
+        finished.append(start)
+
+    store = JobStore(tmp_path)
+    runner = JobRunner(store, {"test": chunk}, processes=1)
+    manifest = store.create("test", {"x": np.zeros(20)}, {}, {}, chunk_rows=2)
+
+    async def run():
+        with ThreadPoolExecutor(2) as pool:
+            with patch.object(runner, "_executor", return_value=pool):
+                runner.start(manifest["id"])
+                await asyncio.gather(*runner._tasks)
+                finished_when_saved = sorted(finished)
+                # Long enough for every chunk to run if left going
+                await asyncio.sleep(0.6)
+        return finished_when_saved
+
+    assert asyncio.run(run()) == sorted(start for start in calls if start)
+    manifest = store.load(manifest["id"])
+    assert manifest["status"] == "failed"
+    assert manifest["error"] == "ValueError: bad input"
+    # Only the chunks already handed to the pool ran
+    assert 1 < len(calls) < 10
+    assert manifest["rows_done"] == 2 * len(manifest["chunks_done"])
+
+
+def test_job_validation(client):
+    """Test invalid jobs and unknown ids"""
+    response = client.post(
+        "/jobs", json={"kind": "ascendant"}, headers=HEADERS
+    )
+    assert response.status_code == 422
+    with patch("app.routers.jobs.MAX_JOB_ROWS", 5):
+        response = client.post(
+            "/jobs",
+            json={
+                "kind": "planets",
+                "start": "2024-01-01T00:00:00",
+                "end": "2024-01-10T00:00:00",
+            },
+            headers=HEADERS,
+        )
+    assert response.status_code == 422
+    assert client.get("/jobs/../etc", headers=HEADERS).status_code == 404
+    response = client.get("/jobs/" + "0" * 32, headers=HEADERS)
+    assert response.status_code == 404
+
+
+def test_delete_job(client):
+    """Test finished jobs can be deleted"""
+    response = client.post(
+        "/jobs",
+        json={"kind": "planets", "date_times": ["2024-01-01T00:00:00"]},
+        headers=HEADERS,
+    )
+    job_id = response.json()["id"]
+    wait(client, job_id)
+    response = client.delete(f"/jobs/{job_id}", headers=HEADERS)
+    assert response.status_code == 204
+    response = client.get(f"/jobs/{job_id}", headers=HEADERS)
+    assert response.status_code == 404
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.live import live_feed
+from app.utils.astro_calculations import PLANETS
+from app.utils.broadcast import Broadcaster
+
+# Test data
+TEST_API_KEY = "test_api_key"
+HEADERS = {"API_KEY": TEST_API_KEY}
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_broadcaster_produces_once_per_tick():
+    """Test every subscriber gets the same payloads from one production"""
+
+    async def run():
+        produced = []
+
+        async def produce():
+            produced.append(object())
+            return produced[-1]
+
+        broadcaster = Broadcaster(produce, 0.01, 4)
+        async with broadcaster.subscribe() as a:
+            async with broadcaster.subscribe() as b:
+                received = [(await a.get(), await b.get()) for _ in range(5)]
+        assert broadcaster._task is None
+        return produced, received
+
+    produced, received = asyncio.run(run())
+    assert all(x is y for x, y in received)
+    assert len(produced) <= 6
+
+
+def test_broadcaster_drops_slow_subscribers():
+    """Test a subscriber that stops reading is dropped, not waited for"""
+
+    async def run():
+        ticks = iter(range(1000))
+
+        async def produce():
+            return next(ticks)
+
+        broadcaster = Broadcaster(produce, 0.01, 2)
+        async with broadcaster.subscribe() as fast:
+            async with broadcaster.subscribe() as slow:
+                received = [await fast.get() for _ in range(10)]
+                assert len(broadcaster) == 1
+                assert slow.get_nowait() is None
+                assert slow.empty()
+            received += [await fast.get() for _ in range(3)]
+        return broadcaster.dropped, received
+
+    dropped, received = asyncio.run(run())
+    assert dropped == 1
+    assert received == list(range(13))
+
+
+async def read_events(path, headers, count):
+    """The first ``count`` events of a stream, then disconnect."""
+    chunks = []
+    done = asyncio.Event()
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message["body"]:
+            chunks.append(message["body"])
+            if sum(chunk.startswith(b"data: ") for chunk in chunks) == count:
+                done.set()
+
+    await app(scope, receive, send)
+    return chunks
+
+
+def test_live_positions():
+    """Test concurrent streams share the payloads of one feed"""
+    headers = [(b"api_key", TEST_API_KEY.encode())]
+
+    async def run():
+        with patch.object(live_feed, "interval", 0.05):
+            streams = await asyncio.gather(
+                read_events("/planets/live", headers, 3),
+                read_events("/planets/live", headers, 3),
+            )
+        return streams, live_feed.ticks
+
+    ticks = live_feed.ticks
+    (first, second), after = asyncio.run(run())
+    assert first[0] == second[0] == b"retry: 50\n\n"
+    assert first[1:] == second[1:]
+    # One computation per tick for both streams
+    assert after - ticks <= 4
+    event = json.loads(first[1].removeprefix(b"data: "))
+    assert event["date_time"].endswith("Z")
+    assert set(event["planets"]) == set(PLANETS)
+    assert all("speed" in p for p in event["planets"].values())
+    # The feed stops with its last subscriber
+    assert len(live_feed) == 0 and live_feed._task is None
+
+
+def test_live_positions_require_api_key(client):
+    """Test streams without a valid API key are refused"""
+    response = client.get("/planets/live")
+    assert response.status_code == 403
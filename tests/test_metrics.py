@@ -0,0 +1,142 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.middleware.auth import APIKeyMiddleware
+from app.utils import metrics
+from app.utils.executor import compute_executor
+from app.utils.metrics import TimedRoute, TimingMiddleware
+
+# Test data
+TEST_API_KEY = "test_api_key"
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def timed_client():
+    with patch.object(metrics, "METRICS_ENABLED", True):
+        router = APIRouter(route_class=TimedRoute)
+
+        @router.get("/square")
+        async def square(x: int):
+            return {"square": await compute_executor.run(pow, x, 2)}
+
+        timed_app = FastAPI()
+        timed_app.include_router(router)
+        timed_app.include_router(metrics.router)
+        timed_app.add_middleware(APIKeyMiddleware)
+        timed_app.add_middleware(TimingMiddleware)
+    metrics.histograms.clear()
+    return TestClient(timed_app)
+
+
+def stages(response) -> dict[str, float]:
+    timings = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, duration = entry.split(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+
+def test_server_timing(timed_client):
+    """Test each stage of a request is reported"""
+    response = timed_client.get(
+        "/square", params={"x": 3}, headers={"API_KEY": TEST_API_KEY}
+    )
+    assert response.json() == {"square": 9}
+    timings = stages(response)
+    assert list(timings) == [
+        "auth",
+        "validate",
+        "compute",
+        "endpoint",
+        "serialize",
+        "total",
+    ]
+    assert timings["compute"] <= timings["endpoint"] <= timings["total"]
+
+
+def test_server_timing_rejected(timed_client):
+    """Test rejected requests report the stages they went through"""
+    response = timed_client.get(
+        "/square", params={"x": "a"}, headers={"API_KEY": TEST_API_KEY}
+    )
+    assert response.status_code == 422
+    assert list(stages(response)) == ["auth", "validate", "total"]
+
+    response = timed_client.get("/square", params={"x": 3})
+    assert response.status_code == 403
+    assert list(stages(response)) == ["auth", "total"]
+
+
+def test_metrics(timed_client):
+    """Test stages are aggregated into Prometheus histograms"""
+    for x in range(3):
+        timed_client.get(
+            "/square", params={"x": x}, headers={"API_KEY": TEST_API_KEY}
+        )
+    response = timed_client.get("/metrics", headers={"API_KEY": TEST_API_KEY})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    labels = 'route="/square",stage="compute"'
+    name = "request_stage_duration_seconds"
+    assert f"{name}_count{{{labels}}} 3" in lines
+    assert f'{name}_bucket{{{labels},le="+Inf"}} 3' in lines
+
+    buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in lines
+        if line.startswith(f"{name}_bucket{{{labels}")
+    ]
+    assert buckets == sorted(buckets)
+    assert any(
+        line.startswith('coalesced_requests_total{route="/planets"} ')
+        for line in lines
+    )
+
+
+def test_metrics_counters(timed_client):
+    """Test cache, rate limit and executor statistics are exposed"""
+    with patch.object(compute_executor, "rejected", 7):
+        response = timed_client.get(
+            "/metrics", headers={"API_KEY": TEST_API_KEY}
+        )
+    lines = response.text.splitlines()
+    assert 'compute_rejected_total{executor="compute"} 7' in lines
+    assert "# TYPE compute_pending gauge" in lines
+    for name in (
+        "cache_hits_total",
+        "cache_misses_total",
+        "cache_evictions_total",
+    ):
+        assert any(
+            line.startswith(f'{name}{{cache="positions"}} ') for line in lines
+        )
+    assert any(
+        line.startswith('rate_limit_clients{backend="memory"} ')
+        for line in lines
+    )
+
+
+def test_disabled_by_default():
+    """Test the app is not instrumented unless METRICS_ENABLED is set"""
+    client = TestClient(app)
+    response = client.post(
+        "/planets",
+        json={"date_time": "2024-01-01T00:00:00"},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    response = client.get("/metrics", headers={"API_KEY": TEST_API_KEY})
+    assert response.status_code == 404
@@ -1,13 +1,18 @@
+import asyncio
 import os
 from unittest.mock import patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.routers import planets
+from app.routers.planets import positions_cache, positions_flights
 
 # Test data
 TEST_API_KEY = "test_api_key"
+HEADERS = {"API_KEY": TEST_API_KEY}
 
 
 @pytest.fixture(autouse=True)
@@ -105,3 +110,144 @@ def test_get_zodiac_sign():
     assert get_zodiac_sign(30) == ("Taurus", 0)
     assert get_zodiac_sign(45) == ("Taurus", 15)
     assert get_zodiac_sign(359) == ("Pisces", 29)
+
+
+def test_get_planets_batch(client):
+    """Test batch planetary positions match the single-datetime endpoint"""
+    test_times = ["2024-03-20T12:00:00", "1993-01-18T15:30:00"]
+    response = client.post(
+        "/planets/batch",
+        json={"date_times": test_times},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    assert len(data["planets"]) == 10
+    assert len(data["signs"]) == len(data["degrees"]) == len(test_times)
+
+    # Each row must agree with the single-datetime endpoint
+    for row, test_time in enumerate(test_times):
+        single = client.post(
+            "/planets",
+            json={"date_time": test_time},
+            headers={"API_KEY": TEST_API_KEY},
+        ).json()
+        for column, planet in enumerate(data["planets"]):
+            assert data["signs"][row][column] == single[planet]["sign"]
+            assert data["degrees"][row][column] == single[planet]["degrees"]
+
+
+def test_get_planets_speed(client):
+    """Test speeds are only included on request, in degrees per day"""
+    body = {"date_time": "2024-04-10T00:00:00"}
+    plain = client.post("/planets", json=body, headers=HEADERS).json()
+    assert all("speed" not in position for position in plain.values())
+
+    response = client.post(
+        "/planets", json={**body, "speed": True}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    data = response.json()
+    query = client.get(
+        "/planets", params={**body, "speed": "true"}, headers=HEADERS
+    )
+    assert query.json() == data
+    assert 11 < data["Moon"]["speed"] < 16
+    # Mercury stationed retrograde on 2024-04-01
+    assert data["Mercury"]["speed"] < 0
+    for planet, position in data.items():
+        assert position["degrees"] == plain[planet]["degrees"]
+
+    batch = client.post(
+        "/planets/batch",
+        json={"date_times": [body["date_time"]], "speed": True},
+        headers=HEADERS,
+    ).json()
+    assert batch["speeds"] == [
+        [data[planet]["speed"] for planet in batch["planets"]]
+    ]
+
+
+def test_get_planets_batch_invalid_size(client):
+    """Test batch planetary positions reject empty and oversized batches"""
+    from app.utils.astro_calculations import MAX_BATCH_SIZE
+
+    response = client.post(
+        "/planets/batch",
+        json={"date_times": []},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/planets/batch",
+        json={"date_times": ["2024-03-20T12:00:00"] * (MAX_BATCH_SIZE + 1)},
+        headers={"API_KEY": TEST_API_KEY},
+    )
+    assert response.status_code == 422
+
+
+def test_get_planets_cached(client):
+    """Test repeated requests hit the cache and explicit times are exact"""
+    positions_cache.clear()
+    hits = positions_cache.hits
+    responses = [
+        client.post(
+            "/planets",
+            json={"date_time": test_time},
+            headers={"API_KEY": TEST_API_KEY},
+        )
+        for test_time in [
+            "2024-03-01T12:00:00.3",
+            "2024-03-01T12:00:00.3",
+            "2024-03-01T12:00:00.5",
+        ]
+    ]
+    assert responses[0].json() == responses[1].json()
+    assert positions_cache.hits == hits + 1
+    assert len(positions_cache) == 2
+    # Computing at the nearest half second would give 16.2493
+    assert responses[0].json()["Moon"]["degrees"] == 16.2492
+    assert responses[2].json()["Moon"]["degrees"] == 16.2493
+
+
+def test_get_planets_now_cached(client):
+    """Test requests for the current time within one step share an entry"""
+    positions_cache.clear()
+    with patch.object(planets, "POSITIONS_CACHE_RESOLUTION", 3600):
+        for _ in range(3):
+            response = client.post(
+                "/planets", headers={"API_KEY": TEST_API_KEY}
+            )
+            assert response.status_code == 200
+    assert len(positions_cache) <= 2
+
+
+def test_concurrent_requests_are_coalesced():
+    """Test identical concurrent requests share one computation"""
+    transport = httpx.ASGITransport(app=app)
+    body = {"date_time": "1987-06-05T04:03:02"}
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.post(
+                        "/planets",
+                        json=body,
+                        headers={"API_KEY": TEST_API_KEY},
+                    )
+                    for _ in range(8)
+                )
+            )
+
+    positions_cache.clear()
+    calls, coalesced = positions_flights.calls, positions_flights.coalesced
+    responses = asyncio.run(run())
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert positions_flights.calls == calls + 1
+    assert positions_flights.coalesced == coalesced + 7
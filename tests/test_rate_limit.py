@@ -0,0 +1,261 @@
+import fnmatch
+import socketserver
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.middleware.rate_limit import (
+    RateLimitStore,
+    RedisRateLimitBackend,
+    SQLiteRateLimitBackend,
+    create_backend,
+)
+
+# Test data
+TEST_IP = "127.0.0.1"
+
+
+@pytest.fixture
+def clock():
+    with patch("app.middleware.rate_limit.time.monotonic") as monotonic:
+        monotonic.return_value = 1000.0
+        yield monotonic
+
+
+LIMITS = {
+    "window": 60,
+    "max_requests": 3,
+    "max_failures": 2,
+    "block_duration": 300,
+}
+
+
+class RESPStandIn(socketserver.StreamRequestHandler):
+    """Local stand-in for the subset of Redis the backend uses."""
+
+    data: dict[bytes, tuple[bytes, float | None]] = {}
+    lock = threading.Lock()
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def reply(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(
+                self.reply(item) for item in value
+            )
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def execute(self, command, key=None, *args):
+        command = command.upper()
+        if command == b"SET":
+            options = [arg.upper() for arg in args[1:]]
+            if b"NX" in options and self.get(key) is not None:
+                return None
+            expires_at = None
+            if b"PX" in options:
+                ttl = int(args[1:][options.index(b"PX") + 1])
+                expires_at = time.monotonic() + ttl / 1000
+            self.data[key] = (args[0], expires_at)
+            return b"OK"
+        if command == b"INCR":
+            count = int(self.get(key) or 0) + 1
+            self.data[key] = (b"%d" % count, self.data.get(key, (0, None))[1])
+            return count
+        if command == b"EXISTS":
+            return int(self.get(key) is not None)
+        if command == b"DEL":
+            return sum(
+                self.data.pop(k, None) is not None for k in (key, *args)
+            )
+        if command == b"KEYS":
+            return [k for k in list(self.data) if fnmatch.fnmatch(k, key)]
+        raise ValueError(command)
+
+    def handle(self):
+        while line := self.rfile.readline():
+            command = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                command.append(self.rfile.read(size + 2)[:-2])
+            with self.lock:
+                self.wfile.write(self.reply(self.execute(*command)))
+
+
+@pytest.fixture
+def redis_url():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RESPStandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+    RESPStandIn.data.clear()
+
+
+@pytest.fixture
+def store():
+    return RateLimitStore(
+        window=60,
+        max_requests=3,
+        max_failures=2,
+        block_duration=300,
+        max_clients=3,
+    )
+
+
+def test_requests_per_window(store, clock):
+    """Test requests are limited per window and the window resets"""
+    assert [store.is_rate_limited(TEST_IP) for _ in range(4)] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    clock.return_value += 61
+    assert not store.is_rate_limited(TEST_IP)
+
+
+def test_block_after_failed_attempts(store, clock):
+    """Test clients are blocked for the block duration"""
+    store.record_failed_attempt(TEST_IP)
+    assert not store.is_rate_limited(TEST_IP)
+    store.record_failed_attempt(TEST_IP)
+    assert store.is_rate_limited(TEST_IP)
+
+    # Blocked clients are kept past their window until the block ends
+    clock.return_value += 120
+    assert store.is_rate_limited(TEST_IP)
+    clock.return_value += 181
+    assert not store.is_rate_limited(TEST_IP)
+
+
+def test_idle_clients_expire(store, clock):
+    """Test clients are dropped once their window has elapsed"""
+    store.is_rate_limited("10.0.0.1")
+    store.record_failed_attempt("10.0.0.2")
+    assert len(store) == 2
+
+    clock.return_value += 61
+    store.is_rate_limited(TEST_IP)
+    assert len(store) == 1
+    assert store.expirations == 2
+    assert store.evictions == 0
+
+
+def test_max_clients(store, clock):
+    """Test the client closest to expiry is evicted when full"""
+    for i in range(3):
+        store.is_rate_limited(f"10.0.0.{i}")
+        clock.return_value += 1
+    store.record_failed_attempt("10.0.0.0")
+    store.record_failed_attempt("10.0.0.0")
+
+    store.is_rate_limited(TEST_IP)
+    assert len(store) == 3
+    assert store.evictions == 1
+    # The blocked client outlives the others and is not evicted
+    assert store.is_rate_limited("10.0.0.0")
+    assert store.stats()["clients"] == 3
+
+
+def test_expiry_heap_stays_bounded(store, clock):
+    """Test rescheduling a client does not grow the expiry heap unbounded"""
+    for _ in range(1000):
+        clock.return_value += 61
+        store.is_rate_limited(TEST_IP)
+    assert len(store._expiry) <= 2 * len(store) + 64
+
+
+def test_sqlite_backend_shared_between_workers(tmp_path):
+    """Test two workers using the same SQLite file share their counts"""
+    path = str(tmp_path / "rate_limit.db")
+    workers = [SQLiteRateLimitBackend(path, **LIMITS) for _ in range(2)]
+
+    assert [workers[i % 2].is_rate_limited(TEST_IP) for i in range(4)] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+
+    workers[0].record_failed_attempt("10.0.0.1")
+    assert not workers[1].is_rate_limited("10.0.0.1")
+    workers[1].record_failed_attempt("10.0.0.1")
+    assert workers[0].is_rate_limited("10.0.0.1")
+
+    workers[0].clear()
+    assert not workers[1].is_rate_limited(TEST_IP)
+
+
+def test_sqlite_backend_fails_open(tmp_path):
+    """Test requests are let through, quickly, while the file is locked"""
+    path = str(tmp_path / "rate_limit.db")
+    backend = SQLiteRateLimitBackend(path, **LIMITS)
+    lock = sqlite3.connect(path, isolation_level=None)
+    lock.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        assert not backend.is_rate_limited(TEST_IP)
+        backend.record_failed_attempt(TEST_IP)
+        assert time.perf_counter() - start < 0.5
+    finally:
+        lock.execute("ROLLBACK")
+        lock.close()
+    assert backend.errors == 2
+    assert not backend.is_rate_limited(TEST_IP)
+    assert backend.errors == 2
+
+
+def test_redis_backend_shared_between_hosts(redis_url):
+    """Test two hosts using the same Redis share their counts"""
+    hosts = [RedisRateLimitBackend(redis_url, **LIMITS) for _ in range(2)]
+
+    assert [hosts[i % 2].is_rate_limited(TEST_IP) for i in range(4)] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+
+    hosts[0].record_failed_attempt("10.0.0.1")
+    assert not hosts[1].is_rate_limited("10.0.0.1")
+    hosts[1].record_failed_attempt("10.0.0.1")
+    assert hosts[0].is_rate_limited("10.0.0.1")
+
+    hosts[0].clear()
+    assert not hosts[1].is_rate_limited(TEST_IP)
+
+
+def test_redis_backend_fails_open():
+    """Test requests are let through when Redis is unreachable"""
+    backend = RedisRateLimitBackend("redis://127.0.0.1:1/0", **LIMITS)
+    assert not backend.is_rate_limited(TEST_IP)
+    backend.record_failed_attempt(TEST_IP)
+    assert backend.errors == 2
+
+
+def test_create_backend(tmp_path, redis_url):
+    """Test backends are selected by URL"""
+    limits = {**LIMITS, "max_clients": 10}
+    assert isinstance(create_backend("memory", **limits), RateLimitStore)
+    assert isinstance(
+        create_backend(f"sqlite:///{tmp_path}/rate_limit.db", **limits),
+        SQLiteRateLimitBackend,
+    )
+    assert isinstance(
+        create_backend(redis_url, **limits), RedisRateLimitBackend
+    )
+    with pytest.raises(ValueError):
+        create_backend("memcached://localhost", **limits)
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.planets import positions_cache
+from app.utils import responses
+
+# Test data
+TEST_API_KEY = "test_api_key"
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [
+        ("/planets", {"date_time": "2024-01-01T12:00:00"}),
+        (
+            "/planets/batch",
+            {
+                "date_times": [
+                    "2024-01-01T12:00:00",
+                    "2024-01-01T12:00:00Z",
+                    "2024-01-01T12:00:00.250-03:00",
+                ]
+            },
+        ),
+        (
+            "/ascendant",
+            {
+                "date_time": "2024-03-20T12:00:00",
+                "latitude": 40.7128,
+                "longitude": -74.0060,
+                "tz_offset": "-04:00",
+            },
+        ),
+    ],
+)
+def test_fast_response_matches_response_model(client, path, body):
+    """Test the orjson path returns what response_model validation would"""
+    bodies = []
+    for fast in (True, False):
+        positions_cache.clear()
+        with patch.object(responses, "FAST_RESPONSES", fast):
+            response = client.post(
+                path, json=body, headers={"API_KEY": TEST_API_KEY}
+            )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        bodies.append(response.json())
+    assert bodies[0] == bodies[1]
+
+
+def test_dumps():
+    """Test UTC datetimes are written as Pydantic writes them"""
+    date_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert responses.dumps([date_time]) == b'["2024-01-01T00:00:00Z"]'
@@ -0,0 +1,167 @@
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.astro_calculations import PLANETS, get_engine, julian_day
+from app.utils.synastry import separations, synastry
+
+# Test data
+TEST_API_KEY = "test_api_key"
+HEADERS = {"API_KEY": TEST_API_KEY}
+ANGLES = np.array([0.0, 60.0, 90.0, 120.0, 180.0])
+ORBS = np.array([8.0, 4.0, 6.0, 6.0, 8.0])
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def brute_force_score(chart, other):
+    score = 0.0
+    for a in chart:
+        for b in other:
+            separation = abs((a - b + 180) % 360 - 180)
+            score += max(
+                0.0,
+                *(1 - abs(separation - x) / o for x, o in zip(ANGLES, ORBS)),
+            )
+    return score
+
+
+def test_synastry_matches_brute_force():
+    """Test chunked scores agree with a direct computation"""
+    rng = np.random.default_rng(0)
+    charts = rng.uniform(0, 360, (7, 10))
+    others = rng.uniform(0, 360, (30, 10))
+    for max_elements in (1, 1000, 10**9):
+        hits, compared = synastry(
+            charts, others, ANGLES, ORBS, 0, 1000, max_elements
+        )
+        assert compared == 7 * 30
+        scores = {(i, j): score for score, i, j, _ in hits}
+        for i in range(7):
+            for j in range(30):
+                expected = brute_force_score(charts[i], others[j])
+                assert scores.get((i, j), 0) == pytest.approx(expected)
+
+
+def test_synastry_tiles_bound_memory():
+    """Test one chart against many others is split into bounded tiles"""
+    rng = np.random.default_rng(2)
+    charts = rng.uniform(0, 360, (1, 10))
+    others = rng.uniform(0, 360, (50, 10))
+    sizes = []
+
+    def recording(a, b):
+        result = separations(a, b)
+        sizes.append(result.size)
+        return result
+
+    with patch("app.utils.synastry.separations", recording):
+        hits, compared = synastry(charts, others, ANGLES, ORBS, 0, 100, 1000)
+    assert compared == 50
+    assert max(sizes) <= 1000 and len(sizes) == 5
+    expected, _ = synastry(charts, others, ANGLES, ORBS, 0, 100, 10**9)
+    assert [hit[:3] for hit in hits] == [hit[:3] for hit in expected]
+
+
+def test_synastry_within_one_set():
+    """Test charts compared with each other count each pair once"""
+    rng = np.random.default_rng(1)
+    charts = rng.uniform(0, 360, (12, 10))
+    hits, compared = synastry(charts, None, ANGLES, ORBS, 0, 1000, 500)
+    assert compared == 12 * 11 // 2
+    assert all(i < j for _, i, j, _ in hits)
+    assert len(hits) == compared
+
+    top, _ = synastry(charts, None, ANGLES, ORBS, 0, 5, 500)
+    assert [hit[:3] for hit in top] == [hit[:3] for hit in hits[:5]]
+    threshold = hits[10][0]
+    above, _ = synastry(charts, None, ANGLES, ORBS, threshold, 1000, 500)
+    assert len(above) == 11
+
+
+def test_synastry_endpoint(client):
+    """Test a chart by datetime ranks its own longitudes first"""
+    jd = julian_day(datetime(1993, 1, 18, 18, 30))
+    longitudes = dict(zip(PLANETS, get_engine().longitudes(jd)))
+    shifted = {name: (lon + 97) % 360 for name, lon in longitudes.items()}
+    response = client.post(
+        "/synastry",
+        json={
+            "charts": [
+                {"date_time": "1993-01-18T15:30:00", "tz_offset": "-03:00"}
+            ],
+            "others": [{"longitudes": shifted}, {"longitudes": longitudes}],
+            "limit": 1,
+        },
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["pairs_compared"] == 2
+    (pair,) = result["pairs"]
+    assert pair["chart"] == 0 and pair["other"] == 1
+    conjunctions = [
+        aspect
+        for aspect in pair["aspects"]
+        if aspect["body"] == aspect["other_body"]
+    ]
+    assert len(conjunctions) == len(PLANETS)
+    assert all(aspect["orb"] == 0 for aspect in conjunctions)
+
+
+@pytest.mark.parametrize("longitude", [370, 730, -350])
+def test_synastry_normalizes_longitudes(client, longitude):
+    """Test given longitudes are taken modulo 360 degrees"""
+    response = client.post(
+        "/synastry",
+        json={
+            "charts": [{"longitudes": {"Sun": longitude}}],
+            "others": [{"longitudes": {"Sun": 10}}],
+            "bodies": ["Sun"],
+        },
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    (pair,) = response.json()["pairs"]
+    (aspect,) = pair["aspects"]
+    assert aspect["aspect"] == "conjunction"
+    assert aspect["orb"] == 0
+
+
+def test_synastry_validation(client):
+    """Test missing longitudes and too many pairs are rejected"""
+    response = client.post(
+        "/synastry",
+        json={"charts": [{"longitudes": {"Sun": 10}}, {"longitudes": {}}]},
+        headers=HEADERS,
+    )
+    assert response.status_code == 422
+    assert "Chart 0" in response.json()["detail"]
+    response = client.post(
+        "/synastry",
+        json={"charts": [{"longitudes": {"Sun": 10}}] * 2, "bodies": ["Sol"]},
+        headers=HEADERS,
+    )
+    assert response.status_code == 422
+    assert "Sol" in response.json()["detail"]
+    with patch("app.routers.synastry.MAX_SYNASTRY_PAIRS", 2):
+        response = client.post(
+            "/synastry",
+            json={"charts": [{"longitudes": {"Sun": 10}}] * 3},
+            headers=HEADERS,
+        )
+    assert response.status_code == 422
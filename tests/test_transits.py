@@ -0,0 +1,131 @@
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.astro_calculations import get_engine, julian_day
+from app.utils.search import longitude_crossings, wrap180
+
+# Test data
+TEST_API_KEY = "test_api_key"
+HEADERS = {"API_KEY": TEST_API_KEY}
+TEST_BIRTH = {
+    "date_time": "1993-01-18T15:30:00",
+    "latitude": -23.5505,
+    "longitude": -46.6333,
+    "tz_offset": "-03:00",
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with patch.dict(os.environ, {"API_KEY": TEST_API_KEY}):
+        yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_longitude_crossings_match_dense_sampling():
+    """Test every pass of the Moon over targets is found, in order"""
+    engine = get_engine()
+    start = julian_day(datetime(2024, 1, 1))
+    targets = np.array([0.0, 45.5, 200.0, 359.9])
+
+    def moon(jd):
+        return engine.longitude("Moon", jd)
+
+    crossings = list(longitude_crossings(moon, targets, start, start + 60, 1))
+    times = [jd for jd, _, _ in crossings]
+    assert times == sorted(times)
+    for jd, index, retrograde in crossings:
+        assert abs(wrap180(moon(jd) - targets[index])) < 1e-3
+        assert not retrograde
+    # Passes counted on the unwrapped longitude, sampled every 2.4 hours
+    samples = [moon(t) for t in np.arange(start, start + 60, 0.1)]
+    track = np.unwrap(samples, period=360)
+    passes = sum(
+        np.count_nonzero(np.diff((track - target) // 360))
+        for target in targets
+    )
+    assert len(crossings) == passes
+
+
+def test_transits_around_station(client):
+    """Test a retrograde station gives several exact hits in one window"""
+    response = client.post(
+        "/transits",
+        json={
+            "start": "2024-01-01T00:00:00",
+            "end": "2025-01-01T00:00:00",
+            "natal": {"point": 200.0},
+            "bodies": ["Jupiter"],
+            "aspects": ["trine"],
+        },
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    (window,) = response.json()["windows"]
+    assert window["body"] == "Jupiter"
+    assert window["natal"] == "point"
+    assert window["orb_start"] < window["exact"][0]["date_time"]
+    assert window["exact"][-1]["date_time"] < window["orb_end"]
+    assert [hit["retrograde"] for hit in window["exact"]] == [False, True]
+
+
+def test_transits_from_birth(client):
+    """Test natal points are computed from birth data"""
+    response = client.post(
+        "/transits",
+        json={
+            "start": "2024-01-01T00:00:00",
+            "end": "2024-02-01T00:00:00",
+            "birth": TEST_BIRTH,
+            "bodies": ["Moon"],
+            "aspects": ["conjunction", "opposition"],
+            "orb": 2,
+        },
+        headers=HEADERS,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    chart = client.post("/chart", json=TEST_BIRTH, headers=HEADERS).json()
+    assert set(result["natal"]) == set(chart["planets"]) | {"ascendant", "mc"}
+    # In 31 days the Moon passes each of the 12 points and their opposite
+    # points at least once, and never twice in one window
+    windows = result["windows"]
+    assert all(len(window["exact"]) <= 1 for window in windows)
+    assert 24 <= sum(len(window["exact"]) for window in windows) <= 28
+    for window in windows:
+        for hit in window["exact"]:
+            if window["orb_start"]:
+                assert window["orb_start"] <= hit["date_time"]
+            if window["orb_end"]:
+                assert hit["date_time"] <= window["orb_end"]
+    starts = [w["orb_start"] for w in windows if w["orb_start"]]
+    assert starts == sorted(starts)
+
+
+def test_transits_validation(client):
+    """Test natal and birth are exclusive and ranges are limited"""
+    body = {"start": "2024-01-01T00:00:00", "end": "2024-02-01T00:00:00"}
+    response = client.post("/transits", json=body, headers=HEADERS)
+    assert response.status_code == 422
+    response = client.post(
+        "/transits",
+        json={**body, "natal": {"Sun": 10}, "birth": TEST_BIRTH},
+        headers=HEADERS,
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/transits",
+        json={**body, "end": "2034-01-01T00:00:00", "natal": {"Sun": 10}},
+        headers=HEADERS,
+    )
+    assert response.status_code == 422